@@ -1,14 +1,26 @@
-from flask import Flask, render_template, jsonify, request
-import joblib
+from flask import Flask, render_template, jsonify, request, Response
+import json
+import math
 import os
+import signal
+import time
 import numpy as np
-import tensorflow as tf
-from src.utils.logger import setup_logger
+from src.utils.logger import setup_logger, logging_metrics
 from datetime import datetime
-<<<<<<< HEAD
-=======
 from src.core.sentinel import sentinel
->>>>>>> 5dbcbb5 (First commit)
+from src.core.banlist import BanList
+from src.core.journal import VerdictJournal
+from src.core.history import VerdictHistory
+from src.core.batcher import MicroBatcher
+from src.core.broadcaster import Broadcaster
+from src.core.metrics import Histogram, NoopHistogram, SIZE_BUCKETS, render_value
+from src.core.model_registry import ModelRegistry, ModelNotReady
+from src.core.profiler import SamplingProfiler
+from src.core.pipeline import (Pipeline, ListStage, CacheStage, KMeansGate, LSTMGate,
+                               SOURCE_NAMES, DEEP_LEARNING)
+from src.core.stats import ShardedCounters, RecentLog
+from src.core.stream_server import start_stream_server
+from src.core.verdict_cache import VerdictCache
 
 app = Flask(__name__)
 logger = setup_logger("webapp")
@@ -17,128 +29,586 @@ logger = setup_logger("webapp")
 # Your friend needs to send this key in headers
 API_KEY = "guardnet-secret-access-token"
 
+# Feature order expected by both scalers (must match training)
+FEATURE_COLS = ['duration', 'protocol_type', 'service', 'flag',
+                'src_bytes', 'dst_bytes', 'count', 'srv_count']
+FEATURE_DEFAULTS = {'count': 1, 'srv_count': 1}
+
+# K-Means distance above which a record is handed to the LSTM
+ANOMALY_THRESHOLD = float(os.environ.get("GUARDNET_ANOMALY_THRESHOLD", 3.0))
+# Compare squared distances against the squared threshold (no sqrt for outliers)
+SQUARED_DISTANCE = os.environ.get("GUARDNET_SQUARED_DISTANCE", "1") == "1"
+# Cluster confidence = 1 - distance / scale; LSTM probability above which a record is malicious
+CONFIDENCE_SCALE = float(os.environ.get("GUARDNET_CONFIDENCE_SCALE", 5.0))
+LSTM_THRESHOLD = float(os.environ.get("GUARDNET_LSTM_THRESHOLD", 0.5))
+# Detector stages (see src/core/pipeline.py). Default: ordered by cost.
+PIPELINE_STAGES = os.environ.get("GUARDNET_PIPELINE", "lists,cache,kmeans,lstm").split(",")
+# Pre-filters on the record's src_ip (comma-separated)
+ALLOWLIST = [ip for ip in os.environ.get("GUARDNET_ALLOWLIST", "").split(",") if ip]
+DENYLIST = [ip for ip in os.environ.get("GUARDNET_DENYLIST", "").split(",") if ip]
+# Upper bound on records accepted by /api/analyze/batch in one request
+MAX_BATCH_SIZE = int(os.environ.get("GUARDNET_MAX_BATCH_SIZE", 10000))
+# LSTM micro-batching: flush after N rows or T milliseconds, whichever first
+LSTM_MAX_BATCH = int(os.environ.get("GUARDNET_LSTM_MAX_BATCH", 64))
+LSTM_MAX_WAIT_MS = float(os.environ.get("GUARDNET_LSTM_MAX_WAIT_MS", 2.0))
+# Longest a request waits for its LSTM micro-batch before answering 503
+LSTM_TIMEOUT = float(os.environ.get("GUARDNET_LSTM_TIMEOUT", 10.0))
+# LSTM runtime: "numpy" (no TensorFlow), "keras", or "auto" (numpy if exported)
+LSTM_BACKEND = os.environ.get("GUARDNET_LSTM_BACKEND", "auto")
+# Optional binary ingestion socket, e.g. "tcp://0.0.0.0:5001" or "unix:///tmp/guardnet.sock"
+STREAM_ADDR = os.environ.get("GUARDNET_STREAM_ADDR")
+# Verdict cache for repeated feature vectors (size 0 = disabled).
+# Quantum: rounding step, one value for all features or 8 comma-separated.
+CACHE_SIZE = int(os.environ.get("GUARDNET_CACHE_SIZE", 0))
+CACHE_TTL = float(os.environ.get("GUARDNET_CACHE_TTL", 60))
+CACHE_QUANTUM = [float(q) for q in os.environ.get("GUARDNET_CACHE_QUANTUM", "0").split(",")]
+# Reload models when new artifacts land in src/ml/ (no restart, stats are kept)
+HOT_RELOAD = os.environ.get("GUARDNET_HOT_RELOAD", "1") == "1"
+# Sequence mode (LSTM trained on windows): fields that identify one history,
+# plus its memory cap and idle eviction. Non-feature fields (src_ip) come from JSON.
+SEQUENCE_KEY = os.environ.get("GUARDNET_SEQUENCE_KEY", "src_ip,service").split(",")
+SEQUENCE_MEMORY_MB = float(os.environ.get("GUARDNET_SEQUENCE_MEMORY_MB", 64))
+SEQUENCE_IDLE = float(os.environ.get("GUARDNET_SEQUENCE_IDLE", 300))
+# Hot-path latency histograms + Prometheus /metrics (0 = no timers at all)
+METRICS_ENABLED = os.environ.get("GUARDNET_METRICS", "1") == "1"
+# On-demand sampling profiler: admin key for /api/admin/profile (defaults to
+# the API key), output directory, and a signal that starts a default profile
+ADMIN_KEY = os.environ.get("GUARDNET_ADMIN_KEY", API_KEY)
+PROFILE_DIR = os.environ.get("GUARDNET_PROFILE_DIR", "profiles")
+PROFILE_SIGNAL = os.environ.get("GUARDNET_PROFILE_SIGNAL", "SIGUSR2")
+MAX_PROFILE_SECONDS = 300
+# Dashboard push (/api/stream): update rate and open streams per process.
+# Each open stream holds one server thread for its lifetime, so at most
+# GUARDNET_THREADS - 1 (gunicorn_conf.py): one thread is always left for /api/analyze
+SSE_INTERVAL = float(os.environ.get("GUARDNET_SSE_INTERVAL", 1.0))
+SERVER_THREADS = int(os.environ.get("GUARDNET_THREADS", 4))
+SSE_MAX_CLIENTS = max(0, min(int(os.environ.get("GUARDNET_SSE_MAX_CLIENTS", SERVER_THREADS - 1)),
+                             SERVER_THREADS - 1))
+# Sentinel automation: per-source sliding window, rule thresholds within it,
+# re-alert cooldown, tracked-source cap, and response actions (ban log + optional webhook)
+SENTINEL_WINDOW = float(os.environ.get("GUARDNET_SENTINEL_WINDOW", 10))
+SENTINEL_RATE = int(os.environ.get("GUARDNET_SENTINEL_RATE", 5))
+SENTINEL_FANOUT = int(os.environ.get("GUARDNET_SENTINEL_FANOUT", 20))
+SENTINEL_FLAGS = int(os.environ.get("GUARDNET_SENTINEL_FLAGS", 10))
+SENTINEL_COOLDOWN = float(os.environ.get("GUARDNET_SENTINEL_COOLDOWN", 30))
+SENTINEL_MAX_SOURCES = int(os.environ.get("GUARDNET_SENTINEL_MAX_SOURCES", 50000))
+SENTINEL_BAN_LOG = os.environ.get("GUARDNET_SENTINEL_BAN_LOG", "banned_ips.log")
+SENTINEL_WEBHOOK = os.environ.get("GUARDNET_SENTINEL_WEBHOOK")
+# Ban list: sources the Sentinel blocks for BAN_TTL seconds, exported as an
+# `ipset restore` file (at most every BAN_FLUSH_INTERVAL s) and checked by the
+# "lists" stage before any model work
+BAN_FILE = os.environ.get("GUARDNET_BAN_FILE", "banned_ips.ipset")
+BAN_SET = os.environ.get("GUARDNET_BAN_SET", "guardnet_banned")
+BAN_TTL = int(os.environ.get("GUARDNET_BAN_TTL", 3600))
+BAN_FLUSH_INTERVAL = float(os.environ.get("GUARDNET_BAN_FLUSH_INTERVAL", 1.0))
+# Verdict journal (opt-in): append-only binary segments of every verdict in
+# this directory, rotated at JOURNAL_SEGMENT_MB (JOURNAL_MAX_SEGMENTS > 0 keeps
+# only the newest in the directory, all workers together). Replay with `python -m src.app.replay`.
+JOURNAL_DIR = os.environ.get("GUARDNET_JOURNAL_DIR")
+JOURNAL_SEGMENT_MB = int(os.environ.get("GUARDNET_JOURNAL_SEGMENT_MB", 64))
+JOURNAL_MAX_SEGMENTS = int(os.environ.get("GUARDNET_JOURNAL_MAX_SEGMENTS", 0))
+JOURNAL_FSYNC = os.environ.get("GUARDNET_JOURNAL_FSYNC", "0") == "1"
+# Time-bucketed verdict counts for /api/stats/history (fixed memory, see
+# src/core/history.py); ports with their own service column (comma-separated)
+HISTORY_ENABLED = os.environ.get("GUARDNET_HISTORY", "1") == "1"
+HISTORY_SERVICES = [int(p) for p in os.environ.get("GUARDNET_HISTORY_SERVICES", "").split(",") if p]
+
 # --- GLOBAL MEMORY ---
-RECENT_LOGS = []
-STATS = {"normal": 0, "malicious": 0, "anomalies": 0}
+# Lock-free per-thread counters. With GUARDNET_SHARED_STATS=1 they live in
+# shared memory so forked gunicorn workers report cluster-wide totals.
+SHARED_STATS = os.environ.get("GUARDNET_SHARED_STATS", "0") == "1"
+STATS = ShardedCounters(["normal", "malicious", "anomalies"], shared=SHARED_STATS)
+MAX_RECENT_LOGS = 20
+RECENT_LOGS = RecentLog(MAX_RECENT_LOGS)
+if HISTORY_ENABLED:
+    HISTORY = VerdictHistory(**({"services": HISTORY_SERVICES} if HISTORY_SERVICES else {}), shared=SHARED_STATS)
+else:
+    HISTORY = None
+BAN_LIST = BanList(BAN_FILE, ttl=BAN_TTL, set_name=BAN_SET, flush_interval=BAN_FLUSH_INTERVAL)
+sentinel.configure(window=SENTINEL_WINDOW, rate=SENTINEL_RATE, fanout=SENTINEL_FANOUT,
+                   flags=SENTINEL_FLAGS, cooldown=SENTINEL_COOLDOWN, max_sources=SENTINEL_MAX_SOURCES,
+                   ban_log=SENTINEL_BAN_LOG, webhook=SENTINEL_WEBHOOK, bans=BAN_LIST)
+
+# Where request time goes: request phases, detector stages (timed by the
+# pipeline) and the LSTM forward pass per micro-batch. Same sharing as STATS.
+TIMED_STAGES = ["parse", "lists", "cache", "kmeans", "lstm", "stats", "history", "journal", "sentinel", "logs",
+                "respond", "request", "batch_request", "lstm_predict"]
+if METRICS_ENABLED:
+    TIMINGS = Histogram("guardnet_stage_seconds", "stage", TIMED_STAGES, shared=SHARED_STATS,
+                        help="Time spent per request phase / detector stage")
+    LSTM_BATCHES = Histogram("guardnet_lstm_batch_rows", "model", ["lstm"], SIZE_BUCKETS, unit=1,
+                             shared=SHARED_STATS, help="Rows per LSTM micro-batch")
+else:
+    TIMINGS = LSTM_BATCHES = NoopHistogram()
 
 # --- LOAD MODELS ---
 BASE_DIR = os.getcwd()
 ML_DIR = os.path.join(BASE_DIR, 'src/ml')
-LSTM_PATH = os.path.join(ML_DIR, 'guardnet_lstm.keras')
-LSTM_SCALER_PATH = os.path.join(ML_DIR, 'scaler.joblib')
-KMEANS_PATH = os.path.join(ML_DIR, 'kmeans_model.joblib')
-KMEANS_SCALER_PATH = os.path.join(ML_DIR, 'kmeans_scaler.joblib')
+
+# K-Means loads now; the LSTM loads in the background ("background"),
+# on first anomaly ("lazy") or before serving ("eager"), then gets warmed up
+registry = ModelRegistry(
+    ML_DIR,
+    lstm_backend=LSTM_BACKEND,
+    lstm_load=os.environ.get("GUARDNET_LSTM_LOAD", "background"),
+    warmup_rows=int(os.environ.get("GUARDNET_WARMUP_ROWS", 8)),
+    sequence_memory=int(SEQUENCE_MEMORY_MB * 1024 * 1024),
+    sequence_idle=SEQUENCE_IDLE
+)
 
 try:
-    if not os.path.exists(LSTM_PATH): raise FileNotFoundError("Model files missing")
-    
-    # Load Models
-    lstm_model = tf.keras.models.load_model(LSTM_PATH)
-    lstm_scaler = joblib.load(LSTM_SCALER_PATH)
-    kmeans_model = joblib.load(KMEANS_PATH)
-    kmeans_scaler = joblib.load(KMEANS_SCALER_PATH)
-    
-    # Auto-Calibrate Clusters (Tiny bytes = Malware)
-    centroids = kmeans_scaler.inverse_transform(kmeans_model.cluster_centers_)
-    if centroids[0][4] < centroids[1][4]:
-        MALWARE_CLUSTER = 0
-    else:
-        MALWARE_CLUSTER = 1
-        
-    MODELS_LOADED = True
+    registry.load()
     logger.info("✅ Production AI Engine Online.")
 except Exception as e:
     logger.error(f"❌ AI Engine Offline: {e}")
-    MODELS_LOADED = False
+
+def _observe_lstm_batch(rows, seconds):
+    LSTM_BATCHES.observe("lstm", rows)
+    TIMINGS.observe("lstm_predict", seconds)
+
+# Concurrent requests share one LSTM forward pass instead of one predict each
+lstm_batcher = MicroBatcher(
+    registry.lstm_predict,
+    max_batch_size=LSTM_MAX_BATCH,
+    max_wait_ms=LSTM_MAX_WAIT_MS,
+    name="lstm",
+    on_batch=_observe_lstm_batch if METRICS_ENABLED else None
+)
+
+verdict_cache = VerdictCache(CACHE_SIZE, CACHE_TTL, CACHE_QUANTUM) if CACHE_SIZE > 0 else None
+
+profiler = SamplingProfiler(PROFILE_DIR)
+
+journal = VerdictJournal(JOURNAL_DIR, JOURNAL_SEGMENT_MB << 20, JOURNAL_MAX_SEGMENTS,
+                         fsync=JOURNAL_FSYNC) if JOURNAL_DIR else None
+
+
+def _extract_features(data):
+    """Dict -> ordered feature row (missing fields fall back to defaults)"""
+    if not isinstance(data, dict):
+        raise ValueError("Record must be a JSON object")
+    return [float(data.get(col, FEATURE_DEFAULTS.get(col, 0))) for col in FEATURE_COLS]
+
+
+def _sequence_keys(X, records=None):
+    """One history key per row, built from the SEQUENCE_KEY fields"""
+    columns = []
+    for field in SEQUENCE_KEY:
+        if field in FEATURE_COLS:
+            column = X[:, FEATURE_COLS.index(field)].tolist()
+        else:
+            column = [None] * len(X)
+        if records is not None:
+            column = [r.get(field, c) for r, c in zip(records, column)]
+        columns.append(column)
+    return list(zip(*columns))
+
+
+# --- DETECTOR PIPELINE ---
+# Cheapest stages first; each one only sees the rows no earlier stage decided
+STAGES = {
+    "lists": lambda: ListStage(ALLOWLIST, DENYLIST, bans=BAN_LIST),
+    "cache": lambda: CacheStage(verdict_cache, lambda: registry.version) if verdict_cache else None,
+    "kmeans": lambda: KMeansGate(ANOMALY_THRESHOLD, CONFIDENCE_SCALE, SQUARED_DISTANCE),
+    "lstm": lambda: LSTMGate(lstm_batcher, LSTM_THRESHOLD, _sequence_keys, LSTM_TIMEOUT),
+}
+pipeline = Pipeline(
+    [stage for stage in (STAGES[name.strip()]() for name in PIPELINE_STAGES) if stage is not None],
+    models_fn=lambda: registry.active,
+    sort_by_cost="GUARDNET_PIPELINE" not in os.environ, # An explicit order is kept as given
+    observe=TIMINGS.observe if METRICS_ENABLED else None
+)
+
+
+def _run_gates(X, records=None):
+    """
+    Vectorized inference over an (N, 8) matrix of raw features.
+    Returns (malicious, confidence, source) arrays in input order, where
+    `source` is the SOURCE_NAMES code of the stage that decided each row.
+    `records` (the JSON dicts, if any) supply src_ip for lists and sequence keys.
+    """
+    batch = pipeline.run(X, records)
+    return batch.malicious, batch.confidence, batch.source
+
+
+def _status(malicious):
+    return "Malicious" if malicious else "Normal"
+
+def _source(source):
+    return SOURCE_NAMES[source]
+
+
+def _record_verdicts(X, malicious, confidence, source, records=None, ids=None):
+    """
+    Apply STATS / RECENT_LOGS / Sentinel updates for a block of verdicts.
+    `records` are the original JSON dicts; binary stream callers pass `ids`
+    instead and dicts are only built for the rows that need one.
+    """
+    def record(i):
+        if records is not None:
+            return records[i]
+        return dict(zip(FEATURE_COLS, X[i].tolist()), id=int(ids[i]))
+
+    start = TIMINGS.start()
+    n_malicious = int(np.count_nonzero(malicious))
+    STATS.add("anomalies", int(np.count_nonzero(source == DEEP_LEARNING)))
+    STATS.add("malicious", n_malicious)
+    STATS.add("normal", len(X) - n_malicious)
+    start = TIMINGS.lap("stats", start)
+
+    if HISTORY is not None:
+        HISTORY.record(X[:, 1], X[:, 2], malicious, source)
+        start = TIMINGS.lap("history", start)
+
+    if journal is not None:
+        journal.append(ids if ids is not None else _record_ids(records), X, malicious, confidence, source)
+        start = TIMINGS.lap("journal", start)
+
+    if n_malicious:
+        sentinel.log_threats([record(i) for i in np.flatnonzero(malicious)])
+        start = TIMINGS.lap("sentinel", start)
+
+    # Only the newest entries can survive in RECENT_LOGS, skip the rest;
+    # one extend() keeps a batch's entries contiguous under one lock
+    now = datetime.now().strftime("%H:%M:%S")
+    RECENT_LOGS.extend([{
+        "id": record(i).get('id', 'REALTIME'),
+        "time": now,
+        "status": _status(malicious[i]),
+        "source": _source(source[i]),
+        "confidence": f"{max(0, min(float(confidence[i]), 1.0)):.2%}",
+        "info": f"{int(X[i][4])}B / Port {int(X[i][2])}"
+    } for i in range(max(0, len(X) - MAX_RECENT_LOGS), len(X))])
+    TIMINGS.lap("logs", start)
+
+
+def _record_ids(records):
+    ids = np.zeros(len(records), dtype=np.uint64)
+    for i, data in enumerate(records):
+        try:
+            ids[i] = int(data.get('id', 0))
+        except (TypeError, ValueError, OverflowError):
+            pass # Non-numeric ids are journaled as 0
+    return ids
+
+
+def analyze_stream_chunk(ids, X):
+    """Binary stream ingestion entry point (see src/core/stream_server.py)"""
+    malicious, confidence, source = _run_gates(X)
+    _record_verdicts(X, malicious, confidence, source, ids=ids)
+    return malicious, confidence, source
+
+
+def start_stream_ingestion():
+    """Starts the binary socket server if GUARDNET_STREAM_ADDR is set"""
+    if not STREAM_ADDR:
+        return None
+    if not registry.kmeans_loaded:
+        logger.error("Stream ingestion not started: AI Engine Offline")
+        return None
+    return start_stream_server(STREAM_ADDR, analyze_stream_chunk, API_KEY)
+
+
+def start_hot_reload():
+    """Watches src/ml/ for retrained models (per process: call after forking)"""
+    if HOT_RELOAD:
+        registry.watch()
+
+
+def _model_status():
+    if not registry.kmeans_loaded:
+        return "Offline"
+    return "Online" if registry.ready else "Online (LSTM warming up)"
+
+
+# --- DASHBOARD STREAM ---
+# Only called from the broadcaster thread: remembers what the clients have seen
+_dashboard_seen = {"stats": {}, "log_seq": -1, "model_name": None}
+
+def _dashboard_delta():
+    """Counters that changed, log entries added and model status since the last call"""
+    stats = STATS.snapshot()
+    log_seq = RECENT_LOGS.last_seq
+    model_name = _model_status()
+    seen = _dashboard_seen
+    delta = {}
+    changed = {name: value for name, value in stats.items() if seen["stats"].get(name) != value}
+    if changed:
+        delta["stats"] = changed
+    if log_seq != seen["log_seq"]:
+        delta["logs"] = RECENT_LOGS.snapshot(since=seen["log_seq"], until=log_seq)
+    if model_name != seen["model_name"]:
+        delta["model_name"] = model_name
+    seen.update(stats=stats, log_seq=log_seq, model_name=model_name)
+    return delta
+
+def _dashboard_full():
+    return {"model_name": _dashboard_seen["model_name"], "stats": _dashboard_seen["stats"],
+            "logs": RECENT_LOGS.snapshot(until=_dashboard_seen["log_seq"])}
+
+dashboard_stream = Broadcaster(_dashboard_delta, _dashboard_full, SSE_INTERVAL, SSE_MAX_CLIENTS)
+
+
+def install_profile_signal():
+    """
+    `kill -USR2 <pid>` profiles that process for 10s. Call from the main
+    thread of every serving process (gunicorn: post_worker_init; the master uses USR2).
+    """
+    if not PROFILE_SIGNAL:
+        return
+    signal.signal(getattr(signal, PROFILE_SIGNAL), lambda signum, frame: profiler.start())
+
+
+def _parse_batch_body():
+    """Accepts a JSON array of records, or NDJSON (one record per line)"""
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        body = request.get_data(as_text=True)
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+    records = request.get_json(force=True)
+    if not isinstance(records, list):
+        raise ValueError("Batch body must be a JSON array")
+    return records
+
+
+def _authorized():
+    # C++ must send header: "x-api-key: guardnet-secret-access-token"
+    client_key = request.headers.get('x-api-key')
+    if client_key != API_KEY:
+        logger.warning(f"Unauthorized access attempt from {request.remote_addr}")
+        return False
+    return True
+
+
+@app.after_request
+def _count_profiled_request(response):
+    if profiler.active: # One attribute check per request when not profiling
+        profiler.count_request()
+    return response
+
 
 @app.route('/')
 def dashboard():
     return render_template('dashboard.html')
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness: the process is up and serving HTTP
+    return jsonify({"status": "alive"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    # Readiness: both gates loaded and warmed up
+    status = registry.status()
+    return jsonify(status), (200 if status["ready"] else 503)
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    status = "Online" if MODELS_LOADED else "Offline"
-    return jsonify({"model_name": status, "stats": STATS, "logs": RECENT_LOGS})
+    return jsonify({
+        "model_name": _model_status(),
+        "stats": STATS.snapshot(),
+        "logs": RECENT_LOGS.snapshot(),
+        "model": registry.model_info(),
+        "pipeline": pipeline.metrics(),
+        "lstm_batcher": lstm_batcher.metrics(),
+        "sequences": registry.active.sequences.metrics() if registry.active.sequences else None,
+        "verdict_cache": verdict_cache.metrics() if verdict_cache else None,
+        "sse": dashboard_stream.metrics(),
+        "sentinel": sentinel.metrics(),
+        "bans": BAN_LIST.metrics(),
+        "logging": logging_metrics(),
+        "journal": journal.metrics() if journal else None
+    })
+
+@app.route('/api/stats/history', methods=['GET'])
+def stats_history():
+    # ?range=3600 (seconds back from now) or ?start=&end= (unix time),
+    # &group_by=verdict|source|protocol|service, &step=60 (bucket seconds)
+    if HISTORY is None:
+        return jsonify({"error": "History is disabled (GUARDNET_HISTORY=0)"}), 404
+    now = time.time()
+    try:
+        end = float(request.args.get("end", now))
+        window = float(request.args.get("range", 3600))
+        start = float(request.args.get("start", end - window))
+        step = float(request.args["step"]) if "step" in request.args else None
+    except ValueError:
+        return jsonify({"error": "range, start, end and step must be numbers"}), 400
+    if not all(math.isfinite(v) for v in (end, window, start, step or 1)) or window <= 0 or (
+            step is not None and step <= 0):
+        return jsonify({"error": "range, start, end and step must be finite, range and step positive"}), 400
+    # Nothing older than the coarsest tier, nothing newer than now
+    end = min(end, now)
+    start = max(start, now - HISTORY.retention)
+    if start >= end:
+        return jsonify({"error": "Empty time range (start must be before end, within the retained window)"}), 400
+    try:
+        return jsonify(HISTORY.query(start, end, request.args.get("group_by", "verdict"),
+                                     int(min(step, HISTORY.retention)) if step else None))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/stream', methods=['GET'])
+def stream_stats():
+    # Server-sent events: a "full" snapshot, then "delta" events with the
+    # counters that changed and the new log entries (see dashboard.html)
+    sub = dashboard_stream.subscribe()
+    if sub is None:
+        return jsonify({"error": "Too many dashboard streams, poll /api/stats"}), 503
+    return Response(dashboard_stream.stream(sub), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus text format. With GUARDNET_SHARED_STATS=1 (gunicorn) the
+    # counters and histograms are cluster-wide; queue depths are per process.
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Metrics disabled"}), 404
+    stats = STATS.snapshot()
+    info = registry.model_info()
+    lines = TIMINGS.render() + LSTM_BATCHES.render()
+    lines += render_value("guardnet_verdicts_total", "counter", "Verdicts by outcome",
+                          {"normal": stats["normal"], "malicious": stats["malicious"]}, "status")
+    lines += render_value("guardnet_anomalies_total", "counter", "Records decided by the LSTM",
+                          stats["anomalies"])
+    lines += render_value("guardnet_model_ready", "gauge", "1 once both gates are loaded and warmed up",
+                          int(registry.ready))
+    lines += render_value("guardnet_model_version", "gauge", "Active model set version", info["version"])
+    lines += render_value("guardnet_model_load_seconds", "gauge", "Load + warm-up time of the active set",
+                          info["load_ms"] / 1000)
+    lines += render_value("guardnet_model_reloads_total", "counter", "Hot reloads", info["reloads"])
+    lines += render_value("guardnet_lstm_queue_depth", "gauge", "Inputs waiting for an LSTM micro-batch",
+                          lstm_batcher.metrics()["queue_depth"])
+    lines += render_value("guardnet_sentinel_queue_depth", "gauge", "Threats/alerts queued for the Sentinel",
+                          sentinel.queue_depth())
+    lines += render_value("guardnet_sentinel_alerts_total", "counter", "Sentinel alerts by rule",
+                          sentinel.metrics()["alerts"], "rule")
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/bans', methods=['GET'])
+def bans():
+    # Delta feed for firewalls/SOAR: GET /api/bans?since=<version> returns the
+    # bans added/removed after that version (or the full list if it is too old)
+    if not _authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"error": "Invalid version"}), 400
+    BAN_LIST.refresh()
+    return jsonify(BAN_LIST.changes(since))
+
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+def profile():
+    # POST {"seconds": 10, "requests": 500, "interval_ms": 5, "all_threads": false}
+    # starts a sampling profile of THIS process; GET returns the last result
+    if request.headers.get('x-api-key') != ADMIN_KEY:
+        logger.warning(f"Unauthorized admin access attempt from {request.remote_addr}")
+        return jsonify({"error": "Unauthorized"}), 401
+    if request.method == 'GET':
+        return jsonify(profiler.status())
+
+    options = request.get_json(silent=True) or {}
+    try:
+        seconds = float(options.get("seconds", 10))
+        requests_limit = int(options["requests"]) if options.get("requests") else None
+        interval = float(options.get("interval_ms", 5)) / 1000
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({"error": "Invalid profile options"}), 400
+    if not (math.isfinite(seconds) and math.isfinite(interval) and seconds > 0 and interval > 0):
+        return jsonify({"error": "seconds and interval_ms must be positive numbers"}), 400
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    if not profiler.start(seconds, requests_limit, interval, bool(options.get("all_threads"))):
+        return jsonify({"error": "A profile is already running"}), 409
+    return jsonify({"status": "profiling", "pid": os.getpid(), "seconds": seconds,
+                    "requests": requests_limit, "out_dir": PROFILE_DIR}), 202
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze_packet():
-    global STATS
-    
     # 1. SECURITY CHECK (API KEY)
-    # C++ must send header: "x-api-key: guardnet-secret-access-token"
-    client_key = request.headers.get('x-api-key')
-    if client_key != API_KEY:
-        logger.warning(f"Unauthorized access attempt from {request.remote_addr}")
+    if not _authorized():
         return jsonify({"error": "Unauthorized"}), 401
 
-    if not MODELS_LOADED:
+    if not registry.kmeans_loaded:
         return jsonify({"error": "AI Engine Offline"}), 503
 
+    start = TIMINGS.start()
     try:
         data = request.json
         # 2. ROBUST INPUT HANDLING (Default to 0 if missing)
-        features_raw = [
-            float(data.get('duration', 0)),
-            float(data.get('protocol_type', 0)),
-            float(data.get('service', 0)),
-            float(data.get('flag', 0)),
-            float(data.get('src_bytes', 0)),
-            float(data.get('dst_bytes', 0)),
-            float(data.get('count', 1)),
-            float(data.get('srv_count', 1))
-        ]
-        
-        # --- GATE 1: CLUSTERING ---
-        features_k = kmeans_scaler.transform([features_raw])
-        distances = kmeans_model.transform(features_k)
-        min_dist = np.min(distances)
-        nearest = np.argmin(distances)
-        
-        # --- DECISION LOGIC ---
-        source = "Clustering"
-        # If distance > 3.0, it's an anomaly -> Ask Deep Learning
-        if min_dist > 3.0: 
-            source = "Deep Learning"
-            features_lstm = lstm_scaler.transform([features_raw])
-            features_lstm = np.reshape(features_lstm, (1, 1, 8))
-            pred = lstm_model.predict(features_lstm, verbose=0)[0][0]
-            status = "Malicious" if pred > 0.5 else "Normal"
-            confidence = float(pred)
-            STATS["anomalies"] += 1
-        else:
-            status = "Malicious" if nearest == MALWARE_CLUSTER else "Normal"
-            confidence = 1.0 - (min_dist / 5.0)
+        features_raw = _extract_features(data)
+        X = np.array([features_raw])
+        TIMINGS.lap("parse", start)
+
+        # 3. DETECTOR PIPELINE (batch of one)
+        malicious, confidence, source = _run_gates(X, [data])
 
         # Update Stats & Logs
-<<<<<<< HEAD
-        if status == "Malicious": STATS["malicious"] += 1
-=======
-        if status == "Malicious": 
-            STATS["malicious"] += 1
-            sentinel.log_threat(data)
->>>>>>> 5dbcbb5 (First commit)
-        else: STATS["normal"] += 1
-        
-        log_entry = {
-            "id": data.get('id', 'REALTIME'),
-            "time": datetime.now().strftime("%H:%M:%S"),
-            "status": status,
-            "source": source,
-            "confidence": f"{max(0, min(confidence, 1.0)):.2%}",
-            "info": f"{int(features_raw[4])}B / Port {int(features_raw[2])}"
-        }
-        RECENT_LOGS.insert(0, log_entry)
-        if len(RECENT_LOGS) > 20: RECENT_LOGS.pop()
-
-        return jsonify({"status": status, "confidence": confidence})
+        _record_verdicts(X, malicious, confidence, source, records=[data])
 
+        respond = TIMINGS.start()
+        response = jsonify({"status": _status(malicious[0]), "confidence": float(confidence[0]),
+                            "source": _source(source[0])})
+        TIMINGS.lap("respond", respond)
+        TIMINGS.lap("request", start)
+        return response
+
+    except ModelNotReady as e:
+        logger.warning(f"Analysis deferred: {e}")
+        return jsonify({"error": "AI Engine Warming Up"}), 503
+    except TimeoutError:
+        logger.error(f"Analysis timed out: no LSTM result within {LSTM_TIMEOUT}s")
+        return jsonify({"error": "AI Engine Busy"}), 503
     except Exception as e:
         logger.error(f"Analysis Error: {e}")
         return jsonify({"error": "Invalid Data Format"}), 400
 
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    if not _authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if not registry.kmeans_loaded:
+        return jsonify({"error": "AI Engine Offline"}), 503
+
+    start = TIMINGS.start()
+    try:
+        records = _parse_batch_body()
+        if len(records) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE})"}), 413
+        if not records:
+            return jsonify({"count": 0, "results": []})
+
+        X = np.array([_extract_features(r) for r in records], dtype=np.float64)
+        TIMINGS.lap("parse", start)
+        malicious, confidence, source = _run_gates(X, records)
+        _record_verdicts(X, malicious, confidence, source, records=records)
+
+        respond = TIMINGS.start()
+        results = [
+            {"id": r.get('id'), "status": _status(m), "confidence": c, "source": _source(d)}
+            for r, m, c, d in zip(records, malicious, confidence.tolist(), source)
+        ]
+        response = jsonify({"count": len(results), "results": results})
+        TIMINGS.lap("respond", respond)
+        TIMINGS.lap("batch_request", start)
+        return response
+
+    except ModelNotReady as e:
+        logger.warning(f"Batch analysis deferred: {e}")
+        return jsonify({"error": "AI Engine Warming Up"}), 503
+    except TimeoutError:
+        logger.error(f"Batch analysis timed out: no LSTM result within {LSTM_TIMEOUT}s")
+        return jsonify({"error": "AI Engine Busy"}), 503
+    except Exception as e:
+        logger.error(f"Batch Analysis Error: {e}")
+        return jsonify({"error": "Invalid Data Format"}), 400
+
 if __name__ == '__main__':
-<<<<<<< HEAD
-=======
+    # Development server. In production use:
+    #   gunicorn -c src/app/gunicorn_conf.py src.app.app:app
     sentinel.start()
->>>>>>> 5dbcbb5 (First commit)
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    start_stream_ingestion()
+    start_hot_reload()
+    install_profile_signal()
+    app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,59 @@
+"""
+Production launch config for GuardNet.
+
+    gunicorn -c src/app/gunicorn_conf.py src.app.app:app
+
+The app module is imported ONCE in the gunicorn master (preload_app), so the
+models are loaded before forking and every worker shares the same memory
+pages copy-on-write instead of loading its own copy.
+"""
+import multiprocessing
+import os
+
+# Models must be fully loaded in the master before fork. TensorFlow is not
+# fork-safe, so the TensorFlow-free NumPy LSTM backend is the default here.
+# No silent Keras fallback: a stale .npz (retrained .keras, not re-exported)
+# is refused and reported at startup instead of served with the new scaler.
+os.environ.setdefault("GUARDNET_LSTM_LOAD", "eager")
+os.environ.setdefault("GUARDNET_LSTM_BACKEND", "numpy")
+# Counters in shared memory -> /api/stats shows totals across all workers
+os.environ.setdefault("GUARDNET_SHARED_STATS", "1")
+
+bind = os.environ.get("GUARDNET_BIND", "0.0.0.0:5000")
+preload_app = True
+
+# Inference is CPU-bound NumPy work: one process per core sidesteps the GIL,
+# a few threads per worker overlap network I/O and the LSTM micro-batch wait
+workers = int(os.environ.get("GUARDNET_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUARDNET_THREADS", 4))
+worker_class = "gthread"
+keepalive = 5
+timeout = 30
+
+def when_ready(server):
+    # Runs in the master after preload: ONE Sentinel for the whole cluster,
+    # workers forward their threats to it over a queue
+    from src.core.sentinel import sentinel
+    sentinel.enable_ipc()
+    sentinel.start()
+
+    # The binary ingestion socket (if configured) is also served by the master
+    from src.app.app import start_stream_ingestion, start_hot_reload
+    if start_stream_ingestion():
+        start_hot_reload() # The master only needs fresh models if it serves the socket
+    from src.app.app import registry
+    if registry.lstm_error:
+        server.log.error(f"LSTM offline, only Gate 1 will answer: {registry.lstm_error}")
+    server.log.info(f"GuardNet ready: {workers} workers x {threads} threads")
+
+def post_fork(server, worker):
+    # Watcher threads do not survive fork: each worker follows src/ml/ itself
+    # and swaps in retrained models on its own
+    from src.app.app import start_hot_reload
+    start_hot_reload()
+
+def post_worker_init(worker):
+    # After the worker reset its signal handlers (post_fork is too early):
+    # kill -USR2 <worker pid> profiles that worker
+    from src.app.app import install_profile_signal
+    install_profile_signal()
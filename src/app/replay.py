@@ -0,0 +1,101 @@
+"""
+Feeds verdict journal segments back through the CURRENT models and diffs
+the new verdicts against the ones given in production.
+
+    python -m src.app.replay verdicts/                    # every segment, oldest first
+    python -m src.app.replay verdicts/verdicts-...gnj --since 1760000000 --changed changed.jsonl
+
+Only model verdicts (Clustering / Deep Learning) are replayed by default:
+allow/deny/ban list decisions depend on lists, not on the models (--all
+includes them).
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+from collections import Counter
+from src.core.journal import RECORD, scan
+from src.core.pipeline import SOURCE_NAMES, DEEP_LEARNING
+
+CHUNK_ROWS = 4096
+
+def diff(records, malicious, confidence, source):
+    """Compares journaled verdicts with replayed ones -> summary dict + mask of changed rows"""
+    before = records["malicious"].astype(bool)
+    changed = before != malicious
+    transitions = Counter(
+        f"{SOURCE_NAMES[a]} -> {SOURCE_NAMES[b]}"
+        for a, b in zip(records["source"].tolist(), source.tolist()) if a != b
+    )
+    summary = {
+        "rows": len(records),
+        "changed": int(changed.sum()),
+        "normal_to_malicious": int((changed & malicious).sum()),
+        "malicious_to_normal": int((changed & before).sum()),
+        "gate_changes": dict(transitions.most_common()),
+        "mean_confidence_delta": round(float(np.mean(np.abs(confidence - records["confidence"]))), 4)
+                                 if len(records) else 0.0
+    }
+    return summary, changed
+
+def replay(paths, since=None, until=None, include_lists=False, changed_path=None):
+    os.environ.setdefault("GUARDNET_LSTM_LOAD", "eager") # Don't replay against a half-loaded model set
+    import src.app.app as server
+
+    parts = list(scan(paths, start=since, end=until))
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD)
+    skipped = 0
+    if len(records) and not include_lists:
+        model = records["source"] <= DEEP_LEARNING
+        skipped = int((~model).sum())
+        records = records[model]
+
+    started = time.perf_counter()
+    results = [server._run_gates(np.ascontiguousarray(records["features"][i:i + CHUNK_ROWS]))
+               for i in range(0, len(records), CHUNK_ROWS)]
+    elapsed = time.perf_counter() - started
+    if results:
+        malicious, confidence, source = (np.concatenate(parts) for parts in zip(*results))
+    else:
+        malicious = confidence = source = np.zeros(0)
+
+    summary, changed = diff(records, malicious, confidence, source)
+    summary.update(skipped=skipped, model_version=server.registry.version,
+                   rows_per_second=round(len(records) / elapsed) if elapsed else None)
+    if changed_path:
+        with open(changed_path, "w") as f:
+            for i in np.flatnonzero(changed):
+                r = records[i]
+                f.write(json.dumps({
+                    "time": float(r["time"]), "id": int(r["id"]),
+                    **dict(zip(server.FEATURE_COLS, r["features"].tolist())),
+                    "before": {"malicious": bool(r["malicious"]), "source": SOURCE_NAMES[r["source"]],
+                               "confidence": round(float(r["confidence"]), 4)},
+                    "after": {"malicious": bool(malicious[i]), "source": SOURCE_NAMES[source[i]],
+                              "confidence": round(float(confidence[i]), 4)}
+                }) + "\n")
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a verdict journal through the current models")
+    parser.add_argument("paths", nargs="+", help="Journal directory and/or segment files")
+    parser.add_argument("--since", type=float, help="Unix time (inclusive)")
+    parser.add_argument("--until", type=float, help="Unix time (exclusive)")
+    parser.add_argument("--all", action="store_true", help="Also replay allow/deny/ban list verdicts")
+    parser.add_argument("--changed", help="Write every changed verdict here (JSONL)")
+    parser.add_argument("--json", help="Write the summary here")
+    args = parser.parse_args()
+
+    summary = replay(args.paths, args.since, args.until, args.all, args.changed)
+    print(f"--- REPLAY: {summary['rows']} verdicts against model v{summary['model_version']} "
+          f"({summary['rows_per_second']} rows/s, {summary['skipped']} list verdicts skipped) ---")
+    print(f"Changed: {summary['changed']} ({summary['normal_to_malicious']} Normal -> Malicious, "
+          f"{summary['malicious_to_normal']} Malicious -> Normal)")
+    for transition, count in summary["gate_changes"].items():
+        print(f"{count:>10}  {transition}")
+    print(f"Mean |confidence delta|: {summary['mean_confidence_delta']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"📄 Summary saved to {args.json}")
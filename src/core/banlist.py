@@ -0,0 +1,238 @@
+import heapq
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+from src.utils.logger import setup_logger
+
+logger = setup_logger("banlist")
+
+class BanList:
+    """
+    Blocked sources (IP addresses) with a TTL each, exported for the firewall.
+
+    ban() / contains() are O(1) dict operations; expiry pops a heap. Changes
+    are coalesced per source into a bounded delta feed (changes(since)), and
+    a flush thread rewrites `path` at most every `flush_interval` seconds, and
+    only if something changed, as an `ipset restore` file (temp file + rename,
+    so readers never see half a file).
+
+    The process that calls start() owns the list. Forked workers follow it:
+    refresh() reloads the file when its mtime changes.
+    """
+
+    def __init__(self, path="banned_ips.ipset", ttl=3600, set_name="guardnet_banned",
+                 flush_interval=1.0, max_changes=10000):
+        self.path = path
+        self.ttl = ttl
+        self.set_name = set_name
+        self.flush_interval = flush_interval
+        self.max_changes = max_changes
+
+        self._expires = {} # source -> unix time the ban ends
+        self._heap = []    # (expires, source), stale entries are skipped
+        self._changes = OrderedDict() # source -> (version, banned, expires), oldest first
+        self._floor = 0    # Changes up to this version were dropped from the feed
+        self._lock = threading.Lock()
+        self.version = 0
+        self._flushed = 0
+        self._owner_pid = None
+        self._mtime = None
+        self._next_check = 0.0
+
+        # Metrics
+        self.bans = 0
+        self.renewals = 0
+        self.expired = 0
+        self.flushes = 0
+
+    def __len__(self):
+        return len(self._expires)
+
+    # --- HOT PATH ---
+    def contains(self, source, now=None):
+        expires = self._expires.get(source)
+        return expires is not None and expires > (time.time() if now is None else now)
+
+    def refresh(self):
+        """Followers (forked workers) pick up the owner's flushes; the file is checked at most once per flush_interval"""
+        if self._owner_pid is None or self._owner_pid == os.getpid():
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.flush_interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self.load()
+
+    # --- UPDATES ---
+    def ban(self, source, ttl=None, now=None):
+        """Bans an IP address (other sources are ignored). Returns True for a new ban."""
+        try:
+            ipaddress.ip_address(source)
+        except ValueError:
+            return False
+        now = time.time() if now is None else now
+        ttl = ttl or self.ttl
+        expires = now + ttl
+        with self._lock:
+            current = self._expires.get(source)
+            active = current is not None and current > now
+            if active and expires - current < ttl / 10:
+                return False # Already banned for (almost) as long: nothing to write
+            self._expires[source] = expires
+            heapq.heappush(self._heap, (expires, source))
+            self._change(source, True, expires)
+            if active:
+                self.renewals += 1
+            else:
+                self.bans += 1
+        return not active
+
+    def unban(self, source):
+        with self._lock:
+            if self._expires.pop(source, None) is None:
+                return False
+            self._change(source, False, None)
+        return True
+
+    def _change(self, source, banned, expires, version=None):
+        self.version = version or self.version + 1
+        self._changes[source] = (self.version, banned, expires)
+        self._changes.move_to_end(source)
+        if len(self._changes) > self.max_changes:
+            _, (dropped, _, _) = self._changes.popitem(last=False)
+            self._floor = dropped
+
+    def _expire(self, now):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires, source = heapq.heappop(heap)
+            if self._expires.get(source) == expires: # Not renewed or unbanned since
+                del self._expires[source]
+                self._change(source, False, None)
+                self.expired += 1
+
+    # --- DELTA FEED ---
+    def changes(self, since=0):
+        """
+        What changed after version `since`: {"version", "full": False, "added", "removed"}.
+        If `since` is too old (or from another run) the complete list comes back
+        with "full": True instead.
+        """
+        with self._lock:
+            if since < self._floor or since > self.version:
+                banned = [{"source": s, "expires": e} for s, e in self._expires.items()]
+                return {"version": self.version, "full": True, "banned": banned}
+            added, removed = [], []
+            for source, (version, banned, expires) in reversed(self._changes.items()):
+                if version <= since:
+                    break
+                if banned:
+                    added.append({"source": source, "expires": expires})
+                else:
+                    removed.append(source)
+            return {"version": self.version, "full": False, "added": added, "removed": removed}
+
+    # --- EXPORT ---
+    def start(self):
+        """Takes ownership in this process: loads the last export, then flushes in the background"""
+        if self._owner_pid == os.getpid():
+            return
+        self._owner_pid = os.getpid()
+        self.load()
+        self._flushed = self.version
+        threading.Thread(target=self._loop, name="banlist-flush", daemon=True).start()
+        logger.info(f"🚫 Ban list: {len(self)} active bans, exporting to {self.path}")
+
+    def _loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Ban list flush failed: {e}")
+
+    def flush(self, now=None):
+        """Expires old bans and rewrites the export if anything changed. Returns True if written."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if self.version == self._flushed:
+                return False
+            version = self.version
+            entries = list(self._expires.items())
+
+        families = {4: [], 6: []}
+        for source, expires in entries:
+            families[ipaddress.ip_address(source).version].append((source, max(1, int(expires - now))))
+        lines = [f"# guardnet ban list version {version} ({len(entries)} entries, {time.ctime(now)})\n"]
+        # Fill a scratch set and swap it in: the kernel set is replaced atomically too
+        for family, name, members in (("inet", self.set_name, families[4]),
+                                      ("inet6", self.set_name + "6", families[6])):
+            scratch = name + "-new"
+            lines.append(f"create {name} hash:ip family {family} timeout {self.ttl} -exist\n")
+            lines.append(f"create {scratch} hash:ip family {family} timeout {self.ttl} -exist\n")
+            lines.append(f"flush {scratch}\n")
+            lines.extend(f"add {scratch} {source} timeout {seconds}\n" for source, seconds in members)
+            lines.append(f"swap {scratch} {name}\n")
+            lines.append(f"destroy {scratch}\n")
+
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp, "w") as f:
+            f.writelines(lines)
+        os.replace(tmp, self.path)
+        self._flushed = version
+        self.flushes += 1
+        return True
+
+    def load(self, now=None):
+        """Replaces the set with the contents of the export (restart, or a follower catching up)"""
+        try:
+            with open(self.path) as f:
+                text = f.read()
+        except FileNotFoundError:
+            return False
+        now = time.time() if now is None else now
+        version, loaded = _parse(text, now)
+        with self._lock:
+            for source in [s for s in self._expires if s not in loaded]:
+                del self._expires[source]
+                self._change(source, False, None, version)
+            for source, expires in loaded.items():
+                current = self._expires.get(source)
+                if current is None or abs(current - expires) > 2: # Timeouts are whole seconds
+                    self._expires[source] = expires
+                    heapq.heappush(self._heap, (expires, source))
+                    self._change(source, True, expires, version)
+            self.version = max(self.version, version)
+        return True
+
+    def metrics(self):
+        return {
+            "banned": len(self._expires),
+            "version": self.version,
+            "flushed_version": self._flushed,
+            "bans": self.bans,
+            "renewals": self.renewals,
+            "expired": self.expired,
+            "flushes": self.flushes,
+            "path": self.path
+        }
+
+def _parse(text, now):
+    """ipset restore file -> (version, {source: expires})"""
+    version, loaded = 0, {}
+    for line in text.splitlines():
+        parts = line.split()
+        if line.startswith("# guardnet ban list version"):
+            version = int(parts[5])
+        elif parts[:1] == ["add"] and len(parts) >= 5:
+            loaded[parts[2]] = now + int(parts[4])
+    return version, loaded
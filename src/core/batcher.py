@@ -0,0 +1,144 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from src.utils.logger import setup_logger
+
+logger = setup_logger("batcher")
+
+class MicroBatcher:
+    """
+    Collects model inputs from concurrent request threads and runs them
+    through ONE batched forward pass.
+
+    A batch is flushed when it holds `max_batch_size` rows or when the oldest
+    pending input has waited `max_wait_ms`, whichever comes first.
+    Each caller gets a Future that resolves to its own slice of the output.
+    Inputs submitted with a `context` (the ModelSet a request started with)
+    only share a pass with the same context, which predict_fn receives too.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0, name="lstm", on_batch=None):
+        self.predict_fn = predict_fn # (N, ...) array -> (N,) array
+        self.on_batch = on_batch     # Optional (rows, seconds) callback after every flush
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None # Thread is (re)started lazily, also after a fork
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+        self.largest_batch = 0
+        self.batch_size_hist = {} # power-of-two bucket -> count
+
+    def submit(self, rows, context=None):
+        """Queue an (n, ...) input block. Returns a Future of an (n,) array."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.asarray(rows), future, context))
+        return future
+
+    def predict(self, rows, timeout=None, context=None):
+        """Blocking helper: submit and wait for the result"""
+        return self.submit(rows, context).result(timeout=timeout)
+
+    def metrics(self):
+        avg = self.items / self.batches if self.batches else 0.0
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(avg, 2),
+            "last_batch_size": self.last_batch_size,
+            "largest_batch": self.largest_batch,
+            "batch_size_hist": dict(self.batch_size_hist),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child inherits the queue object but not the thread
+            if self._pid is not None:
+                self._queue = queue.Queue()
+            thread = threading.Thread(target=self._loop, name=f"{self.name}-batcher", daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+            logger.info(f"⚡ Micro-batcher '{self.name}' started "
+                        f"(max_batch={self.max_batch_size}, max_wait={self.max_wait * 1000:.1f}ms)")
+
+    def _collect(self, pending):
+        """Block for the first item, then gather more until size or time limit"""
+        pending.append(self._queue.get())
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return size
+
+    def _loop(self):
+        # Nothing may end this thread: its futures would never resolve
+        while True:
+            pending = []
+            try:
+                self._flush(pending, self._collect(pending))
+            except Exception as e:
+                logger.error(f"Batcher '{self.name}' Error: {e}")
+                for _, future, _ in pending:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _flush(self, pending, size):
+        start = time.perf_counter()
+        # Inputs of different model sets or shapes (around a model swap) get one pass each
+        groups = {}
+        for item in pending:
+            groups.setdefault((id(item[2]), item[0].shape[1:]), []).append(item)
+        for group in groups.values():
+            self._run(group)
+
+        self.batches += 1
+        self.items += size
+        self.last_batch_size = size
+        self.largest_batch = max(self.largest_batch, size)
+        bucket = 1 << (max(size, 1) - 1).bit_length()
+        self.batch_size_hist[bucket] = self.batch_size_hist.get(bucket, 0) + 1
+        if self.on_batch is not None:
+            self.on_batch(size, time.perf_counter() - start)
+
+    def _run(self, pending):
+        context = pending[0][2]
+        try:
+            batch = np.concatenate([rows for rows, _, _ in pending], axis=0)
+            outputs = self.predict_fn(batch) if context is None else self.predict_fn(batch, context)
+            outputs = np.asarray(outputs).reshape(-1)
+        except Exception as e:
+            logger.error(f"Batcher '{self.name}' Error: {e}")
+            for _, future, _ in pending:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for rows, future, _ in pending:
+            future.set_result(outputs[offset:offset + len(rows)])
+            offset += len(rows)
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+from src.utils.logger import setup_logger
+
+logger = setup_logger("broadcaster")
+
+class Subscription:
+    """One connected client: a single pending message slot (never a queue)"""
+
+    def __init__(self):
+        self.pending = None
+        self.needs_full = True # First message: the complete state
+        self.ready = threading.Event()
+        self.sent = 0
+        self.coalesced = 0
+
+    def take(self):
+        self.ready.clear()
+        message, self.pending = self.pending, None
+        return message
+
+class Broadcaster:
+    """
+    Server-sent events for any number of clients from ONE thread.
+
+    Every `interval` seconds delta_fn() returns what changed (or None), which
+    is serialized ONCE and handed to every subscriber. A subscriber holds at
+    most one pending message: if a slow client has not taken the previous
+    update yet, it is replaced by a full_fn() snapshot (also built once per
+    tick), so intermediate updates are dropped instead of queued and the
+    client still ends up consistent. New clients get their first snapshot
+    from the same thread, so it lines up with the deltas that follow.
+    """
+
+    def __init__(self, delta_fn, full_fn, interval=1.0, max_clients=16, heartbeat=15.0):
+        self.delta_fn = delta_fn # () -> dict of changes since the last call, or None
+        self.full_fn = full_fn   # () -> dict with the complete state
+        self.interval = interval
+        self.max_clients = max_clients
+        self.heartbeat = heartbeat
+
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None # Thread is (re)started lazily, also after a fork
+        self._seq = 0
+
+        # Metrics
+        self.ticks = 0
+        self.messages = 0
+
+    def subscribe(self):
+        """Returns a Subscription (its first message is a full snapshot), or None when full"""
+        self._ensure_thread()
+        sub = Subscription()
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            self._subscribers.add(sub)
+        self._wake.set() # Don't make the new client wait a whole interval
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def stream(self, sub):
+        """SSE body generator for one client (unsubscribes when the client goes away)"""
+        try:
+            yield f"retry: {int(self.interval * 1000)}\n\n"
+            while True:
+                if sub.ready.wait(self.heartbeat):
+                    message = sub.take()
+                    if message is not None:
+                        sub.sent += 1
+                        yield message
+                else:
+                    yield ": keepalive\n\n" # Also detects dead connections
+        finally:
+            self.unsubscribe(sub)
+
+    def metrics(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "clients": len(subscribers),
+            "max_clients": self.max_clients,
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "messages": self.messages,
+            "coalesced": sum(s.coalesced for s in subscribers)
+        }
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._subscribers = set() # A forked child inherits no connections
+            threading.Thread(target=self._loop, name="sse-broadcaster", daemon=True).start()
+            self._pid = os.getpid()
+            logger.info(f"📡 SSE broadcaster started (every {self.interval}s, max {self.max_clients} clients)")
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self._tick()
+            except Exception as e:
+                logger.error(f"Broadcaster Error: {e}")
+
+    def _tick(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return # Nobody listening: no diffing, no serializing
+        self.ticks += 1
+        delta = self.delta_fn()
+        self._seq += 1
+        message = _event("delta", self._seq, delta) if delta else None
+        full = None
+        for sub in subscribers:
+            if sub.needs_full or (message is not None and sub.pending is not None):
+                # New client, or still busy with the last update: skip ahead to a full snapshot
+                if full is None:
+                    full = _event("full", self._seq, self.full_fn())
+                sub.coalesced += not sub.needs_full
+                sub.needs_full = False
+                sub.pending = full
+            elif message is not None:
+                sub.pending = message
+            else:
+                continue
+            sub.ready.set()
+        self.messages += message is not None
+
+def _event(kind, seq, data):
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
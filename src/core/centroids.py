@@ -0,0 +1,59 @@
+import numpy as np
+
+# Up to this many rows, distances are computed without a BLAS matmul
+SMALL_BATCH = 64
+
+class NearestCentroid:
+    """
+    K-Means Gate 1 compiled at load time: scaler.transform + kmeans.transform
+    + min/argmin as one NumPy expression, without sklearn's per-call input
+    validation (which dominates the cost for a handful of rows).
+
+    The StandardScaler is folded into the centroids: with z = (x - mean) / scale
+    and center = mean + scale * c, ||z - c|| = ||x / scale - center / scale||,
+    so the mean is never subtracted per request. Large batches use the same
+    ||a||^2 - 2 a.b + ||b||^2 expansion as sklearn (one matmul), small ones
+    the direct difference.
+    """
+
+    def __init__(self, centers, scale, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.centers = np.ascontiguousarray(centers, dtype=dtype) # (k, F), raw feature units
+        self.inv_scale = np.ascontiguousarray(1.0 / np.asarray(scale, dtype=np.float64), dtype=dtype)
+        self._scaled = self.centers * self.inv_scale                   # (k, F)
+        self._scaled_t = np.ascontiguousarray(-2.0 * self._scaled.T)    # (F, k), -2 folded in
+        self._norms = np.einsum('kf,kf->k', self._scaled, self._scaled) # (k,)
+
+    @classmethod
+    def from_sklearn(cls, scaler, kmeans, dtype=np.float64):
+        centers = kmeans.cluster_centers_
+        scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(centers.shape[1])
+        mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else np.zeros(centers.shape[1])
+        return cls(mean + scale * centers, scale, dtype)
+
+    def __len__(self):
+        return len(self.centers)
+
+    def squared_distances(self, X):
+        """(N, F) or (F,) raw rows -> (N, k) squared distances in scaled space"""
+        Z = np.asarray(X, dtype=self.dtype).reshape(-1, self.centers.shape[1]) * self.inv_scale
+        if len(Z) <= SMALL_BATCH:
+            # No BLAS call: it would release the GIL for a few microseconds and
+            # hand the request thread's time slice to another thread
+            diff = Z[:, None, :] - self._scaled
+            return np.einsum('nkf,nkf->nk', diff, diff)
+        d2 = Z @ self._scaled_t
+        d2 += self._norms
+        d2 += np.einsum('nf,nf->n', Z, Z)[:, None]
+        return np.maximum(d2, 0, out=d2) # Rounding can go slightly negative
+
+    def nearest(self, X, squared=False):
+        """
+        Returns (cluster index, distance) per row, same as argmin / min over
+        kmeans.transform(scaler.transform(X)). squared=True skips the sqrt:
+        compare against threshold ** 2 then.
+        """
+        d2 = self.squared_distances(X)
+        nearest = d2.argmin(axis=1)
+        best = d2[np.arange(len(d2)), nearest]
+        return nearest, (best if squared else np.sqrt(best))
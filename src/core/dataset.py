@@ -0,0 +1,167 @@
+"""
+Columnar training-data store: chunked .npy files + a JSON manifest.
+
+    data/dataset/
+        manifest.json                          columns, dtype, list of chunks
+        features-<prefix>-<uuid12>.npy         (rows, 8) feature matrix
+        labels-<prefix>-<uuid12>.npy           (rows,) int8 labels (optional)
+
+<prefix> names the writer ("chunk" by default) and <uuid12> is 12 random hex
+digits, so concurrent writers never pick the same file name.
+
+Chunks are opened with np.load(mmap_mode='r'), so reading is zero-copy and
+never parses text. Appending writes new chunk files and swaps the manifest
+atomically. CSV stays supported as an import/export format:
+
+    python -m src.core.dataset import data/training_data.csv
+    python -m src.core.dataset export data/export.csv
+"""
+import json
+import os
+import sys
+import uuid
+import numpy as np
+import pandas as pd
+from src.utils.logger import setup_logger
+
+logger = setup_logger("dataset")
+
+FEATURE_COLS = ['duration', 'protocol_type', 'service', 'flag',
+                'src_bytes', 'dst_bytes', 'count', 'srv_count']
+DATA_DIR = os.path.join(os.getcwd(), 'data')
+DATASET_DIR = os.path.join(DATA_DIR, 'dataset')
+CSV_PATH = os.path.join(DATA_DIR, 'training_data.csv')
+MANIFEST = 'manifest.json'
+
+def _atomic_save(path, array):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+class FeatureDataset:
+    def __init__(self, path, dtype="float32"):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"columns": FEATURE_COLS, "dtype": dtype, "chunks": []}
+
+    @classmethod
+    def exists(cls, path):
+        return os.path.exists(os.path.join(path, MANIFEST))
+
+    def __len__(self):
+        return sum(chunk["rows"] for chunk in self.manifest["chunks"])
+
+    @property
+    def columns(self):
+        return self.manifest["columns"]
+
+    @property
+    def has_labels(self):
+        chunks = self.manifest["chunks"]
+        return bool(chunks) and all(chunk["labels"] for chunk in chunks)
+
+    # --- WRITING ---
+    def write_chunk(self, X, y=None, prefix="chunk"):
+        """
+        Writes chunk files WITHOUT registering them; returns the manifest entry.
+        Lets parallel workers write their own files and a parent commit() them.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        X = np.ascontiguousarray(X, dtype=self.manifest["dtype"])
+        if X.ndim != 2 or X.shape[1] != len(self.columns):
+            raise ValueError(f"Expected (rows, {len(self.columns)}) features, got {X.shape}")
+
+        name = f"{prefix}-{uuid.uuid4().hex[:12]}"
+        entry = {"features": f"features-{name}.npy", "labels": None, "rows": len(X)}
+        _atomic_save(os.path.join(self.path, entry["features"]), X)
+        if y is not None:
+            entry["labels"] = f"labels-{name}.npy"
+            _atomic_save(os.path.join(self.path, entry["labels"]), np.asarray(y, dtype=np.int8))
+        return entry
+
+    def commit(self, entries):
+        """Registers written chunks by atomically replacing the manifest"""
+        self.manifest["chunks"].extend(entries)
+        os.makedirs(self.path, exist_ok=True)
+        tmp = os.path.join(self.path, f"{MANIFEST}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+    def append(self, X, y=None):
+        self.commit([self.write_chunk(X, y)])
+
+    # --- READING ---
+    def iter_chunks(self):
+        """Yields (X, y) per chunk as read-only memory maps (y is None if unlabeled)"""
+        for chunk in self.manifest["chunks"]:
+            X = np.load(os.path.join(self.path, chunk["features"]), mmap_mode='r')
+            y = None
+            if chunk["labels"]:
+                y = np.load(os.path.join(self.path, chunk["labels"]), mmap_mode='r')
+            yield X, y
+
+    def iter_batches(self, batch_size):
+        """Re-slices the chunks into (X, y) batches of `batch_size` rows (views where possible)"""
+        for X, y in self.iter_chunks():
+            for start in range(0, len(X), batch_size):
+                yield X[start:start + batch_size], (None if y is None else y[start:start + batch_size])
+
+    def load(self):
+        """Whole dataset in memory as (X, y). Zero-copy when there is a single chunk."""
+        chunks = list(self.iter_chunks())
+        if not chunks:
+            return np.zeros((0, len(self.columns)), dtype=self.manifest["dtype"]), None
+        if len(chunks) == 1:
+            return chunks[0]
+        X = np.concatenate([X for X, _ in chunks])
+        y = np.concatenate([y for _, y in chunks]) if self.has_labels else None
+        return X, y
+
+    # --- CSV IMPORT / EXPORT ---
+    def import_csv(self, csv_path, chunksize=1_000_000):
+        entries = []
+        for df in pd.read_csv(csv_path, chunksize=chunksize):
+            for col in self.columns:
+                if col not in df.columns: df[col] = 0 # Fill missing
+            y = df['label'].values if 'label' in df.columns else None
+            entries.append(self.write_chunk(df[self.columns].values, y))
+        self.commit(entries)
+        logger.info(f"Imported {sum(e['rows'] for e in entries)} rows from {csv_path}")
+        return self
+
+    def export_csv(self, csv_path):
+        header = True
+        with open(csv_path, "w", newline="") as out:
+            for X, y in self.iter_chunks():
+                df = pd.DataFrame(X, columns=self.columns)
+                if y is not None:
+                    df['label'] = y
+                df.to_csv(out, index=False, header=header)
+                header = False
+        logger.info(f"Exported {len(self)} rows to {csv_path}")
+
+def open_training_dataset(dataset_dir=DATASET_DIR, csv_path=CSV_PATH):
+    """
+    The dataset the training scripts use. A legacy training_data.csv is
+    imported once on first use. Returns None if there is no data at all.
+    """
+    if FeatureDataset.exists(dataset_dir):
+        return FeatureDataset(dataset_dir)
+    if os.path.exists(csv_path):
+        logger.info(f"Importing legacy {csv_path} into {dataset_dir}...")
+        return FeatureDataset(dataset_dir).import_csv(csv_path)
+    return None
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("import", "export"):
+        print("Usage: python -m src.core.dataset [import|export] <file.csv>")
+        sys.exit(1)
+    if sys.argv[1] == "import":
+        FeatureDataset(DATASET_DIR).import_csv(sys.argv[2])
+    else:
+        FeatureDataset(DATASET_DIR).export_csv(sys.argv[2])
@@ -0,0 +1,201 @@
+from collections import OrderedDict, deque
+import numpy as np
+
+IPPROTO_TCP, IPPROTO_UDP = 6, 17
+TCP_FIN, TCP_SYN, TCP_RST, TCP_ACK = 0x01, 0x02, 0x04, 0x10
+
+# One row per completed (or evicted) flow
+FLOW_DTYPE = np.dtype([
+    ('start', '<f8'),
+    ('end', '<f8'),
+    ('src', '<u4'),        # initiator address (sender of the first packet)
+    ('dst', '<u4'),        # responder address
+    ('sport', '<u2'),
+    ('dport', '<u2'),      # responder port = service
+    ('proto', 'u1'),
+    ('flags', 'u1'),       # OR of every TCP flag seen in the flow
+    ('src_bytes', '<u8'),  # initiator -> responder payload bytes
+    ('dst_bytes', '<u8'),  # responder -> initiator payload bytes
+    ('packets', '<u4'),
+    ('count', '<u4'),      # connections to the same host in the last `window` seconds
+    ('srv_count', '<u4'),  # connections to the same service in the last `window` seconds
+])
+
+# Indices into the per-flow state list (lists are much smaller than dicts/objects)
+START, LAST, SRC, DST, SPORT, DPORT, PROTO, FLAGS, SRC_BYTES, DST_BYTES, PACKETS, COUNT, SRV_COUNT, FINS = range(14)
+
+class ConnectionWindow:
+    """
+    KDD-style time-based traffic features: how many connections in the last
+    `window` seconds went to the same destination host / the same service.
+    Connections are added in time order; expiry is O(1) amortized.
+    """
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._recent = deque() # (ts, host, service)
+        self._hosts = {}
+        self._services = {}
+
+    def add(self, ts, host, service):
+        """Registers a new connection and returns (count, srv_count) including it"""
+        horizon = ts - self.window
+        recent, hosts, services = self._recent, self._hosts, self._services
+        while recent and recent[0][0] < horizon:
+            _, old_host, old_service = recent.popleft()
+            hosts[old_host] -= 1
+            if not hosts[old_host]: del hosts[old_host]
+            services[old_service] -= 1
+            if not services[old_service]: del services[old_service]
+
+        recent.append((ts, host, service))
+        hosts[host] = hosts.get(host, 0) + 1
+        services[service] = services.get(service, 0) + 1
+        return hosts[host], services[service]
+
+class FlowTracker:
+    """
+    Aggregates packets into bidirectional flows keyed by 5-tuple.
+
+    A flow is emitted when it:
+    - sees a TCP RST, or a FIN from both sides,
+    - is idle for `idle_timeout` seconds (capture time),
+    - has been active for `active_timeout` seconds (long flows are split),
+    - is the least recently active flow when `max_flows` is exceeded.
+
+    A closed TCP flow's key stays in TIME_WAIT for `time_wait` seconds: the
+    final ACK (or a late RST) is absorbed there instead of opening a new
+    0-byte flow and inflating count/srv_count. A new SYN reopens the key.
+
+    Flows are kept in an OrderedDict by last activity, so idle and LRU
+    eviction both pop from the front. Memory is proportional to the number of
+    active flows, not to the number of packets.
+    """
+
+    def __init__(self, idle_timeout=60.0, active_timeout=300.0, max_flows=2_000_000, window=2.0,
+                 time_wait=4.0):
+        self.idle_timeout = idle_timeout
+        self.time_wait = time_wait
+        self.active_timeout = active_timeout
+        self.max_flows = max_flows
+        self.window = ConnectionWindow(window)
+        self._flows = OrderedDict() # canonical key -> state list
+        self._closed = OrderedDict() # canonical key -> close time (TIME_WAIT), oldest first
+        self._done = []
+        self.evicted = 0 # Flows pushed out by max_flows (not by a timeout)
+
+    @property
+    def active_flows(self):
+        return len(self._flows)
+
+    def update(self, packets):
+        """Consumes a PACKET_DTYPE chunk (time ordered), returns completed flows"""
+        flows, done, closed = self._flows, self._done, self._closed
+        columns = zip(packets['ts'].tolist(), packets['src'].tolist(), packets['dst'].tolist(),
+                      packets['sport'].tolist(), packets['dport'].tolist(),
+                      packets['proto'].tolist(), packets['flags'].tolist(),
+                      packets['length'].tolist())
+
+        for ts, src, dst, sport, dport, proto, flags, length in columns:
+            # Same key for both directions
+            a, b = (src, sport), (dst, dport)
+            key = (a, b, proto) if a <= b else (b, a, proto)
+
+            # Trailing ACK/RST/FIN of a closed connection: no new flow
+            if closed and key in closed:
+                if proto == IPPROTO_TCP and not (flags & TCP_SYN and not flags & TCP_ACK):
+                    continue
+                del closed[key] # Port reused by a new connection
+
+            state = flows.get(key)
+            if state is not None and ts - state[START] > self.active_timeout:
+                done.append(flows.pop(key))
+                state = None
+
+            if state is None:
+                count, srv_count = self.window.add(ts, dst, dport)
+                state = [ts, ts, src, dst, sport, dport, proto, 0, 0, 0, 0, count, srv_count, 0]
+                flows[key] = state
+                if len(flows) > self.max_flows:
+                    done.append(flows.popitem(last=False)[1])
+                    self.evicted += 1
+            else:
+                flows.move_to_end(key)
+
+            state[LAST] = ts
+            state[PACKETS] += 1
+            forward = src == state[SRC] and sport == state[SPORT]
+            if forward:
+                state[SRC_BYTES] += length
+            else:
+                state[DST_BYTES] += length
+
+            if proto == IPPROTO_TCP:
+                state[FLAGS] |= flags
+                if flags & TCP_FIN:
+                    state[FINS] |= 1 if forward else 2
+                if flags & TCP_RST or state[FINS] == 3:
+                    done.append(flows.pop(key))
+                    closed[key] = ts
+                    if len(closed) > self.max_flows:
+                        closed.popitem(last=False)
+
+            # Idle flows sit at the front (least recently active first)
+            while flows:
+                oldest = next(iter(flows.values()))
+                if ts - oldest[LAST] <= self.idle_timeout:
+                    break
+                done.append(flows.popitem(last=False)[1])
+            while closed:
+                oldest_key, closed_at = next(iter(closed.items()))
+                if ts - closed_at <= self.time_wait:
+                    break
+                del closed[oldest_key]
+
+        return self._drain()
+
+    def flush(self):
+        """End of capture: emit every flow still in the table"""
+        self._done.extend(self._flows.values())
+        self._flows.clear()
+        self._closed.clear()
+        return self._drain()
+
+    def _drain(self):
+        done, self._done = self._done, []
+        out = np.zeros(len(done), dtype=FLOW_DTYPE)
+        if done:
+            cols = list(zip(*done))
+            out['start'], out['end'] = cols[START], cols[LAST]
+            out['src'], out['dst'] = cols[SRC], cols[DST]
+            out['sport'], out['dport'] = cols[SPORT], cols[DPORT]
+            out['proto'], out['flags'] = cols[PROTO], cols[FLAGS]
+            out['src_bytes'], out['dst_bytes'] = cols[SRC_BYTES], cols[DST_BYTES]
+            out['packets'] = cols[PACKETS]
+            out['count'], out['srv_count'] = cols[COUNT], cols[SRV_COUNT]
+        return out
+
+def flows_to_features(flows):
+    """FLOW_DTYPE rows -> (N, 8) feature matrix in FEATURE_COLS order"""
+    proto = flows['proto']
+    X = np.empty((len(flows), 8))
+    X[:, 0] = flows['end'] - flows['start']
+    X[:, 1] = np.select([proto == IPPROTO_TCP, proto == IPPROTO_UDP], [1, 2], 0)
+    X[:, 2] = flows['dport']
+    X[:, 3] = flows['flags']
+    X[:, 4] = flows['src_bytes']
+    X[:, 5] = flows['dst_bytes']
+    X[:, 6] = flows['count']
+    X[:, 7] = flows['srv_count']
+    return X
+
+def iter_flows(packet_chunks, **tracker_kwargs):
+    """Streams completed flows (FLOW_DTYPE chunks) from an iterator of packet chunks"""
+    tracker = FlowTracker(**tracker_kwargs)
+    for packets in packet_chunks:
+        flows = tracker.update(packets)
+        if len(flows):
+            yield flows
+    flows = tracker.flush()
+    if len(flows):
+        yield flows
@@ -0,0 +1,196 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from src.core.pipeline import SOURCE_NAMES
+
+# (seconds per bucket, buckets kept): 1h of seconds, 24h of minutes, 30 days of hours
+TIERS = ((1, 3600), (60, 1440), (3600, 720))
+# Services (ports) with their own column; everything else is counted as "other"
+SERVICES = (20, 21, 22, 23, 25, 53, 80, 110, 123, 143, 443, 445, 993, 995,
+            1433, 3306, 3389, 5432, 6379, 8080, 8443)
+PROTOCOLS = ("icmp", "tcp", "udp") # protocol_type 0/1/2, anything else is "other"
+GROUPS = ("verdict", "source", "protocol", "service")
+# Up to this many rows, plain Python beats a dozen NumPy calls on tiny arrays
+SMALL_BLOCK = 16
+
+class VerdictHistory:
+    """
+    In-process time series of verdict counts, for /api/stats/history.
+
+    Every tier is a preallocated ring of (buckets, columns, 2) counts: one
+    column per gate source, protocol and tracked service, split into
+    normal/malicious. Memory is fixed by TIERS whatever the traffic. A block
+    of verdicts costs one bincount plus one vector add per tier (a small block
+    one np.add.at over all tiers), so older data is already downsampled. A
+    slot is zeroed lazily when its bucket comes around again; `epochs`
+    remembers which bucket a slot holds.
+    shared=True puts the rings in shared memory so forked workers write into
+    the same history, like ShardedCounters.
+    """
+
+    def __init__(self, tiers=TIERS, services=SERVICES, shared=False):
+        self.services = np.array(sorted(services), dtype=np.float64)
+        labels = ([("source", name) for name in SOURCE_NAMES]
+                  + [("protocol", name) for name in PROTOCOLS + ("other",)]
+                  + [("service", str(int(s))) for s in self.services] + [("service", "other")])
+        self._columns = {}
+        for i, (group, label) in enumerate(labels):
+            self._columns.setdefault(group, []).append((label, i))
+        self._protocol_base = self._columns["protocol"][0][1]
+        self._service_base = self._columns["service"][0][1]
+        self.n_columns = len(labels)
+        # Small-block lookups (1.0 == 1, so float features hit int keys)
+        self._protocol_index = {p: self._protocol_base + p for p in range(len(PROTOCOLS))}
+        self._service_index = {int(port): self._service_base + i for i, port in enumerate(self.services)}
+
+        self.shared = shared
+        self._shm = []
+        # All tiers live in one flat buffer, so a small block is ONE np.add.at
+        total = sum(buckets for _, buckets in tiers)
+        self._flat = self._alloc((total * self.n_columns * 2,), np.int64)
+        self._epochs = self._alloc((total,), np.int64)
+        self._epochs[:] = -1
+        self.tiers = []
+        offset = 0
+        for resolution, buckets in tiers:
+            counts = self._flat[offset * self.n_columns * 2:(offset + buckets) * self.n_columns * 2]
+            self.tiers.append((resolution, buckets, offset, counts.reshape(buckets, self.n_columns, 2),
+                               self._epochs[offset:offset + buckets]))
+            offset += buckets
+        self._lock = multiprocessing.Lock() if shared else threading.Lock()
+        self._bases = (None, None) # (second, flat offset of the current slot per tier)
+        if shared:
+            self._creator_pid = os.getpid()
+            atexit.register(self._release)
+
+    def _alloc(self, shape, dtype):
+        if not self.shared:
+            return np.zeros(shape, dtype=dtype)
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        self._shm.append(shm)
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        array[:] = 0
+        return array
+
+    @property
+    def retention(self):
+        """Seconds of history kept by the coarsest tier"""
+        return max(resolution * buckets for resolution, buckets, *_ in self.tiers)
+
+    @property
+    def nbytes(self):
+        return self._flat.nbytes + self._epochs.nbytes
+
+    # --- HOT PATH ---
+    def record(self, protocol, service, malicious, source, now=None):
+        """Counts a block of verdicts (protocol/service are the raw feature columns)"""
+        n = len(source)
+        if not n:
+            return
+        now = time.time() if now is None else now
+        if n <= SMALL_BLOCK:
+            self._record_small(protocol, service, malicious, source, now)
+            return
+        protocol = np.asarray(protocol)
+        proto_col = np.where((protocol >= 0) & (protocol < len(PROTOCOLS)),
+                             protocol, len(PROTOCOLS)).astype(np.intp) + self._protocol_base
+        service = np.asarray(service, dtype=np.float64)
+        pos = np.minimum(np.searchsorted(self.services, service), len(self.services) - 1)
+        service_col = np.where(self.services[pos] == service, pos, len(self.services)) + self._service_base
+        verdict = np.asarray(malicious, dtype=np.intp)
+        cells = np.concatenate([np.asarray(source, dtype=np.intp), proto_col, service_col]) * 2 + np.tile(verdict, 3)
+        delta = np.bincount(cells, minlength=self.n_columns * 2).reshape(self.n_columns, 2)
+
+        with self._lock:
+            for resolution, buckets, offset, counts, epochs in self.tiers:
+                slot = self._slot(now, resolution, buckets, counts, epochs)
+                counts[slot] += delta
+
+    def _record_small(self, protocol, service, malicious, source, now):
+        other_protocol = self._protocol_base + len(PROTOCOLS)
+        other_service = self._service_base + len(self.services)
+        cells = []
+        for p, s, m, src in zip(np.asarray(protocol).tolist(), np.asarray(service).tolist(),
+                                np.asarray(malicious).tolist(), np.asarray(source).tolist()):
+            m = int(bool(m))
+            cells += [int(src) * 2 + m, self._protocol_index.get(p, other_protocol) * 2 + m,
+                      self._service_index.get(s, other_service) * 2 + m]
+        width = self.n_columns * 2
+        second = int(now)
+        with self._lock:
+            cached, bases = self._bases
+            if cached != second: # Same second -> same slot in every tier, already zeroed
+                bases = [(offset + self._slot(now, resolution, buckets, counts, epochs)) * width
+                         for resolution, buckets, offset, counts, epochs in self.tiers]
+                self._bases = (second, bases)
+            np.add.at(self._flat, [base + cell for base in bases for cell in cells], 1)
+
+    @staticmethod
+    def _slot(now, resolution, buckets, counts, epochs):
+        """Ring slot of the current bucket, zeroed first if it still holds an older one"""
+        bucket = int(now // resolution)
+        slot = bucket % buckets
+        if epochs[slot] != bucket:
+            counts[slot] = 0
+            epochs[slot] = bucket
+        return slot
+
+    # --- READ PATH ---
+    def query(self, start, end, group_by="verdict", step=None):
+        """
+        Counts for [start, end) from the finest tier that still holds `start`,
+        summed into `step`-second buckets (a multiple of that tier's resolution).
+        Returns {"resolution", "start", "end", "group_by", "times", "series", "totals"}.
+        """
+        if group_by not in GROUPS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUPS)}")
+        now = time.time()
+        for resolution, buckets, _, counts, epochs in self.tiers:
+            if start >= (now // resolution - buckets + 1) * resolution:
+                break
+        step = max(resolution, int(step or resolution) // resolution * resolution)
+        factor = step // resolution
+        first = int(start // step) * factor
+        last = max(first + factor, -(-int(end) // step) * factor) # Whole steps
+        if (last - first) > buckets:
+            first = last - buckets // factor * factor # Clamp to what the ring holds
+
+        wanted = np.arange(first, last)
+        slots = wanted % buckets
+        data = counts[slots] * (epochs[slots] == wanted)[:, None, None] # Stale slots count as 0
+        data = data.reshape(-1, factor, self.n_columns, 2).sum(axis=1)
+
+        if group_by == "verdict":
+            columns = [("all", [i for _, i in self._columns["source"]])] # Every record has one source
+        else:
+            columns = [(label, [i]) for label, i in self._columns[group_by]]
+        series, totals = {}, {}
+        for label, idx in columns:
+            values = data[:, idx, :].sum(axis=1)
+            normal, malicious = int(values[:, 0].sum()), int(values[:, 1].sum())
+            if group_by != "verdict" and not normal + malicious:
+                continue # Only groups that saw traffic
+            series[label] = {"normal": values[:, 0].tolist(), "malicious": values[:, 1].tolist()}
+            totals[label] = {"normal": normal, "malicious": malicious,
+                             "malicious_rate": round(malicious / (normal + malicious), 4) if normal + malicious else None}
+        return {
+            "resolution": step,
+            "start": first * resolution,
+            "end": last * resolution,
+            "group_by": group_by,
+            "times": (np.arange(first, last, factor) * resolution).tolist(),
+            "series": series,
+            "totals": totals
+        }
+
+    def _release(self):
+        if os.getpid() != self._creator_pid:
+            return
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+        self._shm = []
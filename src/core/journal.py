@@ -0,0 +1,245 @@
+import atexit
+import glob
+import os
+import struct
+import threading
+import time
+import numpy as np
+from src.utils.logger import setup_logger
+
+logger = setup_logger("journal")
+
+# One verdict = one fixed-width record (88 bytes, little endian, 8-byte aligned)
+RECORD = np.dtype([
+    ("time", "<f8"),             # Unix time of the verdict
+    ("id", "<u8"),               # Record id from the sniffer (0 if none)
+    ("features", "<f8", (8,)),   # Raw features, FEATURE_COLS order
+    ("source", "u1"),            # Deciding stage (pipeline.SOURCE_NAMES)
+    ("malicious", "u1"),
+    ("_pad", "V2"),
+    ("confidence", "<f4"),
+])
+MAGIC = b"GNJRNL01"
+HEADER = struct.Struct("<8sII") # magic, record size, n features
+SUFFIX = ".gnj"
+
+class VerdictJournal:
+    """
+    Append-only verdict log, one set of segment files per process.
+
+    append() turns a block of verdicts into a structured array and queues
+    it; a writer thread commits everything queued every `flush_interval`
+    seconds with ONE write (group commit, optionally fsync'ed). When more
+    than `max_pending` rows are waiting the block is dropped and counted,
+    so the request path never waits for the disk. Segments rotate at
+    `segment_bytes`; `max_segments` > 0 keeps only that many segments in the
+    whole directory, deleting the oldest first (also those left by restarted
+    or recycled workers) but never the current segment of a live process.
+    """
+
+    def __init__(self, directory, segment_bytes=64 << 20, max_segments=0, flush_interval=0.2,
+                 max_pending=1_000_000, fsync=False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.fsync = fsync
+
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()     # Pending blocks
+        self._io_lock = threading.Lock()  # Segment file
+        self._pid = None # Writer thread is (re)started lazily, also after a fork
+        self._file = None
+        self._segment = None
+        self._seq = 0
+
+        # Metrics
+        self.rows = 0
+        self.commits = 0
+        self.dropped = 0
+        self.bytes = 0
+
+    def append(self, ids, X, malicious, confidence, source, now=None):
+        """Queues a block of verdicts. Returns False if it was dropped (writer behind)."""
+        n = len(X)
+        if not n:
+            return True
+        if self._pid != os.getpid():
+            self._start()
+        block = np.zeros(n, dtype=RECORD)
+        block["time"] = time.time() if now is None else now
+        block["id"] = ids
+        block["features"] = X
+        block["source"] = source
+        block["malicious"] = malicious
+        block["confidence"] = confidence
+        with self._lock:
+            if self._pending_rows + n > self.max_pending:
+                self.dropped += n
+                return False
+            self._pending.append(block)
+            self._pending_rows += n
+        return True
+
+    def flush(self):
+        """Commits everything queued now (tests, shutdown)"""
+        with self._lock:
+            blocks, self._pending, self._pending_rows = self._pending, [], 0
+        if blocks:
+            self._commit(np.concatenate(blocks) if len(blocks) > 1 else blocks[0])
+
+    def close(self):
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def metrics(self):
+        return {
+            "directory": self.directory,
+            "segment": self._segment,
+            "rows": self.rows,
+            "commits": self.commits,
+            "pending": self._pending_rows,
+            "dropped": self.dropped,
+            "bytes": self.bytes
+        }
+
+    def _start(self):
+        with self._io_lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child writes its own segments: no shared file offsets
+            self._pending, self._pending_rows = [], 0
+            self._file = None
+            os.makedirs(self.directory, exist_ok=True)
+            threading.Thread(target=self._loop, name="verdict-journal", daemon=True).start()
+            self._pid = os.getpid()
+            atexit.register(self.close)
+            logger.info(f"📓 Verdict journal: {self.directory} ({self.segment_bytes >> 20} MB segments)")
+
+    def _loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Journal write failed: {e}")
+
+    def _commit(self, records):
+        data = records.tobytes()
+        with self._io_lock:
+            if self._file is None or self._file.tell() >= self.segment_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        self.rows += len(records)
+        self.bytes += len(data)
+        self.commits += 1
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self._seq += 1
+        name = f"verdicts-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq:04d}{SUFFIX}"
+        self._segment = os.path.join(self.directory, name)
+        self._file = open(self._segment, "ab")
+        self._file.write(HEADER.pack(MAGIC, RECORD.itemsize, RECORD["features"].shape[0]))
+        if self.max_segments > 0:
+            self._prune()
+
+    def _prune(self):
+        # An idle worker only writes when rows are pending, so its open segment
+        # can be the oldest file: deleting it would lose everything it appends
+        segments, newest = [], {} # newest: pid -> (seq, path)
+        for path in glob.glob(os.path.join(self.directory, f"verdicts-*{SUFFIX}")):
+            try:
+                segments.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue # Pruned by another worker meanwhile
+            pid, seq = _segment_owner(path)
+            if pid is not None and seq > newest.get(pid, (-1, None))[0]:
+                newest[pid] = (seq, path)
+        current = {path for pid, (_, path) in newest.items() if _alive(pid)}
+        current.add(self._segment)
+
+        excess = len(segments) - self.max_segments
+        for _, old in sorted(segments):
+            if excess <= 0:
+                break
+            if old in current:
+                continue
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+            excess -= 1
+
+def _segment_owner(path):
+    """verdicts-<date>-<time>-<pid>-<seq>.gnj -> (pid, seq), (None, 0) if not ours"""
+    parts = os.path.basename(path)[:-len(SUFFIX)].split("-")
+    try:
+        return int(parts[3]), int(parts[4])
+    except (IndexError, ValueError):
+        return None, 0
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass # Exists, owned by another user
+    return True
+
+# --- READER ---
+def segment_paths(paths):
+    """Directories (all segments, oldest first) and/or segment files -> list of files"""
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, f"*{SUFFIX}")))
+        else:
+            files.append(path)
+    return files
+
+def read_segment(path):
+    """Memory-maps one segment as a RECORD array (a torn last record is ignored)"""
+    with open(path, "rb") as f:
+        magic, record_size, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or record_size != RECORD.itemsize:
+        raise ValueError(f"{path} is not a verdict journal segment (or another record version)")
+    n = (os.path.getsize(path) - HEADER.size) // RECORD.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(n,))
+
+def scan(paths, start=None, end=None, malicious=None, source=None):
+    """Yields the matching records of each segment (vectorized masks over the memmap)"""
+    for path in segment_paths(paths):
+        records = read_segment(path)
+        mask = np.ones(len(records), dtype=bool)
+        if start is not None:
+            mask &= records["time"] >= start
+        if end is not None:
+            mask &= records["time"] < end
+        if malicious is not None:
+            mask &= records["malicious"] == int(malicious)
+        if source is not None:
+            mask &= records["source"] == source
+        if mask.all():
+            yield records
+        elif mask.any():
+            yield records[mask]
+
+def load(paths, **filters):
+    """All matching records in one in-memory array"""
+    parts = list(scan(paths, **filters))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD)
@@ -0,0 +1,116 @@
+import math
+import time
+from bisect import bisect_left
+from src.core.stats import ShardedCounters
+
+# Upper bounds (seconds) for hot-path stage timings: 25us .. 2.5s
+LATENCY_BUCKETS = (0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                   0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Upper bounds (rows) for LSTM micro-batch sizes
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+class Histogram:
+    """
+    Fixed-bucket histograms (one per name, e.g. per stage) in Prometheus style.
+
+    Bucket counts and the sum live in ShardedCounters: observe() is a bisect
+    plus two increments on the calling thread's own row - no lock, nothing
+    allocated per call. shared=True makes them cluster-wide like STATS.
+    The sum is stored as an integer number of 1/unit (unit=1e6 -> microseconds).
+    """
+
+    def __init__(self, metric, label, names, buckets=LATENCY_BUCKETS, unit=1e6,
+                 help="", shared=False):
+        self.metric = metric
+        self.label = label
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.unit = unit
+        self._columns = {}
+        for name in names:
+            self._columns[name] = [f"{name}:{i}" for i in range(len(self.buckets) + 1)] + [f"{name}:sum"]
+        self._counters = ShardedCounters(
+            [c for columns in self._columns.values() for c in columns], shared=shared
+        )
+
+    @property
+    def names(self):
+        return list(self._columns)
+
+    # --- HOT PATH ---
+    def observe(self, name, value):
+        columns = self._columns[name]
+        self._counters.add(columns[bisect_left(self.buckets, value)])
+        self._counters.add(columns[-1], int(value * self.unit))
+
+    def start(self):
+        return time.perf_counter()
+
+    def lap(self, name, start):
+        """Records the time since `start` under `name`; returns now (the next start)"""
+        now = time.perf_counter()
+        self.observe(name, now - start)
+        return now
+
+    # --- READ PATH ---
+    def snapshot(self):
+        """name -> {"buckets": per-bucket counts (last = +Inf), "count", "sum"}"""
+        counts = self._counters.snapshot()
+        result = {}
+        for name, columns in self._columns.items():
+            buckets = [counts[c] for c in columns[:-1]]
+            result[name] = {"buckets": buckets, "count": sum(buckets),
+                            "sum": counts[columns[-1]] / self.unit}
+        return result
+
+    def render(self):
+        """Prometheus text exposition lines (cumulative buckets)"""
+        lines = [f"# HELP {self.metric} {self.help}", f"# TYPE {self.metric} histogram"]
+        bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+        for name, data in self.snapshot().items():
+            labels = f'{self.label}="{name}"'
+            cumulative = 0
+            for bound, count in zip(bounds, data["buckets"]):
+                cumulative += count
+                lines.append(f'{self.metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.metric}_sum{{{labels}}} {_number(data['sum'])}")
+            lines.append(f"{self.metric}_count{{{labels}}} {data['count']}")
+        return lines
+
+class NoopHistogram:
+    """Stand-in when metrics are switched off: no clock reads, no counters"""
+
+    names = []
+
+    def observe(self, name, value):
+        pass
+
+    def start(self):
+        return 0.0
+
+    def lap(self, name, start):
+        return 0.0
+
+    def snapshot(self):
+        return {}
+
+    def render(self):
+        return []
+
+def render_value(metric, kind, help, value, labels=None):
+    """One counter/gauge family. `value` is a number or a {label_value: number} dict."""
+    lines = [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"]
+    if isinstance(value, dict):
+        for label_value, v in value.items():
+            lines.append(f'{metric}{{{labels}="{label_value}"}} {_number(v)}')
+    else:
+        lines.append(f"{metric} {_number(value)}")
+    return lines
+
+def _number(value):
+    if value is None:
+        return "NaN"
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
@@ -0,0 +1,324 @@
+import os
+import threading
+import time
+from datetime import datetime
+import joblib
+import numpy as np
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from src.core.centroids import NearestCentroid
+from src.core.sequence_buffer import SequenceBuffer
+from src.ml.numpy_lstm import NumpyLSTM, file_digest
+from src.utils.logger import setup_logger
+
+logger = setup_logger("model_registry")
+
+# Files that make up one model set (a change to any of them triggers a reload)
+ARTIFACTS = ('kmeans_model.joblib', 'kmeans_scaler.joblib', 'scaler.joblib',
+             'guardnet_lstm.keras', 'guardnet_lstm.npz')
+
+class ModelNotReady(RuntimeError):
+    """Raised when a request needs a model that is not (yet) available"""
+
+class ModelSet:
+    """One consistent set of loaded artifacts (both gates)"""
+
+    def __init__(self):
+        self.kmeans_model = None
+        self.kmeans_scaler = None
+        self.lstm_scaler = None
+        self.malware_cluster = None
+        self.centroids = None    # NearestCentroid: scaler folded into the K-Means centers
+        self.lstm_predict = None # (N, T, 8) -> (N,) probabilities
+        self.lstm_backend = None
+        self.sequence_length = 1 # > 1: sequence mode, LSTM sees per-key windows
+        self.sequences = None    # SequenceBuffer (sequence mode only)
+        self.version = 0
+        self.loaded_at = None   # When the set went live (unix time)
+        self.load_ms = 0.0      # Loading + warm-up time
+        self.fingerprint = None # (name, size, mtime) of the artifacts it was loaded from
+
+class _ArtifactHandler(FileSystemEventHandler):
+    def __init__(self, registry):
+        self.registry = registry
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        paths = (event.src_path, getattr(event, 'dest_path', ''))
+        if any(os.path.basename(p) in ARTIFACTS for p in paths if p):
+            self.registry.schedule_reload()
+
+class ModelRegistry:
+    """
+    Loads the GuardNet artifacts with a fast path to serving traffic:
+    - K-Means + scalers are small and loaded eagerly (Gate 1 is live right away).
+    - The LSTM is loaded in the background ("background"), on first use ("lazy"),
+      or before returning ("eager"), then warmed up with a dummy batch.
+    Liveness = the process is up. Readiness = both gates loaded and warmed.
+
+    Hot reload: watch() follows the artifact files in `ml_dir`. A new set is
+    loaded, calibrated and warmed up in a background thread, then swapped in
+    with a single reference assignment. Requests read `registry.active` once,
+    so they see either the old or the new set, never a mix.
+    """
+
+    def __init__(self, ml_dir, lstm_backend="auto", lstm_load="background", warmup_rows=8,
+                 reload_debounce=2.0, sequence_memory=64 * 1024 * 1024, sequence_idle=300.0):
+        self.ml_dir = ml_dir
+        self.lstm_path = os.path.join(ml_dir, 'guardnet_lstm.keras')
+        self.lstm_npz_path = os.path.join(ml_dir, 'guardnet_lstm.npz')
+        self.lstm_scaler_path = os.path.join(ml_dir, 'scaler.joblib')
+        self.kmeans_path = os.path.join(ml_dir, 'kmeans_model.joblib')
+        self.kmeans_scaler_path = os.path.join(ml_dir, 'kmeans_scaler.joblib')
+
+        self.lstm_backend = lstm_backend
+        self.lstm_load = lstm_load
+        self.warmup_rows = warmup_rows
+        self.reload_debounce = reload_debounce
+        self.sequence_memory = sequence_memory # Memory cap of the per-key history (bytes)
+        self.sequence_idle = sequence_idle     # Seconds before an idle key is evicted
+
+        self.active = ModelSet()
+        self.version = 0 # Bumped whenever the active models change (cache invalidation)
+        self.kmeans_loaded = False
+        self.lstm_error = None
+        self.startup_timings = {} # stage -> milliseconds
+        self._lstm_ready = threading.Event()
+        self._lstm_lock = threading.Lock()
+        self._lstm_started = False
+
+        self.reloads = 0
+        self.reload_error = None
+        self._reload_lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._reload_timer = None
+        self._observer = None
+
+    # --- STATUS ---
+    @property
+    def ready(self):
+        return self.kmeans_loaded and self._lstm_ready.is_set() and self.lstm_error is None
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "kmeans_loaded": self.kmeans_loaded,
+            "lstm_loaded": self._lstm_ready.is_set() and self.lstm_error is None,
+            "lstm_backend": self.active.lstm_backend,
+            "version": self.version,
+            "lstm_error": self.lstm_error,
+            "startup_timings_ms": dict(self.startup_timings)
+        }
+
+    def model_info(self):
+        """Active model version and load time (for /api/stats)"""
+        models = self.active
+        return {
+            "version": models.version,
+            "loaded_at": datetime.fromtimestamp(models.loaded_at).isoformat(timespec='seconds')
+                         if models.loaded_at else None,
+            "load_ms": round(models.load_ms, 2),
+            "lstm_backend": models.lstm_backend,
+            "reloads": self.reloads,
+            "reload_error": self.reload_error,
+            "hot_reload": self._observer is not None
+        }
+
+    def _timed(self, stage, fn, timings=None):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        (self.startup_timings if timings is None else timings)[stage] = round(elapsed, 2)
+        logger.info(f"⏱️ {stage}: {elapsed:.1f} ms")
+        return result
+
+    def _fingerprint(self):
+        stats = []
+        for name in ARTIFACTS:
+            try:
+                st = os.stat(os.path.join(self.ml_dir, name))
+                stats.append((name, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                pass
+        return tuple(stats)
+
+    def _activate(self, models):
+        """Publishes a fully loaded set (one reference assignment)"""
+        self.version += 1
+        models.version = self.version
+        models.loaded_at = time.time()
+        self.active = models
+
+    # --- LOADING ---
+    def load(self):
+        """Eager part of startup. Raises if Gate 1 cannot be loaded."""
+        models = ModelSet()
+        models.fingerprint = self._fingerprint()
+        self._load_kmeans(models)
+        models.load_ms = sum(self.startup_timings.values())
+        self._activate(models)
+        self.kmeans_loaded = True
+
+        if self.lstm_load == "eager":
+            self._load_lstm()
+        elif self.lstm_load == "background":
+            self.start_lstm_loading()
+        # "lazy": first call to lstm_predict() loads it
+
+    def _load_kmeans(self, models, timings=None):
+        models.kmeans_model = self._timed("kmeans_model", lambda: joblib.load(self.kmeans_path), timings)
+        models.kmeans_scaler = self._timed("kmeans_scaler", lambda: joblib.load(self.kmeans_scaler_path), timings)
+        models.lstm_scaler = self._timed("lstm_scaler", lambda: joblib.load(self.lstm_scaler_path), timings)
+
+        # Auto-Calibrate Clusters (Tiny bytes = Malware); centers are in raw feature units
+        models.centroids = NearestCentroid.from_sklearn(models.kmeans_scaler, models.kmeans_model)
+        models.malware_cluster = int(np.argmin(models.centroids.centers[:, 4]))
+
+        # Trained on windows -> keep a history per key (fresh one per set:
+        # vectors scaled by an older scaler are meaningless to a new model)
+        models.sequence_length = getattr(models.lstm_scaler, 'sequence_length', 1)
+        if models.sequence_length > 1:
+            models.sequences = SequenceBuffer(models.sequence_length, max_bytes=self.sequence_memory,
+                                              idle_timeout=self.sequence_idle)
+
+    def start_lstm_loading(self):
+        with self._lstm_lock:
+            if self._lstm_started:
+                return
+            self._lstm_started = True
+        threading.Thread(target=self._load_lstm, name="lstm-loader", daemon=True).start()
+
+    def _load_lstm(self):
+        self._lstm_started = True
+        models = self.active
+        try:
+            predict, backend = self._timed("lstm_model", self._open_lstm)
+            models.lstm_predict, models.lstm_backend = predict, backend
+            if self.warmup_rows:
+                self._timed("warmup", lambda: self._warmup(models, self.warmup_rows))
+            models.load_ms = sum(self.startup_timings.values())
+            if self.active is models: # Not already replaced by a hot reload
+                self.version += 1
+                models.version = self.version
+            logger.info(f"✅ LSTM online (backend: {backend}).")
+        except Exception as e:
+            self.lstm_error = str(e)
+            logger.error(f"❌ LSTM Offline: {e}")
+        finally:
+            self._lstm_ready.set()
+
+    def _open_lstm(self):
+        """Returns (predict_fn, backend_name) for the configured LSTM backend"""
+        backend = self.lstm_backend
+        if backend == "auto":
+            backend = "numpy" if os.path.exists(self.lstm_npz_path) else "keras"
+
+        if backend == "numpy":
+            engine = NumpyLSTM.load(self.lstm_npz_path)
+            # Retrained .keras without re-export -> the .npz holds the OLD weights,
+            # which must never be paired with the new scaler.joblib
+            stale = os.path.exists(self.lstm_path) and engine.source_digest != file_digest(self.lstm_path)
+            if not stale:
+                return engine.predict, backend
+            if self.lstm_backend != "auto":
+                raise ValueError("guardnet_lstm.npz does not match guardnet_lstm.keras (stale export). "
+                                 "Run `python -m src.ml.numpy_lstm` to re-export.")
+            logger.warning("⚠️ guardnet_lstm.npz does not match the .keras model, using Keras. "
+                           "Run `python -m src.ml.numpy_lstm` to re-export.")
+
+        if not os.path.exists(self.lstm_path): raise FileNotFoundError("Model files missing")
+        import tensorflow as tf # Heavy import, only needed for the Keras backend
+        model = tf.keras.models.load_model(self.lstm_path)
+        return (lambda batch: model.predict(batch, verbose=0)[:, 0]), "keras"
+
+    def _warmup(self, models, rows):
+        """Run both gates once so the first real request pays no tracing cost"""
+        X = np.tile(models.kmeans_scaler.mean_, (rows, 1))
+        models.centroids.nearest(X)
+        features = models.lstm_scaler.transform(X).reshape(rows, 1, -1)
+        models.lstm_predict(np.repeat(features, models.sequence_length, axis=1))
+
+    # --- HOT RELOAD ---
+    def reload(self, force=False):
+        """
+        Loads + warms a complete new set off the request path and swaps it in.
+        On any error the current set stays active. Returns True if swapped.
+        """
+        with self._reload_lock:
+            fingerprint = self._fingerprint()
+            if not force and fingerprint == self.active.fingerprint:
+                return False
+
+            start = time.perf_counter()
+            timings = {}
+            try:
+                models = ModelSet()
+                models.fingerprint = fingerprint
+                self._load_kmeans(models, timings)
+                models.lstm_predict, models.lstm_backend = self._timed("lstm_model", self._open_lstm, timings)
+                # Always at least one row: also checks that the artifacts fit together
+                self._timed("warmup", lambda: self._warmup(models, max(self.warmup_rows, 1)), timings)
+            except Exception as e:
+                self.reload_error = str(e)
+                logger.error(f"❌ Model reload failed, keeping version {self.active.version}: {e}")
+                return False
+
+            models.load_ms = (time.perf_counter() - start) * 1000
+            self._activate(models)
+            self.reloads += 1
+            self.reload_error = None
+            self.kmeans_loaded = True
+            self.lstm_error = None
+            self._lstm_started = True
+            self._lstm_ready.set()
+            logger.info(f"🔄 Models reloaded: version {models.version} "
+                        f"({models.load_ms:.0f} ms, LSTM backend: {models.lstm_backend})")
+            return True
+
+    def schedule_reload(self):
+        """Debounced reload: a retrain writes several files in a row"""
+        with self._timer_lock:
+            if self._reload_timer is not None:
+                self._reload_timer.cancel()
+            self._reload_timer = threading.Timer(self.reload_debounce, self.reload)
+            self._reload_timer.daemon = True
+            self._reload_timer.start()
+
+    def watch(self):
+        """Starts following `ml_dir` (call once per process, after any fork)"""
+        if self._observer is not None:
+            return
+        observer = Observer()
+        observer.schedule(_ArtifactHandler(self), self.ml_dir, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        logger.info(f"👀 Watching {self.ml_dir} for new models")
+
+    def stop_watching(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        if self._reload_timer is not None:
+            self._reload_timer.cancel()
+
+    # --- INFERENCE ---
+    def lstm_predict(self, X, models=None, timeout=30.0):
+        """
+        Raw (N, 8) features -> LSTM probabilities, scaler and model from the same set.
+        (N, T, 8) input is taken as already scaled windows (sequence mode).
+        `models` is the set the request started with (default: the active one),
+        so a swap while the request waits in the batcher can't mix two sets.
+        """
+        if not self._lstm_ready.is_set():
+            self.start_lstm_loading() # Lazy mode: first anomalous request triggers the load
+            if not self._lstm_ready.wait(timeout):
+                raise ModelNotReady("LSTM is still loading")
+        models = self.active if models is None else models
+        if models.lstm_predict is None:
+            raise ModelNotReady(f"LSTM unavailable: {self.lstm_error}")
+        if X.ndim == 3:
+            return models.lstm_predict(X)
+        features = models.lstm_scaler.transform(X).reshape(len(X), 1, -1)
+        return models.lstm_predict(features)
@@ -1,79 +1,253 @@
-import pandas as pd
-from scapy.all import rdpcap, IP, TCP, UDP
+import mmap
 import os
+import shutil
+import socket
+import struct
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from src.core.dataset import FeatureDataset
+from src.core.flow_tracker import iter_flows, flows_to_features
 from src.utils.logger import setup_logger
 
 logger = setup_logger("pcap_converter")
 
-def pcap_to_df(pcap_path):
+FEATURE_COLS = ['duration', 'protocol_type', 'service', 'flag',
+                'src_bytes', 'dst_bytes', 'count', 'srv_count']
+
+# One row per IPv4 packet, decoded straight from the capture bytes
+PACKET_DTYPE = np.dtype([
+    ('ts', '<f8'),      # capture timestamp (seconds)
+    ('src', '<u4'),     # IPv4 source address
+    ('dst', '<u4'),     # IPv4 destination address
+    ('sport', '<u2'),
+    ('dport', '<u2'),
+    ('proto', 'u1'),    # IP protocol number (6 = TCP, 17 = UDP, 1 = ICMP)
+    ('flags', 'u1'),    # TCP flag bits
+    ('length', '<u4'),  # IP payload bytes
+])
+
+CHUNK_SIZE = 65536
+DATASET_CHUNK_ROWS = 1_000_000 # Rows per .npy chunk written by convert_all_pcaps
+IPPROTO_TCP, IPPROTO_UDP = 6, 17
+
+# Classic pcap magic -> (struct byte order, timestamp divisor)
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e6), b'\xa1\xb2\xc3\xd4': ('>', 1e6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e9), b'\xa1\xb2\x3c\x4d': ('>', 1e9),
+}
+# Link type -> length of the link-layer header before IPv4 (None = Ethernet, parsed per packet)
+LINK_HEADERS = {1: None, 0: 4, 101: 0, 228: 0, 113: 16}
+
+def _iter_raw_pcap(mm, order, ts_div, linktype, chunk_size):
+    """Walks the record headers of a classic pcap and decodes IPv4 fields per chunk"""
+    buf = np.frombuffer(mm, dtype=np.uint8)
+    record = struct.Struct(order + 'IIII')
+    pos, end = 24, len(mm)
+
+    try:
+        while pos + 16 <= end:
+            offsets, caplens, stamps = [], [], []
+            # The only per-packet Python work: hop from record header to record header
+            while pos + 16 <= end and len(offsets) < chunk_size:
+                sec, frac, caplen, _ = record.unpack_from(mm, pos)
+                pos += 16
+                if pos + caplen > end:
+                    pos = end # Truncated final record
+                    break
+                offsets.append(pos)
+                caplens.append(caplen)
+                stamps.append(sec + frac / ts_div)
+                pos += caplen
+            if offsets:
+                chunk = _decode_ipv4(buf, np.array(offsets, dtype=np.int64),
+                                     np.array(caplens, dtype=np.int64),
+                                     np.array(stamps), linktype)
+                if len(chunk):
+                    yield chunk
+    finally:
+        del buf # Release the export so the mmap can be closed
+
+def _decode_ipv4(buf, offsets, caplens, stamps, linktype):
+    """Vectorized header decoding for one chunk of packets"""
+    def u8(idx):
+        return buf[idx].astype(np.int64)
+
+    def u16(idx):
+        return (u8(idx) << 8) | u8(idx + 1)
+
+    def u32(idx):
+        return (u16(idx) << 16) | u16(idx + 2)
+
+    # 1. Locate the IPv4 header
+    l2 = LINK_HEADERS[linktype]
+    if l2 is None:
+        ok = caplens >= 34
+        safe = np.where(ok, offsets, 0)
+        ethertype = u16(safe + 12)
+        vlan = ethertype == 0x8100
+        ip = safe + np.where(vlan, 18, 14)
+        ok &= np.where(vlan, (caplens >= 38) & (u16(safe + 16) == 0x0800), ethertype == 0x0800)
+    else:
+        ok = caplens >= l2 + 20
+        ip = np.where(ok, offsets + l2, 0)
+
+    safe_ip = np.where(ok, ip, 0)
+    ok &= (u8(safe_ip) >> 4) == 4
+    if linktype == 113:
+        ok &= u16(np.where(ok, offsets + 14, 0)) == 0x0800
+
+    offsets, caplens, stamps, ip = offsets[ok], caplens[ok], stamps[ok], ip[ok]
+    ihl = (u8(ip) & 0x0F) * 4
+    proto = u8(ip + 9)
+
+    out = np.zeros(len(ip), dtype=PACKET_DTYPE)
+    out['ts'] = stamps
+    out['src'] = u32(ip + 12)
+    out['dst'] = u32(ip + 16)
+    out['proto'] = proto
+    out['length'] = np.maximum(u16(ip + 2) - ihl, 0)
+
+    # 2. Ports / flags where the transport header was captured
+    l4 = ip + ihl
+    captured = offsets + caplens
+    ports = ((proto == IPPROTO_TCP) | (proto == IPPROTO_UDP)) & (l4 + 4 <= captured)
+    out['sport'][ports] = u16(l4[ports])
+    out['dport'][ports] = u16(l4[ports] + 2)
+    tcp = (proto == IPPROTO_TCP) & (l4 + 14 <= captured)
+    out['flags'][tcp] = u8(l4[tcp] + 13)
+    return out
+
+def _iter_scapy(path, chunk_size):
+    """Fallback for pcapng / exotic link types: scapy's streaming reader"""
+    from scapy.all import PcapReader, IP, TCP, UDP
+
+    rows = []
+    with PcapReader(path) as reader:
+        for pkt in reader:
+            if IP not in pkt:
+                continue
+            ip = pkt[IP]
+            sport = dport = flags = 0
+            if TCP in pkt:
+                sport, dport, flags = pkt[TCP].sport, pkt[TCP].dport, int(pkt[TCP].flags)
+            elif UDP in pkt:
+                sport, dport = pkt[UDP].sport, pkt[UDP].dport
+            src = struct.unpack('!I', socket.inet_aton(ip.src))[0]
+            dst = struct.unpack('!I', socket.inet_aton(ip.dst))[0]
+            rows.append((float(pkt.time), src, dst, sport, dport, ip.proto, flags, len(ip.payload)))
+            if len(rows) >= chunk_size:
+                yield np.array(rows, dtype=PACKET_DTYPE)
+                rows = []
+    if rows:
+        yield np.array(rows, dtype=PACKET_DTYPE)
+
+def iter_packets(pcap_path, chunk_size=CHUNK_SIZE):
+    """
+    Streams a capture as PACKET_DTYPE chunks of at most `chunk_size` packets.
+    Memory stays bounded by the chunk size, not the capture size.
+    """
+    with open(pcap_path, 'rb') as f:
+        head = f.read(24)
+        if len(head) == 24 and head[:4] in PCAP_MAGIC:
+            order, ts_div = PCAP_MAGIC[head[:4]]
+            linktype = struct.unpack(order + 'I', head[20:24])[0] & 0x0FFFFFFF
+            if linktype in LINK_HEADERS:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    yield from _iter_raw_pcap(mm, order, ts_div, linktype, chunk_size)
+                return
+    yield from _iter_scapy(pcap_path, chunk_size)
+
+def packets_to_features(packets):
+    """
+    PACKET_DTYPE chunk -> (N, 8) feature matrix in FEATURE_COLS order.
+    Legacy per-packet mode: each packet is a data point with placeholder flow fields.
+    """
+    proto = packets['proto']
+    X = np.zeros((len(packets), len(FEATURE_COLS)))
+    X[:, 0] = 0.1 # Placeholder (real flow duration requires complex logic)
+    X[:, 1] = np.select([proto == IPPROTO_TCP, proto == IPPROTO_UDP], [1, 2], 0)
+    X[:, 2] = packets['sport']
+    X[:, 3] = packets['flags']
+    X[:, 4] = packets['length']
+    X[:, 5] = 0 # Hard to calculate without full flow tracking
+    X[:, 6] = 1
+    X[:, 7] = 1
+    return X
+
+def iter_features(pcap_path, chunk_size=CHUNK_SIZE, mode="flow", **tracker_kwargs):
+    """
+    Streams (N, 8) feature chunks for a capture.
+    mode="flow": one row per bidirectional flow (see src/core/flow_tracker.py).
+    mode="packet": one row per packet with placeholder flow fields.
+    """
+    packets = iter_packets(pcap_path, chunk_size)
+    if mode == "packet":
+        for chunk in packets:
+            yield packets_to_features(chunk)
+        return
+    for flows in iter_flows(packets, **tracker_kwargs):
+        yield flows_to_features(flows)
+
+def pcap_to_df(pcap_path, mode="flow"):
     """
     Reads a .pcap file and extracts features for the AI model.
+    (Loads the whole result; prefer iter_features() for large captures.)
     """
-    logger.info(f"Reading {pcap_path}... (This might take a while)")
-    packets = rdpcap(pcap_path)
-    
-    data = []
-    
-    # We will simulate "Flows" by grouping packets. 
-    # For this student project, we treat each packet as a data point to keep it simple.
-    
-    for pkt in packets:
-        if IP in pkt:
-            try:
-                # 1. Protocol
-                proto = 0
-                if TCP in pkt: proto = 1
-                elif UDP in pkt: proto = 2
-                
-                # 2. Service (Port)
-                sport = pkt[IP].sport if TCP in pkt or UDP in pkt else 0
-                
-                # 3. Flags (TCP only)
-                flags = 0
-                if TCP in pkt:
-                    # Simple mapping of flag bits to an integer
-                    flags = int(pkt[TCP].flags)
-
-                # 4. Bytes
-                src_bytes = len(pkt[IP].payload)
-                
-                row = {
-                    'duration': 0.1, # Placeholder (real flow duration requires complex logic)
-                    'protocol_type': proto,
-                    'service': sport,
-                    'flag': flags,
-                    'src_bytes': src_bytes,
-                    'dst_bytes': 0, # Hard to calculate without full flow tracking
-                    'count': 1,
-                    'srv_count': 1
-                }
-                data.append(row)
-            except Exception as e:
-                pass
-
-    df = pd.DataFrame(data)
+    logger.info(f"Reading {pcap_path}...")
+    chunks = list(iter_features(pcap_path, mode=mode))
+    X = np.concatenate(chunks) if chunks else np.zeros((0, len(FEATURE_COLS)))
+    df = pd.DataFrame(X, columns=FEATURE_COLS)
     logger.info(f"Extracted {len(df)} samples from {pcap_path}")
     return df
 
-def convert_all_pcaps():
-    data_dir = os.path.join(os.getcwd(), 'data')
-    all_data = []
+def _convert_one(args):
+    """Process-pool worker: stream one capture into its own dataset chunks"""
+    pcap_path, dataset_dir, prefix, mode = args
+    dataset = FeatureDataset(dataset_dir)
+    entries, pending, pending_rows = [], [], 0
+    for X in iter_features(pcap_path, mode=mode):
+        pending.append(X)
+        pending_rows += len(X)
+        if pending_rows >= DATASET_CHUNK_ROWS:
+            entries.append(dataset.write_chunk(np.concatenate(pending), prefix=prefix))
+            pending, pending_rows = [], 0
+    if pending_rows:
+        entries.append(dataset.write_chunk(np.concatenate(pending), prefix=prefix))
+    # Only the parent touches the manifest
+    return pcap_path, entries
+
+def convert_all_pcaps(data_dir=None, workers=None, mode="flow", append=False, export_csv=False):
+    data_dir = data_dir or os.path.join(os.getcwd(), 'data')
+    dataset_dir = os.path.join(data_dir, 'dataset')
 
     # Look for all .pcap files in the data folder
-    for filename in os.listdir(data_dir):
-        if filename.endswith(".pcap") or filename.endswith(".pcapng"):
-            full_path = os.path.join(data_dir, filename)
-            df = pcap_to_df(full_path)
-            all_data.append(df)
-    
-    if all_data:
-        final_df = pd.concat(all_data, ignore_index=True)
-        # Save as CSV for the training script to pick up
-        save_path = os.path.join(data_dir, 'training_data.csv')
-        final_df.to_csv(save_path, index=False)
-        logger.info(f"Successfully saved combined dataset to {save_path}")
-    else:
+    pcaps = sorted(
+        os.path.join(data_dir, f) for f in os.listdir(data_dir)
+        if f.endswith(".pcap") or f.endswith(".pcapng")
+    )
+    if not pcaps:
         logger.warning("No .pcap files found in /data folder!")
+        return
+
+    if not append and os.path.isdir(dataset_dir):
+        shutil.rmtree(dataset_dir)
+    dataset = FeatureDataset(dataset_dir)
+
+    # Each capture is parsed in its own process and written as typed .npy
+    # chunks; the manifest is updated once, in capture order
+    jobs = [(p, dataset_dir, f"pcap{i:05d}", mode) for i, p in enumerate(pcaps)]
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for pcap_path, written in pool.map(_convert_one, jobs):
+            logger.info(f"Extracted {sum(e['rows'] for e in written)} samples from {pcap_path}")
+            entries.extend(written)
+    dataset.commit(entries)
+    logger.info(f"Successfully saved dataset ({len(dataset)} rows) to {dataset_dir}")
+
+    if export_csv:
+        dataset.export_csv(os.path.join(data_dir, 'training_data.csv'))
+    return dataset
 
 if __name__ == "__main__":
-    convert_all_pcaps()
\ No newline at end of file
+    convert_all_pcaps()
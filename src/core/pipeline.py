@@ -0,0 +1,256 @@
+import threading
+import time
+import numpy as np
+
+# Who decided a verdict (u8 codes, also sent by the binary stream protocol)
+CLUSTERING, DEEP_LEARNING, ALLOWLIST, DENYLIST, BANLIST = range(5)
+SOURCE_NAMES = ("Clustering", "Deep Learning", "Allowlist", "Denylist", "Ban List")
+
+class Batch:
+    """Rows going through the pipeline and the verdicts decided so far"""
+
+    def __init__(self, X, records=None, models=None):
+        n = len(X)
+        self.X = X
+        self.records = records # Original JSON dicts (None for the binary stream)
+        self.models = models   # ModelSet snapshot: every stage sees the same models
+        self.malicious = np.zeros(n, dtype=bool)
+        self.confidence = np.zeros(n, dtype=np.float64)
+        self.source = np.zeros(n, dtype=np.uint8)
+        self.decided = np.zeros(n, dtype=bool)
+        self.scratch = {} # Per-stage state between process() and finish()
+
+    def __len__(self):
+        return len(self.X)
+
+    @property
+    def deep(self):
+        return self.source == DEEP_LEARNING
+
+    def pending(self):
+        return np.flatnonzero(~self.decided)
+
+    def features(self, rows):
+        return self.X if len(rows) == len(self.X) else self.X[rows]
+
+    def decide(self, rows, malicious, confidence, source):
+        self.malicious[rows] = malicious
+        self.confidence[rows] = confidence
+        self.source[rows] = source
+        self.decided[rows] = True
+
+class Stage:
+    """
+    One step of the cascade. process() gets the indices of the rows no earlier
+    stage decided and calls batch.decide() for the ones it can settle; the
+    rest move on to the next stage.
+    """
+    name = "stage"
+    cost = 1.0             # Relative cost per row: the pipeline runs cheapest first
+    sees_all_rows = False  # Still called when no row is left (e.g. to update state)
+
+    def process(self, batch, rows):
+        raise NotImplementedError
+
+    def finish(self, batch):
+        """Runs after the cascade, with every verdict known (e.g. cache fills)"""
+
+class StageStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rows_in = 0
+        self.decided = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.finish_seconds = 0.0
+
+    def record(self, rows_in, decided, seconds):
+        with self._lock:
+            self.calls += 1
+            self.rows_in += rows_in
+            self.decided += decided
+            self.seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def record_finish(self, seconds):
+        with self._lock:
+            self.finish_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "rows_in": self.rows_in,
+                "decided": self.decided,
+                "hit_rate": round(self.decided / self.rows_in, 4) if self.rows_in else 0.0,
+                "total_ms": round(self.seconds * 1000, 2),
+                "avg_ms": round(self.seconds * 1000 / self.calls, 4) if self.calls else 0.0,
+                "max_ms": round(self.max_seconds * 1000, 4),
+                "finish_ms": round(self.finish_seconds * 1000, 2),
+                "us_per_row": round(self.seconds * 1e6 / self.rows_in, 3) if self.rows_in else 0.0
+            }
+
+class Pipeline:
+    """
+    Detector cascade: every batch goes through the stages in order (cheapest
+    first unless `sort_by_cost=False`), each one only seeing the rows still
+    undecided. Once every row is decided the remaining stages are skipped.
+    Rows no stage decides stay "Normal" with confidence 0.
+    `observe(stage_name, seconds)` is called after every stage (e.g. a Histogram).
+    """
+
+    def __init__(self, stages, models_fn=lambda: None, sort_by_cost=True, observe=None):
+        self.stages = sorted(stages, key=lambda s: s.cost) if sort_by_cost else list(stages)
+        self.models_fn = models_fn
+        self.observe = observe
+        self._stats = {stage.name: StageStats() for stage in self.stages}
+
+    def run(self, X, records=None):
+        batch = Batch(X, records, self.models_fn())
+        for stage in self.stages:
+            rows = batch.pending()
+            if not len(rows) and not stage.sees_all_rows:
+                continue
+            start = time.perf_counter()
+            stage.process(batch, rows)
+            elapsed = time.perf_counter() - start
+            decided = len(rows) - int(np.count_nonzero(~batch.decided[rows]))
+            self._stats[stage.name].record(len(rows), decided, elapsed)
+            if self.observe is not None:
+                self.observe(stage.name, elapsed)
+
+        for stage in self.stages:
+            start = time.perf_counter()
+            stage.finish(batch)
+            self._stats[stage.name].record_finish(time.perf_counter() - start)
+        return batch
+
+    def metrics(self):
+        return [dict(name=stage.name, cost=stage.cost, **self._stats[stage.name].snapshot())
+                for stage in self.stages]
+
+# --- STAGES ---
+class ListStage(Stage):
+    """
+    Allow/deny lookup on a record field (e.g. src_ip). Deny wins over allow;
+    allow wins over a Sentinel ban (`bans`, a BanList), so a trusted host
+    can't be locked out by a false positive.
+    """
+    name = "lists"
+    cost = 0.1
+
+    def __init__(self, allow=(), deny=(), field="src_ip", bans=None):
+        self.allow = set(allow)
+        self.deny = set(deny)
+        self.field = field
+        self.bans = bans
+
+    def process(self, batch, rows):
+        if batch.records is None:
+            return
+        bans = self.bans
+        if bans is not None:
+            bans.refresh()
+            if not len(bans):
+                bans = None
+        if not (self.allow or self.deny or bans):
+            return
+        values = [batch.records[i].get(self.field) for i in rows.tolist()]
+        denied = np.array([v in self.deny for v in values], dtype=bool)
+        allowed = np.array([v in self.allow for v in values], dtype=bool) & ~denied
+        batch.decide(rows[denied], True, 1.0, DENYLIST)
+        batch.decide(rows[allowed], False, 1.0, ALLOWLIST)
+        if bans is not None:
+            now = time.time()
+            banned = np.array([bans.contains(v, now) for v in values], dtype=bool) & ~denied & ~allowed
+            batch.decide(rows[banned], True, 1.0, BANLIST)
+
+class CacheStage(Stage):
+    """Repeated feature vectors reuse an earlier model verdict (see VerdictCache)"""
+    name = "cache"
+    cost = 0.5
+
+    def __init__(self, cache, generation_fn):
+        self.cache = cache
+        self.generation_fn = generation_fn
+
+    def process(self, batch, rows):
+        # Sequence mode: a verdict depends on the history, not only on the row
+        if batch.models is not None and batch.models.sequences is not None:
+            return
+        generation = self.generation_fn()
+        keys = self.cache.keys(batch.features(rows))
+        hit, malicious, confidence, deep = self.cache.lookup(keys, generation)
+        batch.decide(rows[hit], malicious[hit], confidence[hit],
+                     np.where(deep[hit], DEEP_LEARNING, CLUSTERING))
+        batch.scratch[self.name] = (rows[~hit], [k for k, h in zip(keys, hit) if not h], generation)
+
+    def finish(self, batch):
+        if self.name not in batch.scratch:
+            return
+        rows, keys, generation = batch.scratch.pop(self.name)
+        # Only model verdicts are a function of the features
+        model = batch.decided[rows] & (batch.source[rows] <= DEEP_LEARNING)
+        if np.any(model):
+            rows = rows[model]
+            self.cache.store([k for k, m in zip(keys, model) if m], batch.malicious[rows],
+                             batch.confidence[rows], batch.deep[rows], generation)
+
+class KMeansGate(Stage):
+    """
+    Gate 1: distance to the nearest centroid. Rows within `threshold` take the
+    cluster's label (confidence 1 - distance / confidence_scale); outliers move on.
+    squared=True compares squared distances, so only the inliers pay a sqrt.
+    """
+    name = "kmeans"
+    cost = 1.0
+
+    def __init__(self, threshold=3.0, confidence_scale=5.0, squared=True):
+        self.threshold = threshold
+        self.confidence_scale = confidence_scale
+        self.squared = squared
+
+    def process(self, batch, rows):
+        models = batch.models
+        nearest, dist = models.centroids.nearest(batch.features(rows), squared=self.squared)
+        if self.squared:
+            inlier = dist <= self.threshold * self.threshold
+            dist = np.sqrt(dist[inlier])
+        else:
+            inlier = dist <= self.threshold
+            dist = dist[inlier]
+        batch.decide(rows[inlier], nearest[inlier] == models.malware_cluster,
+                     1.0 - dist / self.confidence_scale, CLUSTERING)
+
+class LSTMGate(Stage):
+    """
+    Gate 2: the LSTM scores every row it receives (one micro-batched predict).
+    In sequence mode every row of the batch extends its key's history, so this
+    stage also runs when earlier stages decided everything. A batcher that
+    does not answer within `timeout` seconds raises TimeoutError (-> 503).
+    """
+    name = "lstm"
+    cost = 100.0
+    sees_all_rows = True
+
+    def __init__(self, batcher, threshold=0.5, key_fn=None, timeout=10.0):
+        self.batcher = batcher
+        self.threshold = threshold
+        self.timeout = timeout
+        self.key_fn = key_fn # (X, records) -> one history key per row
+
+    def process(self, batch, rows):
+        models = batch.models
+        if models.sequences is not None:
+            want = np.zeros(len(batch), dtype=bool)
+            want[rows] = True
+            scaled = models.lstm_scaler.scaler.transform(batch.X)
+            inputs = models.sequences.push(self.key_fn(batch.X, batch.records), scaled, want)
+        else:
+            inputs = batch.features(rows) # Scaled with the LSTM's own set, see ModelRegistry.lstm_predict
+        if not len(rows):
+            return
+        # Scored by the same model set that scaled/windowed the rows
+        preds = self.batcher.predict(inputs, self.timeout, context=models)
+        batch.decide(rows, preds > self.threshold, preds, DEEP_LEARNING)
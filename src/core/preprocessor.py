@@ -6,12 +6,13 @@ from src.utils.logger import setup_logger
 logger = setup_logger("preprocessor")
 
 class DataPreprocessor:
-    def __init__(self):
+    def __init__(self, sequence_length=1):
         self.scaler = StandardScaler()
         self.is_fitted = False
         
-        # We process packets in "windows" for LSTM (e.g., look at last 10 packets)
-        self.sequence_length = 1 
+        # We process packets in "windows" for LSTM (e.g., look at last 10 packets).
+        # Saved with the scaler, so the server knows which window the model expects.
+        self.sequence_length = sequence_length
         self.num_features = 8 # Must match your dataset columns
 
     def fit(self, X):
@@ -19,6 +20,11 @@ class DataPreprocessor:
         self.scaler.fit(X)
         self.is_fitted = True
 
+    def partial_fit(self, X):
+        """Incremental fit, one batch at a time (out-of-core training)"""
+        self.scaler.partial_fit(X)
+        self.is_fitted = True
+
     def transform(self, X):
         """Scale and reshape data for LSTM"""
         if not self.is_fitted:
@@ -28,12 +34,38 @@ class DataPreprocessor:
         X_scaled = self.scaler.transform(X)
         
         # Reshape for LSTM: [samples, time_steps, features]
-        # Here we treat each packet as a single time-step sequence for simplicity
-        # In advanced versions, we group 10 packets into 1 sequence.
-        X_reshaped = np.reshape(X_scaled, (X_scaled.shape[0], self.sequence_length, X_scaled.shape[1]))
+        # Each packet as a single time step; see transform_sequences() for windows
+        X_reshaped = np.reshape(X_scaled, (X_scaled.shape[0], 1, X_scaled.shape[1]))
         
         return X_reshaped
 
+    def transform_sequences(self, X, groups=None):
+        """
+        Scale, then build the window of `sequence_length` rows ending at every row.
+        Rows must be in time order (and contiguous per group, e.g. per flow key).
+        Returns (windows, index): windows[index[i]] is the window ending at row i.
+
+        `windows` is a strided VIEW (sliding_window_view) over the scaled rows,
+        not a copy; index it one batch at a time. Windows are left-padded with
+        the first row of their group, like the server's SequenceBuffer.
+        """
+        if not self.is_fitted:
+            logger.warning("Preprocessor used before fitting! Using dummy fit.")
+            self.fit(X)
+        T = self.sequence_length
+        X_scaled = self.scaler.transform(X).astype(np.float32)
+        groups = np.zeros(len(X_scaled), dtype=np.int64) if groups is None else np.asarray(groups)
+
+        # Only the ROWS are copied: the first row of each group is repeated T times
+        first = np.r_[True, groups[1:] != groups[:-1]]
+        repeats = np.where(first, T, 1)
+        padded = np.repeat(X_scaled, repeats, axis=0)
+
+        # (rows, features) -> (windows, T, features) view; row i ends at padded[cumsum - 1]
+        windows = np.lib.stride_tricks.sliding_window_view(padded, T, axis=0).transpose(0, 2, 1)
+        index = np.cumsum(repeats) - T
+        return windows, index
+
     def clean_and_encode(self, data_dict):
         """
         Real-time pipeline: Dict -> DataFrame -> Scale -> Reshape
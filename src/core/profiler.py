@@ -0,0 +1,177 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from src.utils.logger import setup_logger
+
+logger = setup_logger("profiler")
+
+# Leaf functions where a thread that is NOT serving a request is just idle
+IDLE_LEAVES = {"wait", "select", "poll", "accept", "get", "sleep", "_recv_into", "readinto",
+               "recv", "recv_into", "_wait_for_tstate_lock", "serve_forever", "epoll"}
+# Frame that marks a request thread (Flask's WSGI entry point)
+REQUEST_FRAME = "wsgi_app"
+# Time attribution by the package of the innermost frame
+PACKAGES = (("src/", "guardnet"), ("flask/", "flask"), ("werkzeug/", "flask"), ("sklearn/", "sklearn"),
+            ("tensorflow/", "tensorflow"), ("keras/", "tensorflow"), ("numpy/", "numpy"),
+            ("gunicorn/", "gunicorn"), ("json/", "json"), ("logging/", "logging"))
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a live server: a background thread samples
+    sys._current_frames() every `interval` seconds for a bounded duration
+    or number of requests, then writes
+    - <name>.collapsed: "root;caller;leaf count" lines (flamegraph.pl, speedscope)
+    - <name>.txt: top-N functions by self and total samples + time per package
+
+    Request threads (inside Flask's wsgi_app) are always sampled, waits
+    included - time blocked on the LSTM batcher IS request latency. Other
+    threads (batcher, stream server) only with all_threads=True, minus idle waits.
+    Nothing runs while no profile is active.
+    """
+
+    def __init__(self, out_dir="profiles", interval=0.005, top=25):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.top = top
+        self.active = False
+        self.last_result = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._requests = 0
+        self._labels = {} # code object -> "func (file:line)"
+
+    def start(self, seconds=10.0, requests=None, interval=None, all_threads=False):
+        """Starts a profile in the background. Returns False if one is already running."""
+        with self._lock:
+            if self.active:
+                return False
+            self.active = True
+            self._requests = 0
+            self._stop.clear()
+        config = dict(seconds=seconds, requests=requests, interval=interval or self.interval,
+                      all_threads=all_threads)
+        threading.Thread(target=self._run, kwargs=config, name="sampling-profiler", daemon=True).start()
+        logger.info(f"🔬 Profiling for up to {seconds}s"
+                    + (f" / {requests} requests" if requests else "") + f" every {config['interval'] * 1000:g}ms")
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def count_request(self):
+        """Called after every request while a profile is active"""
+        self._requests += 1
+
+    def status(self):
+        return {"active": self.active, "requests": self._requests, "last": self.last_result}
+
+    # --- SAMPLING ---
+    def _run(self, seconds, requests, interval, all_threads):
+        stacks = Counter()
+        samples = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        own = threading.get_ident()
+        # The sampler needs the GIL to look: with the default 5ms switch
+        # interval it would mostly wake while request threads sit in GIL-free
+        # NumPy calls, over-sampling those. Switch faster while profiling.
+        switch_interval = sys.getswitchinterval()
+        try:
+            sys.setswitchinterval(min(switch_interval, interval / 10))
+            while not self._stop.is_set() and time.perf_counter() < deadline:
+                if requests and self._requests >= requests:
+                    break
+                self._sample(stacks, own, all_threads)
+                samples += 1
+                time.sleep(interval)
+            elapsed = time.perf_counter() - start
+            self.last_result = self._write(stacks, samples, elapsed)
+            logger.info(f"🔬 Profile saved: {self.last_result['collapsed']} "
+                        f"({samples} samples, {self.last_result['requests']} requests)")
+        except Exception as e:
+            logger.error(f"Profiler Error: {e}")
+            self.last_result = {"error": str(e)}
+        finally:
+            sys.setswitchinterval(switch_interval)
+            self.active = False
+
+    def _sample(self, stacks, own, all_threads):
+        for tid, frame in sys._current_frames().items():
+            if tid == own:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            in_request = any(code.co_name == REQUEST_FRAME for code in codes)
+            if not in_request and (not all_threads or codes[0].co_name in IDLE_LEAVES):
+                continue
+            stacks[tuple(reversed(codes))] += 1 # Root first
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            for marker in ("site-packages/", "dist-packages/", os.getcwd() + os.sep):
+                if marker in path:
+                    path = path.split(marker, 1)[1]
+                    break
+            label = self._labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})"
+        return label
+
+    # --- OUTPUT ---
+    def _write(self, stacks, samples, elapsed):
+        os.makedirs(self.out_dir, exist_ok=True)
+        name = os.path.join(self.out_dir, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}")
+        collapsed = collapse(stacks, self._label)
+        with open(name + ".collapsed", "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in collapsed)
+
+        summary = summarize(stacks, self._label, self.top)
+        stacked = sum(stacks.values())
+        with open(name + ".txt", "w") as f:
+            f.write(f"{samples} sampling rounds over {elapsed:.1f}s, {stacked} thread samples, "
+                    f"{self._requests} requests\n\n")
+            f.write("--- TIME BY PACKAGE (innermost frame) ---\n")
+            for package, count in summary["packages"]:
+                f.write(f"{count / stacked:>7.1%}  {package}\n")
+            for title, key in (("SELF", "self"), ("TOTAL (inclusive)", "total")):
+                f.write(f"\n--- TOP {self.top} FUNCTIONS BY {title} ---\n")
+                for label, count in summary[key]:
+                    f.write(f"{count / stacked:>7.1%} {count:>7}  {label}\n")
+        return {
+            "collapsed": name + ".collapsed",
+            "summary": name + ".txt",
+            "samples": samples,
+            "thread_samples": stacked,
+            "seconds": round(elapsed, 2),
+            "requests": self._requests,
+            "top": [{"function": label, "self_pct": round(100 * count / stacked, 2)}
+                    for label, count in summary["self"][:10]] if stacked else []
+        }
+
+def collapse(stacks, label):
+    """Counter of code stacks -> sorted [("a;b;c", count)] (Brendan Gregg's collapsed format)"""
+    lines = Counter()
+    for codes, count in stacks.items():
+        lines[";".join(label(code) for code in codes)] += count
+    return sorted(lines.items())
+
+def summarize(stacks, label, top=25):
+    """Top functions by self (leaf) and total (on the stack) samples, and samples per package"""
+    self_counts, total_counts, packages = Counter(), Counter(), Counter()
+    for codes, count in stacks.items():
+        self_counts[label(codes[-1])] += count
+        for code in set(codes): # Recursion counts once per sample
+            total_counts[label(code)] += count
+        packages[_package(codes[-1].co_filename)] += count
+    return {"self": self_counts.most_common(top), "total": total_counts.most_common(top),
+            "packages": packages.most_common()}
+
+def _package(path):
+    for marker, package in PACKAGES:
+        if marker in path:
+            return package
+    return "python" if "/lib/python" in path else "other"
@@ -1,64 +1,366 @@
+import json
+import multiprocessing
+import os
+import queue
 import threading
 import time
-from collections import deque
+import urllib.request
+from collections import OrderedDict
 from src.utils.logger import setup_logger
 
 logger = setup_logger("sentinel_ai")
 
+# --- PER-SOURCE WINDOWS ---
+class SourceState:
+    """
+    Sliding-window state of one source: a time wheel of `buckets` slots
+    (one column per counting rule) plus running totals. Advancing clears at
+    most `buckets` slots, so every update is O(1).
+    """
+    __slots__ = ("counts", "totals", "epoch", "services", "last_seen", "cooldowns")
+
+    def __init__(self, buckets, columns, epoch, now):
+        self.counts = [0] * (buckets * columns)
+        self.totals = [0] * columns
+        self.epoch = epoch
+        self.services = {} # service -> epoch last seen (fan-out rule)
+        self.last_seen = now
+        self.cooldowns = {} # rule name -> time it may fire again
+
+    def advance(self, epoch, buckets, columns):
+        steps = min(epoch - self.epoch, buckets)
+        for step in range(1, steps + 1):
+            base = ((self.epoch + step) % buckets) * columns
+            for c in range(columns):
+                self.totals[c] -= self.counts[base + c]
+                self.counts[base + c] = 0
+        if epoch > self.epoch:
+            self.epoch = epoch
+
+    def add(self, column, buckets, columns, n=1):
+        self.counts[(self.epoch % buckets) * columns + column] += n
+        self.totals[column] += n
+        return self.totals[column]
+
+# --- RULES ---
+class Rule:
+    """update() records one malicious verdict and returns the window value if the rule fires"""
+    name = "rule"
+    counts = False # Needs a time-wheel column
+
+    def __init__(self, threshold, message):
+        self.threshold = threshold
+        self.message = message
+        self.column = None
+
+    def update(self, sentinel, state, record):
+        raise NotImplementedError
+
+class RateRule(Rule):
+    """More than `threshold` malicious verdicts from one source in the window"""
+    name = "rate"
+    counts = True
+
+    def update(self, sentinel, state, record):
+        value = state.add(self.column, sentinel.buckets, sentinel.columns)
+        return value if value > self.threshold else None
+
+class FlagRule(Rule):
+    """Abnormal TCP flags (any non-zero `flag`) repeated `threshold` times in the window"""
+    name = "flags"
+    counts = True
+
+    def update(self, sentinel, state, record):
+        if not record.get("flag"):
+            return None
+        value = state.add(self.column, sentinel.buckets, sentinel.columns)
+        return value if value >= self.threshold else None
+
+class FanoutRule(Rule):
+    """`threshold` distinct services (ports) hit by one source in the window (scan)"""
+    name = "fanout"
+
+    def update(self, sentinel, state, record):
+        service = record.get("service")
+        if service is None:
+            return None
+        services, epoch = state.services, state.epoch
+        horizon = epoch - sentinel.buckets
+        known = services.get(service)
+        services[service] = epoch
+        if known is not None and known > horizon:
+            return None # Not a new service: the distinct count did not grow
+        if len(services) >= self.threshold:
+            # Only now pay for dropping expired entries (bounded by the threshold)
+            for name in [s for s, seen in services.items() if seen <= horizon]:
+                del services[name]
+        return len(services) if len(services) >= self.threshold else None
+
+# --- RESPONSE ACTIONS ---
+class FileAction:
+    """Appends one line per alert, the whole batch in a single write"""
+
+    def __init__(self, path="banned_ips.log"):
+        self.path = path
+
+    def __call__(self, alerts):
+        lines = [f"{time.ctime(a['time'])} - BLOCK {a['source']} TRIGGERED BY SENTINEL "
+                 f"({a['rule']}: {a['value']})\n" for a in alerts]
+        with open(self.path, "a") as f:
+            f.write("".join(lines))
+
+class WebhookAction:
+    """POSTs a batch of alerts as JSON ({"alerts": [...]}) to e.g. a Discord/SOAR relay"""
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, alerts):
+        body = json.dumps({"alerts": alerts}).encode()
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+class BanAction:
+    """Adds every alerting IP to the BanList (which exports it for the firewall)"""
+
+    def __init__(self, bans):
+        self.bans = bans
+
+    def __call__(self, alerts):
+        for alert in alerts:
+            self.bans.ban(alert["source"], now=alert["time"])
+
+class ActionQueue:
+    """
+    Runs response actions off the detection path: alerts go into a bounded
+    queue (dropped and counted when full) and ONE thread hands them to every
+    action in batches of up to `batch_size`, at most every `flush_interval`.
+    """
+
+    def __init__(self, actions, maxsize=10000, batch_size=500, flush_interval=0.5):
+        self.actions = list(actions)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+
+        # Metrics
+        self.dropped = 0
+        self.batches = 0
+        self.delivered = 0
+        self.failures = 0
+
+    def put(self, alert):
+        try:
+            self._queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="sentinel-actions", daemon=True)
+            self._thread.start()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Runs the actions on everything queued right now (tests, shutdown)"""
+        while self._queue.qsize():
+            self._run(self._drain(self._queue.get()))
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._drain(self._queue.get())
+            self._run(batch)
+            time.sleep(self.flush_interval) # Let the next burst pile up into one batch
+
+    def _run(self, batch):
+        self.batches += 1
+        for alert in batch[:3]:
+            logger.warning(f"🚨 AUTOMATION TRIGGERED: {alert['message']} from {alert['source']}")
+        if len(batch) > 3:
+            logger.warning(f"🚨 ... and {len(batch) - 3} more alerts in this batch")
+        for action in self.actions:
+            try:
+                action(batch)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Sentinel action {type(action).__name__} failed: {e}")
+        self.delivered += len(batch)
+
+# --- SENTINEL ---
 class SentinelAI:
+    """
+    Watches malicious verdicts per source (src_ip, or "unknown") over a
+    sliding window and fires response actions when a rule trips:
+    - rate:   more than N malicious verdicts in the window (flood / DDoS)
+    - fanout: N distinct services from one source (port scan)
+    - flags:  N verdicts with an abnormal TCP flag (e.g. SYN flood)
+    Each rule fires at most once per source per `cooldown` seconds.
+    Sources idle for `idle_timeout` are forgotten, and the least recently
+    seen one is evicted at `max_sources`.
+    """
+
     def __init__(self):
         self.running = False
-        self.threat_buffer = deque(maxlen=100) # Memory of recent attacks
-        self.active_threats = []
-        
+        self.configure()
+
+        # Multi-worker mode: forked workers forward threats to the one
+        # Sentinel running in the parent process
+        self._ipc_queue = None
+        self._owner_pid = os.getpid()
+
+    def configure(self, window=10.0, buckets=10, rate=5, fanout=20, flags=10, cooldown=30.0,
+                  max_sources=50000, idle_timeout=None, ban_log="banned_ips.log", webhook=None,
+                  bans=None, actions=None):
+        """(Re)builds rules, state and actions. Call before start()."""
+        self.buckets = buckets
+        self.width = window / buckets
+        self.cooldown = cooldown
+        self.max_sources = max_sources
+        self.idle_timeout = idle_timeout or 3 * window
+        self.rules = [
+            RateRule(rate, "High Velocity Attack Detected (Potential DDoS)"),
+            FanoutRule(fanout, "Service Fan-out Detected (Potential Port Scan)"),
+            FlagRule(flags, "Repeated Abnormal TCP Flags (Potential SYN Flood)"),
+        ]
+        counting = [rule for rule in self.rules if rule.counts]
+        for column, rule in enumerate(counting):
+            rule.column = column
+        self.columns = len(counting)
+
+        if actions is None:
+            actions = [FileAction(ban_log)] + ([WebhookAction(webhook)] if webhook else [])
+            actions += [BanAction(bans)] if bans is not None else []
+        self.bans = bans
+        self.actions = ActionQueue(actions)
+        self._sources = OrderedDict() # source -> SourceState, least recently seen first
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.threats = 0
+        self.alerts = {rule.name: 0 for rule in self.rules}
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def enable_ipc(self, maxsize=10000):
+        """Call in the parent BEFORE forking workers (see gunicorn_conf.py)"""
+        self._ipc_queue = multiprocessing.Queue(maxsize=maxsize)
+        self._owner_pid = os.getpid()
+
     def start(self):
-        """Starts the background monitoring thread"""
+        """Starts the response action worker, the ban list export (and the IPC drain in multi-worker mode)"""
         self.running = True
-        thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        thread.start()
+        self.actions.start()
+        if self.bans is not None:
+            self.bans.start()
+        if self._ipc_queue is not None:
+            threading.Thread(target=self._ipc_loop, daemon=True).start()
         logger.info("👁️ Sentinel AI (Automation) Started in Background")
 
     def log_threat(self, packet_data):
         """Called by app.py whenever a 'Malicious' packet is found"""
-        # Non-blocking: just add to queue and return
-        self.threat_buffer.append({
-            "time": time.time(),
-            "info": packet_data
-        })
-
-    def _monitor_loop(self):
-        """The brain that watches for patterns 24/7"""
+        self.log_threats([packet_data])
+
+    def log_threats(self, records, now=None):
+        """Batch form: one lock (or one IPC message) for a block of malicious records"""
+        if self._ipc_queue is not None and os.getpid() != self._owner_pid:
+            try:
+                self._ipc_queue.put_nowait(list(records))
+            except queue.Full:
+                pass # Sentinel is saturated; dropping is better than blocking requests
+            return
+        self._observe(records, time.time() if now is None else now)
+
+    def queue_depth(self):
+        """Alerts waiting for the action worker (+ forwarded threats not yet drained)"""
+        depth = self.actions.qsize()
+        if self._ipc_queue is not None:
+            try:
+                depth += self._ipc_queue.qsize()
+            except NotImplementedError: # macOS
+                pass
+        return depth
+
+    def metrics(self):
+        return {
+            "threats": self.threats,
+            "sources": len(self._sources),
+            "max_sources": self.max_sources,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru,
+            "alerts": dict(self.alerts),
+            "actions": {"queued": self.actions.qsize(), "dropped": self.actions.dropped,
+                        "batches": self.actions.batches, "delivered": self.actions.delivered,
+                        "failures": self.actions.failures}
+        }
+
+    def _ipc_loop(self):
+        """Drains threats forwarded by worker processes"""
         while self.running:
             try:
-                self._analyze_patterns()
-                time.sleep(2) # Check every 2 seconds
+                self._observe(self._ipc_queue.get(), time.time())
             except Exception as e:
-                logger.error(f"Sentinel Error: {e}")
-
-    def _analyze_patterns(self):
-        # 1. Clean old data (older than 10 seconds)
-        current_time = time.time()
-        recent_attacks = [x for x in self.threat_buffer if current_time - x['time'] < 10]
-        
-        # 2. Heuristic Logic (The "AI" Automation)
-        # If we see > 5 attacks in 10 seconds, it's a FLOOD Attack
-        if len(recent_attacks) > 5:
-            self._trigger_response("High Velocity Attack Detected (Potential DDoS)")
-            self.threat_buffer.clear() # Reset to avoid spamming alerts
-
-    def _trigger_response(self, threat_name):
-        """AUTOMATION ACTION: This is where you put your response logic"""
-        logger.warning(f"🚨 AUTOMATION TRIGGERED: {threat_name}")
-        
-        # Example Automations:
-        # 1. Write to a special 'Banned IPs' file for the Firewall
-        with open("banned_ips.log", "a") as f:
-            f.write(f"{time.ctime()} - BLOCK TRIGGERED BY SENTINEL\n")
-            
-        # 2. (Optional) Send Email / Discord Webhook
-        # requests.post("discord_webhook_url", json={"content": "Under Attack!"})
-        
-        print(f"\n[SENTINEL] 🛡️ countermeasures deployed against: {threat_name}\n")
+                logger.error(f"Sentinel IPC Error: {e}")
+
+    def _observe(self, records, now):
+        epoch = int(now / self.width)
+        alerts = []
+        with self._lock:
+            self._evict_idle(now)
+            sources = self._sources
+            for record in records:
+                source = record.get("src_ip") or "unknown"
+                state = sources.get(source)
+                if state is None:
+                    if len(sources) >= self.max_sources:
+                        sources.popitem(last=False)
+                        self.evicted_lru += 1
+                    state = sources[source] = SourceState(self.buckets, self.columns, epoch, now)
+                else:
+                    sources.move_to_end(source)
+                    state.advance(epoch, self.buckets, self.columns)
+                    state.last_seen = now
+
+                for rule in self.rules:
+                    value = rule.update(self, state, record)
+                    if value is not None and state.cooldowns.get(rule.name, 0) <= now:
+                        state.cooldowns[rule.name] = now + self.cooldown
+                        self.alerts[rule.name] += 1
+                        alerts.append({"time": now, "source": source, "rule": rule.name,
+                                       "value": value, "message": rule.message})
+            self.threats += len(records)
+
+        for alert in alerts:
+            self._trigger_response(alert)
+
+    def _evict_idle(self, now):
+        horizon = now - self.idle_timeout
+        sources = self._sources
+        while sources:
+            state = next(iter(sources.values()))
+            if state.last_seen >= horizon:
+                break
+            sources.popitem(last=False)
+            self.evicted_idle += 1
+
+    def _trigger_response(self, alert):
+        """AUTOMATION ACTION: queued, logging and the actions (ban log, webhook) run on their own thread"""
+        self.actions.put(alert)
 
 # Global Instance
-sentinel = SentinelAI()
\ No newline at end of file
+sentinel = SentinelAI()
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+class SequenceBuffer:
+    """
+    Per-key history of the last `window` scaled feature vectors for the
+    sequence LSTM, in ONE preallocated array (no per-key allocations).
+
+    Each key owns a slot of 2 * window rows and every vector is written twice
+    (at p and p + window), so the latest window is always the contiguous slice
+    data[slot, p + 1 : p + 1 + window] - no modulo gather, no rebuilding.
+    A new key starts with its first vector repeated (edge padding, like the
+    training windows).
+
+    Memory is capped by `max_bytes`. Keys are evicted after `idle_timeout`
+    seconds without traffic, or least-recently-seen first when all slots are in use.
+    """
+
+    def __init__(self, window, num_features=8, max_bytes=64 * 1024 * 1024, idle_timeout=300.0):
+        self.window = window
+        self.num_features = num_features
+        self.idle_timeout = idle_timeout
+        slot_bytes = 2 * window * num_features * np.dtype(np.float32).itemsize
+        self.max_keys = max(1, int(max_bytes // slot_bytes))
+
+        self._data = np.zeros((self.max_keys, 2 * window, num_features), dtype=np.float32)
+        self._pos = np.zeros(self.max_keys, dtype=np.int64) # Newest row of each slot, in [0, window)
+        self._keys = OrderedDict() # key -> [slot, last_seen], least recently seen first
+        self._free = list(range(self.max_keys - 1, -1, -1))
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def push(self, keys, rows, want=None, now=None):
+        """
+        Appends rows[i] to the history of keys[i] (in order) and returns the
+        windows ending at the rows selected by the boolean mask `want`
+        (all rows if None) as a (k, window, num_features) float32 array.
+        """
+        now = time.monotonic() if now is None else now
+        rows = np.asarray(rows, dtype=np.float32)
+        want = np.ones(len(rows), dtype=bool) if want is None else np.asarray(want, dtype=bool)
+        out = np.empty((int(np.count_nonzero(want)), self.window, self.num_features), dtype=np.float32)
+        data, pos, entries, w = self._data, self._pos, self._keys, self.window
+
+        with self._lock:
+            self._evict_idle(now)
+            j = 0
+            for key, row, needed in zip(keys, rows, want.tolist()):
+                entry = entries.get(key)
+                if entry is None:
+                    slot = self._allocate()
+                    data[slot] = row # Edge padding
+                    pos[slot] = p = 0
+                    entries[key] = [slot, now]
+                else:
+                    slot = entry[0]
+                    entry[1] = now
+                    entries.move_to_end(key)
+                    p = pos[slot] = (pos[slot] + 1) % w
+                    data[slot, p] = row
+                    data[slot, p + w] = row
+                if needed:
+                    out[j] = data[slot, p + 1:p + 1 + w]
+                    j += 1
+        return out
+
+    def _allocate(self):
+        if not self._free:
+            _, (slot, _) = self._keys.popitem(last=False)
+            self.evicted_lru += 1
+            return slot
+        return self._free.pop()
+
+    def _evict_idle(self, now):
+        horizon = now - self.idle_timeout
+        entries = self._keys
+        while entries:
+            key, (slot, last_seen) = next(iter(entries.items()))
+            if last_seen >= horizon:
+                break
+            del entries[key]
+            self._free.append(slot)
+            self.evicted_idle += 1
+
+    def metrics(self):
+        return {
+            "window": self.window,
+            "keys": len(self._keys),
+            "max_keys": self.max_keys,
+            "memory_bytes": self._data.nbytes,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru
+        }
@@ -0,0 +1,142 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import weakref
+import numpy as np
+from multiprocessing import shared_memory
+
+class ShardedCounters:
+    """
+    Named int64 counters with one shard (row) per writer thread.
+
+    - add() only touches the calling thread's own row -> no lock on the hot path.
+    - snapshot() sums every row (aggregate on read).
+    - shared=True puts the matrix in multiprocessing.shared_memory. Created in
+      the parent before forking (gunicorn preload), every worker writes into
+      its own rows of the same block, so reads give exact cluster-wide totals.
+
+    Row 1 holds the totals of threads that have exited, so their shard can be
+    reused (the dev server starts one thread per connection). Row 0 is a header.
+    """
+
+    def __init__(self, names, max_shards=256, shared=False):
+        self.names = list(names)
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self.max_shards = max_shards
+        self.shared = shared
+
+        # Header row (next unclaimed shard) + retired row + one row per shard
+        shape = (max_shards + 2, len(self.names))
+        nbytes = int(np.prod(shape)) * 8
+        if shared:
+            self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._matrix = np.ndarray(shape, dtype=np.int64, buffer=self._shm.buf)
+            self._matrix[:] = 0
+            self._creator_pid = os.getpid()
+            atexit.register(self._release)
+        else:
+            self._shm = None
+            self._matrix = np.zeros(shape, dtype=np.int64)
+
+        self._header = self._matrix[0]   # [0] = next shard never handed out
+        self._retired = self._matrix[1]  # totals of exited threads
+        self._header[0] = 2
+        self._lock = multiprocessing.Lock() if shared else threading.Lock()
+
+        self._local = threading.local()
+        self._free = [] # Shards released by this process' dead threads
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    # --- HOT PATH ---
+    def add(self, name, n=1):
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._claim()
+        if row is self._retired:
+            # Out of shards: fall back to the locked shared row
+            with self._lock:
+                row[self._index[name]] += n
+            return
+        row[self._index[name]] += n
+
+    # --- READ PATH ---
+    def snapshot(self):
+        with self._lock:
+            totals = self._matrix[1:int(self._header[0])].sum(axis=0)
+        return {name: int(totals[i]) for name, i in self._index.items()}
+
+    # --- SHARD MANAGEMENT ---
+    def _claim(self):
+        with self._lock:
+            if self._free:
+                shard = self._free.pop()
+            elif self._header[0] < len(self._matrix):
+                shard = int(self._header[0])
+                self._header[0] += 1
+            else:
+                shard = 1 # Exhausted: share the retired row (locked)
+        row = self._retired if shard == 1 else self._matrix[shard]
+        self._local.row = row
+        if shard != 1:
+            # Fires when this thread's locals are destroyed (thread exit)
+            self._local.token = _ShardToken()
+            weakref.finalize(self._local.token, self._retire, shard, os.getpid())
+        return row
+
+    def _retire(self, shard, pid):
+        if pid != os.getpid():
+            return # Inherited across fork: the shard belongs to the parent
+        with self._lock:
+            self._retired += self._matrix[shard]
+            self._matrix[shard] = 0
+            self._free.append(shard)
+
+    def _after_fork(self):
+        # The forking thread's shard and free list belong to the parent
+        self._local = threading.local()
+        self._free = []
+
+    def _release(self):
+        if self._shm is not None and os.getpid() == self._creator_pid:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+class _ShardToken:
+    """Weak-referenceable marker whose lifetime tracks a thread's locals"""
+
+class RecentLog:
+    """
+    Fixed-size ring buffer of the most recent log entries.
+    Claiming a sequence number, storing the slot and publishing `last_seq`
+    happen under one short lock, so every entry up to `last_seq` is in place
+    when a reader (the SSE broadcaster) uses it as its delta cursor.
+    """
+
+    def __init__(self, size=20):
+        self.size = size
+        self._slots = [None] * size
+        self._lock = threading.Lock()
+        self.last_seq = -1
+
+    def append(self, entry):
+        with self._lock:
+            seq = self.last_seq + 1
+            self._slots[seq % self.size] = (seq, entry)
+            self.last_seq = seq
+        return seq
+
+    def extend(self, entries):
+        with self._lock:
+            for entry in entries:
+                seq = self.last_seq + 1
+                self._slots[seq % self.size] = (seq, entry)
+                self.last_seq = seq
+
+    def snapshot(self, since=-1, until=None):
+        """Entries newest-first, optionally only those with since < seq <= until"""
+        until = float("inf") if until is None else until
+        items = [slot for slot in self._slots if slot is not None and since < slot[0] <= until]
+        items.sort(key=lambda item: item[0], reverse=True)
+        return [entry for _, entry in items]
@@ -0,0 +1,178 @@
+"""
+Binary streaming ingestion for high-rate sniffers.
+
+Wire protocol (all integers little-endian):
+
+  Handshake (once per connection)
+    client -> u16 key_len, key bytes, u8 float_width (4 = float32, 8 = float64)
+    server -> u8 status (1 = accepted, 0 = rejected and closed)
+
+  Frames (repeated)
+    client -> u32 n_records, then n_records x RECORD
+              RECORD = u64 id + 8 x float (order of FEATURE_COLS in app.py)
+    server -> u32 n_records, then n_records x VERDICT
+              VERDICT = u64 id + u8 status (1 = Malicious) + u8 source + f32 confidence
+                        source: code in pipeline.SOURCE_NAMES (0 = Clustering, 1 = Deep Learning, ...)
+
+Frames are decoded with np.frombuffer in one go and analyzed in chunks,
+so there is no per-record JSON parsing or HTTP overhead.
+"""
+import hmac
+import os
+import socket
+import socketserver
+import struct
+import threading
+import numpy as np
+from src.utils.logger import setup_logger
+
+logger = setup_logger("stream_server")
+
+NUM_FEATURES = 8
+HANDSHAKE_OK = b"\x01"
+HANDSHAKE_REJECTED = b"\x00"
+
+RECORD_DTYPES = {
+    4: np.dtype([("id", "<u8"), ("features", "<f4", NUM_FEATURES)]),
+    8: np.dtype([("id", "<u8"), ("features", "<f8", NUM_FEATURES)]),
+}
+VERDICT_DTYPE = np.dtype([("id", "<u8"), ("status", "u1"), ("source", "u1"), ("confidence", "<f4")])
+
+def _recv_exact(sock, n):
+    """Reads exactly n bytes, or returns None if the peer closed the stream"""
+    buf = bytearray(n)
+    view = memoryview(buf)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:], n - received)
+        if count == 0:
+            return None
+        received += count
+    return buf
+
+class StreamHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        sock = self.request
+        peer = self.client_address or "unix-socket"
+
+        # 1. Authenticate once per connection
+        header = _recv_exact(sock, 2)
+        if header is None:
+            return
+        (key_len,) = struct.unpack("<H", header)
+        payload = _recv_exact(sock, key_len + 1)
+        if payload is None:
+            return
+        key, width = bytes(payload[:key_len]), payload[key_len]
+        if not hmac.compare_digest(key, server.api_key.encode()) or width not in RECORD_DTYPES:
+            logger.warning(f"Unauthorized stream connection from {peer}")
+            sock.sendall(HANDSHAKE_REJECTED)
+            return
+        sock.sendall(HANDSHAKE_OK)
+        record_dtype = RECORD_DTYPES[width]
+
+        # 2. Frame loop
+        while True:
+            header = _recv_exact(sock, 4)
+            if header is None:
+                return
+            (n_records,) = struct.unpack("<I", header)
+            if n_records > server.max_frame_records:
+                logger.warning(f"Stream frame too large ({n_records} records) from {peer}")
+                return
+            body = _recv_exact(sock, n_records * record_dtype.itemsize)
+            if body is None:
+                return
+
+            records = np.frombuffer(body, dtype=record_dtype)
+            try:
+                verdicts = server.analyze_records(records)
+            except Exception as e:
+                logger.error(f"Stream Analysis Error ({peer}): {e}")
+                return
+            sock.sendall(struct.pack("<I", len(verdicts)) + verdicts.tobytes())
+
+class _StreamServerMixin:
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def setup_pipeline(self, analyze_fn, api_key, chunk_size, max_frame_records):
+        self.analyze_fn = analyze_fn # (ids, X) -> (malicious, confidence, source)
+        self.api_key = api_key
+        self.chunk_size = chunk_size
+        self.max_frame_records = max_frame_records
+
+    def analyze_records(self, records):
+        verdicts = np.empty(len(records), dtype=VERDICT_DTYPE)
+        verdicts["id"] = records["id"]
+        for start in range(0, len(records), self.chunk_size):
+            chunk = records[start:start + self.chunk_size]
+            X = chunk["features"].astype(np.float64)
+            malicious, confidence, source = self.analyze_fn(chunk["id"], X)
+            out = verdicts[start:start + self.chunk_size]
+            out["status"] = malicious
+            out["source"] = source
+            out["confidence"] = confidence
+        return verdicts
+
+class TCPStreamServer(_StreamServerMixin, socketserver.ThreadingTCPServer):
+    pass
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class UnixStreamServer(_StreamServerMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+
+def start_stream_server(address, analyze_fn, api_key, chunk_size=4096, max_frame_records=1_000_000):
+    """
+    address: "tcp://host:port" or "unix:///path/to/socket".
+    Serves in a daemon thread and returns the server object.
+    """
+    if address.startswith("unix://"):
+        path = address[len("unix://"):]
+        if os.path.exists(path):
+            os.unlink(path) # Stale socket from a previous run
+        server = UnixStreamServer(path, StreamHandler)
+    elif address.startswith("tcp://"):
+        host, port = address[len("tcp://"):].rsplit(":", 1)
+        server = TCPStreamServer((host, int(port)), StreamHandler)
+        server.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    else:
+        raise ValueError(f"Unsupported stream address: {address}")
+
+    server.setup_pipeline(analyze_fn, api_key, chunk_size, max_frame_records)
+    threading.Thread(target=server.serve_forever, name="stream-server", daemon=True).start()
+    logger.info(f"📡 Stream ingestion listening on {address}")
+    return server
+
+class StreamClient:
+    """Reference client (Python) for the binary protocol, used by tests/benchmarks"""
+
+    def __init__(self, address, api_key, float_width=4):
+        if address.startswith("unix://"):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address[len("unix://"):])
+        else:
+            host, port = address[len("tcp://"):].rsplit(":", 1)
+            self.sock = socket.create_connection((host, int(port)))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.record_dtype = RECORD_DTYPES[float_width]
+
+        key = api_key.encode()
+        self.sock.sendall(struct.pack("<H", len(key)) + key + bytes([float_width]))
+        if _recv_exact(self.sock, 1) != HANDSHAKE_OK:
+            self.sock.close()
+            raise PermissionError("Stream handshake rejected")
+
+    def analyze(self, ids, X):
+        """Sends one frame and returns the structured verdict array"""
+        records = np.empty(len(ids), dtype=self.record_dtype)
+        records["id"] = ids
+        records["features"] = X
+        self.sock.sendall(struct.pack("<I", len(records)) + records.tobytes())
+
+        (n,) = struct.unpack("<I", _recv_exact(self.sock, 4))
+        return np.frombuffer(_recv_exact(self.sock, n * VERDICT_DTYPE.itemsize), dtype=VERDICT_DTYPE)
+
+    def close(self):
+        self.sock.close()
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+class VerdictCache:
+    """
+    Bounded LRU + TTL cache of gate verdicts keyed on the 8-feature vector.
+
+    - quantum: 0 = exact match, a float = same step for every feature, or a
+      list of 8 steps. Features are rounded to that grid before hashing so
+      "almost identical" records share an entry.
+    - generation: the model registry version the entries were computed with.
+      A different generation clears the cache (models were reloaded).
+    """
+
+    def __init__(self, max_size=100000, ttl=60.0, quantum=0.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.quantum = np.asarray(quantum, dtype=np.float64)
+        self.quantized = bool(np.any(self.quantum > 0))
+        if self.quantized:
+            # A zero step for a feature means "exact" for that feature
+            self._step = np.where(self.quantum > 0, self.quantum, 1.0)
+            self._exact = self.quantum <= 0
+
+        self._entries = OrderedDict() # key -> (expires_at, malicious, confidence, deep)
+        self._lock = threading.Lock()
+        self._generation = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def keys(self, X):
+        """One hashable bytes key per row of X"""
+        X = np.asarray(X, dtype=np.float64)
+        if self.quantized:
+            X = np.where(self._exact, X, np.round(X / self._step))
+        X = np.ascontiguousarray(X + 0.0) # + 0.0 turns -0.0 into 0.0 (same bytes)
+        return X.view(np.dtype((np.void, X.shape[1] * X.itemsize))).ravel().tolist()
+
+    def lookup(self, keys, generation):
+        """Returns (hit mask, malicious, confidence, deep) arrays; misses are zero-filled"""
+        n = len(keys)
+        hit = np.zeros(n, dtype=bool)
+        malicious = np.zeros(n, dtype=bool)
+        confidence = np.zeros(n, dtype=np.float64)
+        deep = np.zeros(n, dtype=bool)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_generation(generation)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if self.ttl and entry[0] < now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(key)
+                hit[i] = True
+                _, malicious[i], confidence[i], deep[i] = entry
+
+            n_hits = int(np.count_nonzero(hit))
+            self.hits += n_hits
+            self.misses += n - n_hits
+        return hit, malicious, confidence, deep
+
+    def store(self, keys, malicious, confidence, deep, generation):
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        rows = zip(keys, malicious.tolist(), confidence.tolist(), deep.tolist())
+
+        with self._lock:
+            self._check_generation(generation)
+            for key, m, c, d in rows:
+                self._entries[key] = (expires_at, m, c, d)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def _check_generation(self, generation):
+        # Caller holds the lock
+        if generation != self._generation:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._generation = generation
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import sys
+import numpy as np
+
+# Define paths
+MODEL_DIR = os.path.dirname(__file__)
+KERAS_PATH = os.path.join(MODEL_DIR, 'guardnet_lstm.keras')
+NPZ_PATH = os.path.join(MODEL_DIR, 'guardnet_lstm.npz')
+
+def _sigmoid(x):
+    # tanh form never overflows, unlike 1 / (1 + exp(-x))
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+}
+
+def file_digest(path):
+    """sha256 of a model file, used to detect a stale .npz export"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def export_lstm_weights(keras_path=KERAS_PATH, npz_path=NPZ_PATH):
+    """
+    Pulls the weights out of a trained Keras model into a compact .npz file
+    that NumpyLSTM can run without TensorFlow.
+    - Dropout layers are dropped (identity at inference time).
+    - BatchNormalization is folded into the Dense layer that follows it.
+    """
+    import tensorflow as tf # Only the export step needs TensorFlow
+
+    model = tf.keras.models.load_model(keras_path)
+    arrays = {}
+    kinds, activations = [], []
+    pending_bn = None # (scale, shift) waiting to be folded into the next Dense
+
+    for layer in model.layers:
+        name = type(layer).__name__
+        config = layer.get_config()
+        i = len(kinds)
+
+        if name == "Dropout":
+            continue
+
+        if name == "LSTM":
+            if config.get("activation") != "tanh" or config.get("recurrent_activation") != "sigmoid":
+                raise ValueError(f"Unsupported LSTM activations in layer '{layer.name}'")
+            kernel, recurrent, bias = layer.get_weights()
+            arrays[f"{i}_kernel"] = kernel
+            arrays[f"{i}_recurrent"] = recurrent
+            arrays[f"{i}_bias"] = bias
+            kinds.append("lstm_seq" if config.get("return_sequences") else "lstm")
+            activations.append("tanh")
+
+        elif name == "Dense":
+            kernel, bias = layer.get_weights()
+            if pending_bn is not None:
+                # W·(a*x + c) + b == (a[:, None] * W)·x + (c·W + b)
+                scale, shift = pending_bn
+                bias = shift @ kernel + bias
+                kernel = scale[:, None] * kernel
+                pending_bn = None
+            arrays[f"{i}_kernel"] = kernel
+            arrays[f"{i}_bias"] = bias
+            kinds.append("dense")
+            activations.append(config.get("activation", "linear"))
+
+        elif name == "BatchNormalization":
+            gamma, beta, mean, var = layer.get_weights()
+            scale = gamma / np.sqrt(var + config["epsilon"])
+            pending_bn = (scale, beta - mean * scale)
+
+        else:
+            raise ValueError(f"Unsupported layer type for NumPy export: {name}")
+
+    if pending_bn is not None:
+        raise ValueError("BatchNormalization must be followed by a Dense layer to be folded")
+
+    np.savez(
+        npz_path,
+        kinds=np.array(kinds),
+        activations=np.array(activations),
+        input_shape=np.array(model.input_shape[1:]),
+        source_digest=np.array(file_digest(keras_path)),
+        **{k: v.astype(np.float32) for k, v in arrays.items()}
+    )
+    print(f"Exported {len(kinds)} layers to {npz_path}")
+    return npz_path
+
+class NumpyLSTM:
+    """
+    TensorFlow-free forward pass for the GuardNet LSTM.
+    Accepts a single record (8,), a batch (N, 8), or sequences (N, T, 8)
+    and returns (N,) attack probabilities, like model.predict(...)[:, 0].
+    """
+
+    def __init__(self, layers, input_shape, dtype=np.float32, source_digest=None):
+        self.layers = layers # list of (kind, activation, weights dict)
+        self.input_shape = tuple(int(d) for d in input_shape) # (time_steps, features)
+        self.dtype = dtype
+        self.source_digest = source_digest # sha256 of the .keras file it came from
+
+    @classmethod
+    def load(cls, npz_path=NPZ_PATH, dtype=np.float32):
+        with np.load(npz_path) as data:
+            layers = []
+            for i, (kind, act) in enumerate(zip(data["kinds"], data["activations"])):
+                weights = {
+                    key.split("_", 1)[1]: np.ascontiguousarray(data[key], dtype=dtype)
+                    for key in data.files if key.startswith(f"{i}_")
+                }
+                layers.append((str(kind), str(act), weights))
+            digest = str(data["source_digest"]) if "source_digest" in data.files else None
+            return cls(layers, data["input_shape"], dtype=dtype, source_digest=digest)
+
+    def predict(self, X):
+        x = np.asarray(X, dtype=self.dtype)
+        if x.ndim == 1:
+            x = x[None, None, :]
+        elif x.ndim == 2:
+            x = x[:, None, :]
+
+        for kind, act, w in self.layers:
+            if kind.startswith("lstm"):
+                x = self._lstm(x, w, return_sequences=(kind == "lstm_seq"))
+            else:
+                x = ACTIVATIONS[act](x @ w["kernel"] + w["bias"])
+        return x.reshape(len(x), -1)[:, 0]
+
+    @staticmethod
+    def _lstm(x, w, return_sequences):
+        kernel, recurrent, bias = w["kernel"], w["recurrent"], w["bias"]
+        units = recurrent.shape[0]
+        # Input projection for every time step in one matmul
+        z_all = x @ kernel + bias
+        h = c = None
+        outputs = []
+
+        for t in range(x.shape[1]):
+            z = z_all[:, t, :]
+            if h is None:
+                # First step: h0 = c0 = 0, so skip the recurrent matmul and forget gate
+                i = _sigmoid(z[:, :units])
+                g = np.tanh(z[:, 2 * units:3 * units])
+                c = i * g
+            else:
+                z = z + h @ recurrent
+                i = _sigmoid(z[:, :units])
+                f = _sigmoid(z[:, units:2 * units])
+                g = np.tanh(z[:, 2 * units:3 * units])
+                c = f * c + i * g
+            o = _sigmoid(z[:, 3 * units:])
+            h = o * np.tanh(c)
+            if return_sequences:
+                outputs.append(h)
+
+        return np.stack(outputs, axis=1) if return_sequences else h
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else KERAS_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else NPZ_PATH
+    export_lstm_weights(src, dst)
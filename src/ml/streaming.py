@@ -0,0 +1,92 @@
+"""
+Out-of-core training helpers, used by `--streaming` in train_model.py and
+train_clustering.py. Everything works on fixed-size batches read from the
+memory-mapped dataset (src/core/dataset.py), so memory is bounded by the
+batch size and not by the dataset size.
+"""
+import queue
+import threading
+import time
+import numpy as np
+
+BATCH_SIZE = 8192 # Malicious rows per batch (plus as many synthetic normals)
+
+# Synthetic "Heavy Usage" normal traffic, column -> [low, high)
+# (same distributions as the in-memory pipelines)
+LSTM_NORMALS = {'duration': (1.0, 60.0), 'src_bytes': (2000, 50000), 'dst_bytes': (2000, 50000),
+                'count': (5, 50), 'srv_count': (5, 50)}
+KMEANS_NORMALS = {'duration': (5.0, 60.0), 'src_bytes': (5000, 50000), 'dst_bytes': (5000, 50000),
+                  'count': (10, 50), 'srv_count': (10, 50)}
+
+def synthetic_normals(n, rng, profile):
+    """(n, 8) float32 normal-traffic rows in FEATURE_COLS order"""
+    X = np.zeros((n, 8), dtype=np.float32)
+    X[:, 0] = rng.uniform(*profile['duration'], n)
+    X[:, 1] = 1 # TCP
+    X[:, 2] = rng.choice([80, 443], n) # HTTP/HTTPS
+    # flag stays 0
+    for i, col in ((4, 'src_bytes'), (5, 'dst_bytes'), (6, 'count'), (7, 'srv_count')):
+        X[:, i] = rng.integers(*profile[col], n)
+    return X
+
+def mixed_batches(dataset, profile, batch_size=BATCH_SIZE, seed=42):
+    """
+    Yields (X, y): one dataset batch (label 1) followed by the same number of
+    synthetic normals (label 0). Deterministic for a given seed, so several
+    passes (scaler, then model) see the same data.
+    """
+    rng = np.random.default_rng(seed)
+    for X, _ in dataset.iter_batches(batch_size):
+        n = len(X)
+        X = np.concatenate([np.asarray(X, dtype=np.float32), synthetic_normals(n, rng, profile)])
+        y = np.concatenate([np.ones(n, dtype=np.float32), np.zeros(n, dtype=np.float32)])
+        yield X, y
+
+def prefetched(iterable, depth=2):
+    """Produces items in a background thread, `depth` ahead of the consumer"""
+    items = queue.Queue(maxsize=depth)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put(item)
+        except BaseException as e:
+            items.put(e)
+        items.put(done)
+
+    threading.Thread(target=produce, name="prefetch", daemon=True).start()
+    while True:
+        item = items.get()
+        if item is done:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+def fit_scaler(scaler, batches):
+    """Incremental fit (StandardScaler or DataPreprocessor .partial_fit), returns the row count"""
+    meter = Throughput("scaler")
+    for X, _ in batches:
+        scaler.partial_fit(X)
+        meter.add(len(X))
+    meter.report()
+    return meter.samples
+
+class Throughput:
+    """Counts samples and prints samples/sec"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.samples = 0
+        self.start = time.perf_counter()
+
+    def add(self, n):
+        self.samples += n
+
+    @property
+    def rate(self):
+        return self.samples / max(time.perf_counter() - self.start, 1e-9)
+
+    def report(self):
+        print(f"⏱️ {self.stage}: {self.samples} samples, {self.rate:,.0f} samples/sec")
@@ -1,13 +1,16 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import joblib
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
+from src.core.dataset import open_training_dataset
+from src.ml.streaming import (BATCH_SIZE, KMEANS_NORMALS, Throughput, fit_scaler,
+                              mixed_batches, prefetched)
 
 # Define Paths
 BASE_DIR = os.getcwd()
-DATA_PATH = os.path.join(BASE_DIR, 'data/training_data.csv')
 MODEL_PATH = os.path.join(BASE_DIR, 'src/ml/kmeans_model.joblib')
 SCALER_PATH = os.path.join(BASE_DIR, 'src/ml/kmeans_scaler.joblib')
 
@@ -15,23 +18,17 @@ def train_kmeans():
     print("--- Starting K-Means Clustering ---")
 
     # 1. Load Real Malware Data (Tiny Packets)
-    if os.path.exists(DATA_PATH):
-        df_malware = pd.read_csv(DATA_PATH)
-        print(f"Loaded {len(df_malware)} Malware samples.")
-    else:
+    # (Memory-mapped .npy chunks, see src/core/dataset.py; no CSV parsing)
+    dataset = open_training_dataset()
+    if dataset is None or not len(dataset):
         print("Error: No data found.")
         return
 
     # Select features (Focusing on the ones you noticed: Size & Service)
     # We use all numeric features to be safe
-    feature_cols = ['duration', 'protocol_type', 'service', 'flag', 
-                    'src_bytes', 'dst_bytes', 'count', 'srv_count']
-    
-    # Ensure columns exist
-    for col in feature_cols:
-        if col not in df_malware.columns: df_malware[col] = 0
-            
-    X_malware = df_malware[feature_cols].values
+    feature_cols = dataset.columns
+    X_malware, _ = dataset.load()
+    print(f"Loaded {len(X_malware)} Malware samples.")
 
     # 2. Generate Normal Data (Heavy Traffic)
     # This acts as the "Other" cluster
@@ -61,6 +58,35 @@ def train_kmeans():
     kmeans = KMeans(n_clusters=2, random_state=42, n_init=10)
     kmeans.fit(X_scaled)
     
+    _analyze_and_save(kmeans, scaler)
+
+def train_kmeans_streaming(batch_size=BATCH_SIZE):
+    """
+    Out-of-core variant: StandardScaler.partial_fit, then MiniBatchKMeans.partial_fit,
+    one batch at a time. Memory is bounded by `batch_size`, not the dataset size.
+    """
+    print("--- Starting K-Means Clustering (streaming) ---")
+    dataset = open_training_dataset()
+    if dataset is None or not len(dataset):
+        print("Error: No data found.")
+        return
+    print(f"Streaming {len(dataset)} Malware samples + as many synthetic Normal samples...")
+
+    # Pass 1: scaler
+    scaler = StandardScaler()
+    fit_scaler(scaler, prefetched(mixed_batches(dataset, KMEANS_NORMALS, batch_size)))
+
+    # Pass 2: clusters (batches are built in a background thread while fitting)
+    kmeans = MiniBatchKMeans(n_clusters=2, random_state=42, batch_size=2 * batch_size, n_init=3)
+    meter = Throughput("kmeans")
+    for X, _ in prefetched(mixed_batches(dataset, KMEANS_NORMALS, batch_size)):
+        kmeans.partial_fit(scaler.transform(X))
+        meter.add(len(X))
+    meter.report()
+
+    _analyze_and_save(kmeans, scaler)
+
+def _analyze_and_save(kmeans, scaler):
     # 6. Analyze Clusters
     centers = scaler.inverse_transform(kmeans.cluster_centers_)
     
@@ -82,4 +108,7 @@ def train_kmeans():
     print(f"\nK-Means Model saved to {MODEL_PATH}")
 
 if __name__ == "__main__":
-    train_kmeans()
\ No newline at end of file
+    if "--streaming" in sys.argv:
+        train_kmeans_streaming()
+    else:
+        train_kmeans()
@@ -1,9 +1,16 @@
 import os
+import sys
+import time
 import numpy as np
 import joblib
+import tensorflow as tf
 from sklearn.datasets import make_classification
 from src.ml.dl_model import build_lstm_model
+from src.ml.numpy_lstm import NPZ_PATH, export_lstm_weights
 from src.core.preprocessor import DataPreprocessor
+from src.core.dataset import open_training_dataset
+from src.ml.streaming import (BATCH_SIZE, LSTM_NORMALS, fit_scaler, mixed_batches,
+                              prefetched, synthetic_normals)
 import pandas as pd # Ensure pandas is imported
 
 # Define paths
@@ -11,26 +18,37 @@ MODEL_DIR = os.path.dirname(__file__)
 MODEL_PATH = os.path.join(MODEL_DIR, 'guardnet_lstm.keras') # Keras format
 SCALER_PATH = os.path.join(MODEL_DIR, 'scaler.joblib')
 
+# Sequence mode: LSTM input = the last N flows (1 = one flow per prediction).
+# Stored in scaler.joblib, the server switches to per-key windows automatically.
+SEQUENCE_LENGTH = int(os.environ.get("GUARDNET_SEQUENCE_LENGTH", 1))
+
+# Streaming mode
+TRAIN_BATCH_SIZE = 32 # Keras batch size (same as the in-memory pipeline)
+EPOCHS = 5
+VALIDATION_EVERY = 5 # Every 5th dataset batch is held out (~validation_split=0.2)
+
+def save_artifacts(model, preprocessor):
+    """
+    .keras, then its NumPy export, then the scaler: the server only pairs a
+    scaler with an .npz exported from the same model (see ModelRegistry),
+    and the scaler written last triggers the hot reload of the complete set.
+    """
+    model.save(MODEL_PATH)
+    export_lstm_weights(MODEL_PATH, NPZ_PATH)
+    joblib.dump(preprocessor, SCALER_PATH)
+    print(f"LSTM Model saved to {MODEL_PATH}")
+    print(f"Scaler saved to {SCALER_PATH}")
+
 def train_lstm_pipeline():
     print("Initializing Deep Learning Pipeline...")
     
-    CSV_PATH = os.path.join(os.getcwd(), 'data', 'training_data.csv')
-
-    # 1. Load Real Data (Malicious)
-    if os.path.exists(CSV_PATH):
-        print(f"Loading Malicious data from {CSV_PATH}...")
-        df_malicious = pd.read_csv(CSV_PATH)
+    # 1. Load Real Data (Malicious) from the columnar dataset (src/core/dataset.py)
+    dataset = open_training_dataset()
+    if dataset is not None and len(dataset):
+        print(f"Loading Malicious data from {dataset.path}...")
         # Select features
-        feature_cols = ['duration', 'protocol_type', 'service', 'flag', 
-                        'src_bytes', 'dst_bytes', 'count', 'srv_count']
-        
-        # Fill missing
-        for col in feature_cols:
-            if col not in df_malicious.columns: df_malicious[col] = 0
-        
-        # ... (Load df_malicious as before) ...
-        
-        X_malicious = df_malicious[feature_cols].values
+        feature_cols = dataset.columns
+        X_malicious, _ = dataset.load()
         y_malicious = np.ones(len(X_malicious)) # Label = 1 (Attack)
 
         # --- CORRECTED LOGIC: Normal = Heavy Traffic ---
@@ -60,9 +78,10 @@ def train_lstm_pipeline():
         X = np.concatenate((X_malicious, X_normal), axis=0)
         y = np.concatenate((y_malicious, y_normal), axis=0)
         
-        # Shuffle
-        from sklearn.utils import shuffle
-        X, y = shuffle(X, y, random_state=42)
+        # Shuffle (sequence mode keeps the time order and shuffles windows instead)
+        if SEQUENCE_LENGTH == 1:
+            from sklearn.utils import shuffle
+            X, y = shuffle(X, y, random_state=42)
 
         
     else:
@@ -71,8 +90,11 @@ def train_lstm_pipeline():
 
     
     # 2. Preprocess (Scale & Reshape)
-    preprocessor = DataPreprocessor()
+    preprocessor = DataPreprocessor(SEQUENCE_LENGTH)
     preprocessor.fit(X)
+    if SEQUENCE_LENGTH > 1:
+        train_sequences(preprocessor, X, y)
+        return
     X_processed = preprocessor.transform(X) # Returns (1000, 1, 8)
     
     print(f"Data Shape: {X_processed.shape}") # Should be (1000, 1, 8)
@@ -86,11 +108,137 @@ def train_lstm_pipeline():
     model.fit(X_processed, y, epochs=5, batch_size=32, validation_split=0.2)
 
     # 5. Save Artifacts
-    model.save(MODEL_PATH)
-    joblib.dump(preprocessor, SCALER_PATH)
-    
-    print(f"LSTM Model saved to {MODEL_PATH}")
-    print(f"Scaler saved to {SCALER_PATH}")
+    save_artifacts(model, preprocessor)
+
+class WindowBatches(tf.keras.utils.PyDataset):
+    """Keras batches gathered from a strided window view (one batch is copied at a time)"""
+
+    def __init__(self, windows, index, y, batch_size=TRAIN_BATCH_SIZE, seed=42):
+        super().__init__()
+        self.windows, self.index, self.y = windows, index, y # index[i] = window of label y[i]
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.order = self.rng.permutation(len(index))
+
+    def __len__(self):
+        return -(-len(self.index) // self.batch_size)
+
+    def __getitem__(self, i):
+        batch = self.order[i * self.batch_size:(i + 1) * self.batch_size]
+        return self.windows[self.index[batch]], self.y[batch]
+
+    def on_epoch_end(self):
+        self.rng.shuffle(self.order)
+
+def train_sequences(preprocessor, X, y, epochs=EPOCHS):
+    """
+    Sequence mode: one window of SEQUENCE_LENGTH rows per row, built as a strided
+    view over the time-ordered data (malicious and normal rows never share a window).
+    """
+    windows, index = preprocessor.transform_sequences(X, groups=y)
+    rows = np.random.default_rng(42).permutation(len(X))
+    split = int(len(rows) * 0.8)
+    train = WindowBatches(windows, index[rows[:split]], y[rows[:split]])
+    validation = WindowBatches(windows, index[rows[split:]], y[rows[split:]])
+    print(f"Windows: {len(X)} x {windows.shape[1:]} (strided view, no copies)")
+
+    model = build_lstm_model(windows.shape[1:])
+    print("Starting LSTM Training...")
+    model.fit(train, validation_data=validation, epochs=epochs)
+
+    save_artifacts(model, preprocessor)
+
+def make_tf_dataset(dataset, preprocessor, validation=False, batch_size=BATCH_SIZE, seed=42):
+    """
+    tf.data pipeline over the on-disk chunks:
+    memory-mapped malicious batch -> synthetic normals generated in parallel
+    (map, num_parallel_calls) -> scale + windows -> shuffle -> Keras batches -> prefetch.
+    """
+    T = preprocessor.sequence_length
+    mean = preprocessor.scaler.mean_.astype(np.float32)
+    scale = preprocessor.scaler.scale_.astype(np.float32)
+
+    # Lazy memmap slices; nothing is read until a batch is consumed
+    batches = [X for i, (X, _) in enumerate(dataset.iter_batches(batch_size))
+               if (i % VALIDATION_EVERY == VALIDATION_EVERY - 1) == validation]
+    if not batches:
+        return None
+    epoch = [0]
+
+    def malicious():
+        # New batch order every epoch
+        order = np.random.default_rng([seed, epoch[0]]).permutation(len(batches))
+        epoch[0] += 1
+        for i in order:
+            yield int(i), np.asarray(batches[i], dtype=np.float32)
+
+    def normals(i, n):
+        return synthetic_normals(int(n), np.random.default_rng([seed, int(i)]), LSTM_NORMALS)
+
+    def windows(X):
+        """(n, 8) -> (n, T, 8): a window ending at every row, left-padded with the first row"""
+        if T == 1:
+            return tf.expand_dims(X, 1)
+        return tf.signal.frame(tf.concat([tf.repeat(X[:1], T - 1, axis=0), X], axis=0), T, 1, axis=0)
+
+    def mix(i, X):
+        n = tf.shape(X)[0]
+        X_normal = tf.numpy_function(normals, [i, n], tf.float32)
+        X_normal.set_shape(X.shape)
+        X = tf.concat([windows((X - mean) / scale), windows((X_normal - mean) / scale)], axis=0)
+        y = tf.concat([tf.ones([n]), tf.zeros([n])], axis=0)
+        order = tf.random.shuffle(tf.range(2 * n))
+        return tf.gather(X, order), tf.gather(y, order) # (rows, T, 8)
+
+    signature = (tf.TensorSpec((), tf.int64), tf.TensorSpec((None, 8), tf.float32))
+    return (tf.data.Dataset.from_generator(malicious, output_signature=signature)
+            .map(mix, num_parallel_calls=tf.data.AUTOTUNE, deterministic=False)
+            .unbatch()
+            .batch(TRAIN_BATCH_SIZE)
+            .prefetch(tf.data.AUTOTUNE))
+
+def train_lstm_streaming(batch_size=BATCH_SIZE, epochs=EPOCHS):
+    """
+    Out-of-core variant of train_lstm_pipeline: the scaler is fitted with
+    partial_fit and the LSTM is fed by a tf.data pipeline, so memory is bounded
+    by `batch_size` regardless of the dataset size.
+    """
+    print("Initializing Deep Learning Pipeline (streaming)...")
+    dataset = open_training_dataset()
+    if dataset is None or not len(dataset):
+        print("Error: No data found.")
+        return
+    print(f"Streaming {len(dataset)} Malicious samples + as many synthetic Normal samples...")
+
+    # 1. Scaler (one pass, incremental)
+    preprocessor = DataPreprocessor(SEQUENCE_LENGTH)
+    fit_scaler(preprocessor, prefetched(mixed_batches(dataset, LSTM_NORMALS, batch_size)))
+
+    # 2. Input pipelines
+    train = make_tf_dataset(dataset, preprocessor, False, batch_size)
+    validation = make_tf_dataset(dataset, preprocessor, True, batch_size)
+
+    class ThroughputCallback(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.samples, self.start = 0, time.perf_counter()
+
+        def on_train_batch_end(self, batch, logs=None):
+            self.samples += TRAIN_BATCH_SIZE
+
+        def on_epoch_end(self, epoch, logs=None):
+            rate = self.samples / (time.perf_counter() - self.start)
+            print(f"⏱️ epoch {epoch + 1}: ~{self.samples} samples, {rate:,.0f} samples/sec")
+
+    # 3. Build + Train
+    model = build_lstm_model((SEQUENCE_LENGTH, preprocessor.num_features))
+    print("Starting LSTM Training...")
+    model.fit(train, validation_data=validation, epochs=epochs, callbacks=[ThroughputCallback()])
+
+    # 4. Save Artifacts
+    save_artifacts(model, preprocessor)
 
 if __name__ == "__main__":
-    train_lstm_pipeline()
\ No newline at end of file
+    if "--streaming" in sys.argv:
+        train_lstm_streaming()
+    else:
+        train_lstm_pipeline()
\ No newline at end of file
@@ -1,16 +1,16 @@
 import os
 import numpy as np
-import pandas as pd
 import tensorflow as tf
 import joblib
 from sklearn.metrics import classification_report, confusion_matrix
 from src.core.preprocessor import DataPreprocessor
+from src.core.dataset import open_training_dataset
 
 # 1. Setup Paths
 BASE_DIR = os.getcwd()
 MODEL_PATH = os.path.join(BASE_DIR, 'src/ml/guardnet_lstm.keras')
 SCALER_PATH = os.path.join(BASE_DIR, 'src/ml/scaler.joblib')
-DATA_PATH = os.path.join(BASE_DIR, 'data/training_data.csv')
+BATCH_SIZE = 262144
 
 def verify():
     print("--- Starting Model Verification ---")
@@ -24,44 +24,40 @@ def verify():
         print(f"❌ Critical Error: Could not load model. {e}")
         return
 
-    # 3. Load Data
-    if os.path.exists(DATA_PATH):
-        print(f"Loading real data from {DATA_PATH}...")
-        df = pd.read_csv(DATA_PATH)
-        
-        feature_cols = ['duration', 'protocol_type', 'service', 'flag', 
-                        'src_bytes', 'dst_bytes', 'count', 'srv_count']
-        
-        # Ensure correct columns exist
-        for col in feature_cols:
-            if col not in df.columns:
-                df[col] = 0
+    # 3. Load Data (chunk-by-chunk from the memory-mapped dataset)
+    dataset = open_training_dataset()
+    if dataset is not None and len(dataset):
+        print(f"Loading real data from {dataset.path}...")
+        batches = dataset.iter_batches(BATCH_SIZE)
 
-        X = df[feature_cols].values
-        
         # Check for labels
-        if 'label' not in df.columns:
+        if not dataset.has_labels:
             print("⚠️ No 'label' column found. Generating dummy labels for pipeline test.")
             print("(Note: Accuracy metrics will be meaningless, checking prediction flow only)")
-            y = np.random.randint(0, 2, size=len(df)) 
-        else:
-            y = df['label'].values
     else:
         print("⚠️ Real data not found. Using synthetic data.")
         from sklearn.datasets import make_classification
         X, y = make_classification(n_samples=500, n_features=8, random_state=42)
+        batches = [(X, y)]
 
-    # 4. Preprocess
+    # 4. Preprocess + 5. Predict, one batch at a time (memory stays bounded)
     # FIX: The 'scaler' object is actually the DataPreprocessor class.
     # Its .transform() method AUTOMATICALLY reshapes to 3D. We don't need to do it again.
-    X_processed = scaler.transform(X)
-    
-    print(f"Data Shape verified: {X_processed.shape}") # Should be (Samples, 1, 8)
-
-    # 5. Predict
-    print(f"\nRunning predictions on {len(X)} samples...")
-    y_pred_probs = model.predict(X_processed, verbose=0)
-    y_pred = (y_pred_probs > 0.5).astype(int)
+    print("\nRunning predictions...")
+    y_true, y_pred = [], []
+    for X, y in batches:
+        if y is None:
+            y = np.random.randint(0, 2, size=len(X))
+        if getattr(scaler, 'sequence_length', 1) > 1:
+            windows, index = scaler.transform_sequences(np.asarray(X)) # Sequence model
+            X_processed = windows[index]
+        else:
+            X_processed = scaler.transform(np.asarray(X))
+        y_pred_probs = model.predict(X_processed, verbose=0, batch_size=4096)
+        y_pred.append((y_pred_probs[:, 0] > 0.5).astype(int))
+        y_true.append(np.asarray(y))
+    y, y_pred = np.concatenate(y_true), np.concatenate(y_pred)
+    print(f"Predicted {len(y)} samples.")
 
     # 6. Report
     print("\n--- Verification Results ---")
@@ -1,17 +1,195 @@
+import atexit
+import json
 import logging
 import os
+import queue
 import sys
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
 
-def setup_logger(name):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+# Read here rather than in app.py: every module sets up its logger at import time
+LOG_LEVEL = os.environ.get("GUARDNET_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("GUARDNET_LOG_FORMAT", "text") # "text" or "json" (JSON lines)
+LOG_QUEUE_SIZE = int(os.environ.get("GUARDNET_LOG_QUEUE_SIZE", 10000))
+# Identical messages: at most LOG_BURST per LOG_INTERVAL seconds, the rest are counted
+LOG_BURST = int(os.environ.get("GUARDNET_LOG_BURST", 5))
+LOG_INTERVAL = float(os.environ.get("GUARDNET_LOG_INTERVAL", 10.0))
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line (Loki, ELK, CloudWatch...)"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if getattr(record, "repeats", None):
+            entry["repeats"] = record.repeats
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through `burst` copies of the same message (logger, level and text,
+    so e.g. per source address) per `interval` seconds and counts the rest.
+    When the window ends, one summary record reports how many were dropped.
+    Tracks at most `max_keys` messages (least recently seen are evicted).
+    """
+
+    def __init__(self, emit, burst=5, interval=10.0, max_keys=1024):
+        super().__init__()
+        self.emit = emit # Callback for summary records
+        self.burst = burst
+        self.interval = interval
+        self.max_keys = max_keys
+        self._keys = OrderedDict() # key -> [window start, seen, suppressed]
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.suppressed = 0
+
+    def filter(self, record, now=None):
+        now = time.monotonic() if now is None else now
+        key = (record.name, record.levelno, record.getMessage())
+        summaries = []
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now, summaries)
+            entry = self._keys.get(key)
+            if entry is None or now - entry[0] >= self.interval:
+                if entry is not None and entry[2]:
+                    summaries.append(self._summary(key, entry, now))
+                entry = self._keys[key] = [now, 0, 0]
+                if len(self._keys) > self.max_keys:
+                    old_key, old = self._keys.popitem(last=False)
+                    if old[2]:
+                        summaries.append(self._summary(old_key, old, now))
+            self._keys.move_to_end(key)
+            entry[1] += 1
+            allowed = entry[1] <= self.burst
+            if not allowed:
+                entry[2] += 1
+                self.suppressed += 1
+        for summary in summaries:
+            self.emit(summary)
+        return allowed
+
+    def flush(self, now=None):
+        """Summaries for every window with suppressed messages (shutdown, tests)"""
+        now = time.monotonic() if now is None else now
+        summaries = []
+        with self._lock:
+            self._sweep(now + self.interval, summaries)
+        for summary in summaries:
+            self.emit(summary)
+
+    def _sweep(self, now, summaries):
+        self._next_sweep = now + self.interval
+        for key in [k for k, e in self._keys.items() if now - e[0] >= self.interval]:
+            entry = self._keys.pop(key)
+            if entry[2]:
+                summaries.append(self._summary(key, entry, now))
+
+    def _summary(self, key, entry, now):
+        name, level, message = key
+        seconds = min(now - entry[0], self.interval)
+        record = logging.LogRecord(name, level, __file__, 0,
+                                   f"{message} (repeated {entry[2]} more times in {seconds:.0f}s)", None, None)
+        record.repeats = entry[2]
+        return record
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel) # Wait for room: the queue may be full at exit
 
-    # Create formatters
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+class AsyncHandler(QueueHandler):
+    """
+    Hands records to one writer thread (QueueListener) per process, so a
+    request thread never blocks on stdout. The queue is bounded: when the
+    writer can't keep up, records are dropped and counted.
+    """
 
-    # Stream handler (stdout) - for Docker logs
-    stream_handler = logging.StreamHandler(sys.stdout)
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
+    def __init__(self, handler, maxsize=10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.handler = handler
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # Same-process queue: no pickling needed, the writer thread formats
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child inherits the queue but not the writer thread
+            self.queue = queue.Queue(maxsize=self.maxsize)
+            self._listener = _Listener(self.queue, self.handler)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """Writes out everything queued (at exit)"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+def _build():
+    stream_handler = logging.StreamHandler(sys.stdout) # stdout - for Docker logs
+    if LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    handler = AsyncHandler(stream_handler, LOG_QUEUE_SIZE)
+    handler.limiter = RateLimitFilter(handler.enqueue, LOG_BURST, LOG_INTERVAL)
+    handler.addFilter(handler.limiter)
+
+    def shutdown():
+        handler.limiter.flush()
+        handler.stop()
+    atexit.register(shutdown)
+    return handler
+
+_handler = None
+_setup_lock = threading.Lock()
+
+def setup_logger(name):
+    """Logger that writes through the shared async handler. Safe to call repeatedly."""
+    global _handler
+    logger = logging.getLogger(name)
+    with _setup_lock:
+        if _handler is None:
+            _handler = _build()
+        if _handler not in logger.handlers:
+            logger.setLevel(LOG_LEVEL)
+            logger.addHandler(_handler)
+            logger.propagate = False # One line per record even if the root logger has handlers
+    return logger
 
-    return logger
\ No newline at end of file
+def logging_metrics():
+    if _handler is None:
+        return None
+    return {
+        "queued": _handler.queue.qsize(),
+        "dropped": _handler.dropped,
+        "suppressed": _handler.limiter.suppressed,
+        "format": LOG_FORMAT,
+        "level": LOG_LEVEL
+    }
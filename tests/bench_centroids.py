@@ -0,0 +1,38 @@
+import time
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from src.core.centroids import NearestCentroid
+
+REPEATS = 2000
+BATCH_SIZES = [1, 32, 1024, 65536]
+
+def bench(fn, X, repeats):
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats
+
+def sklearn_gate(scaler, kmeans):
+    def run(X):
+        distances = kmeans.transform(scaler.transform(X))
+        return np.argmin(distances, axis=1), np.min(distances, axis=1)
+    return run
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    train = rng.lognormal(0, 2, size=(5000, 8)) * np.array([1, 1, 10, 1, 1e4, 1e4, 10, 10])
+    scaler = StandardScaler().fit(train)
+    kmeans = KMeans(n_clusters=2, n_init=1, random_state=0).fit(scaler.transform(train))
+    gate = NearestCentroid.from_sklearn(scaler, kmeans)
+
+    print("--- K-MEANS GATE LATENCY: sklearn vs folded centroids ---")
+    print(f"{'Batch':>6} | {'sklearn (us)':>12} | {'folded (us)':>11} | {'squared (us)':>12} | {'Speedup':>8}")
+    for n in BATCH_SIZES:
+        X = train[rng.integers(0, len(train), n)]
+        repeats = max(10, REPEATS // (1 + n // 64))
+        t_sk = bench(sklearn_gate(scaler, kmeans), X, repeats)
+        t_gate = bench(gate.nearest, X, repeats)
+        t_sq = bench(lambda x: gate.nearest(x, squared=True), X, repeats)
+        print(f"{n:>6} | {t_sk * 1e6:>12.1f} | {t_gate * 1e6:>11.1f} | {t_sq * 1e6:>12.1f} | {t_sk / t_sq:>7.1f}x")
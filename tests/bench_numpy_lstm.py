@@ -0,0 +1,27 @@
+import time
+import numpy as np
+import tensorflow as tf
+from src.ml.numpy_lstm import NumpyLSTM, KERAS_PATH, NPZ_PATH
+
+REPEATS = 200
+BATCH_SIZES = [1, 32, 1024]
+
+def bench(fn, X, repeats):
+    fn(X) # Warm-up (graph tracing for Keras)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats
+
+if __name__ == "__main__":
+    keras_model = tf.keras.models.load_model(KERAS_PATH)
+    engine = NumpyLSTM.load(NPZ_PATH)
+
+    print("--- LSTM LATENCY: Keras predict vs NumPy engine ---")
+    print(f"{'Batch':>6} | {'Keras (ms)':>11} | {'NumPy (ms)':>11} | {'Speedup':>8}")
+    for n in BATCH_SIZES:
+        X = np.random.default_rng(0).normal(size=(n, 1, 8)).astype(np.float32)
+        repeats = max(10, REPEATS // (1 + n // 256))
+        t_keras = bench(lambda x: keras_model.predict(x, verbose=0), X, repeats)
+        t_numpy = bench(engine.predict, X, repeats)
+        print(f"{n:>6} | {t_keras * 1000:>11.3f} | {t_numpy * 1000:>11.3f} | {t_keras / t_numpy:>7.1f}x")
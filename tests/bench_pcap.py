@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+import resource
+import struct
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Throughput (packets/sec) and peak RSS of the streaming extractor vs scapy.rdpcap
+N_PACKETS = int(os.environ.get("GUARDNET_BENCH_PACKETS", 1_000_000))
+N_SCAPY = int(os.environ.get("GUARDNET_BENCH_SCAPY_PACKETS", 20_000))
+
+def write_synthetic_pcap(path, n):
+    """Ethernet/IPv4/TCP packets with random sizes, written without scapy"""
+    rng = np.random.default_rng(0)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        for i in range(n):
+            payload = int(rng.integers(0, 200))
+            ip_len = 20 + 20 + payload
+            frame = (b"\x00" * 12 + b"\x08\x00"
+                     + struct.pack("!BBHHHBBH4s4s", 0x45, 0, ip_len, 0, 0, 64, 6, 0,
+                                   b"\x0a\x00\x00\x01", b"\x0a\x00\x00\x02")
+                     + struct.pack("!HHIIBBHHH", 40000 + i % 1000, 443, 0, 0, 0x50, 0x18, 0, 0, 0)
+                     + b"\x00" * payload)
+            f.write(struct.pack("<IIII", i // 1000, (i % 1000) * 1000, len(frame), len(frame)))
+            f.write(frame)
+
+def _run(method, path, queue):
+    sys.path.insert(0, os.getcwd())
+    start = time.perf_counter()
+    if method == "streaming":
+        from src.core.pcap_to_csv import iter_features
+        count = sum(len(X) for X in iter_features(path))
+    else:
+        from scapy.all import rdpcap
+        count = len(rdpcap(path))
+    elapsed = time.perf_counter() - start
+    queue.put((count, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+def measure(method, path):
+    # Fresh interpreter per method so peak RSS is not shared
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(method, path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        big, small = os.path.join(tmp, "big.pcap"), os.path.join(tmp, "small.pcap")
+        print(f"Generating {N_PACKETS} + {N_SCAPY} synthetic packets...")
+        write_synthetic_pcap(big, N_PACKETS)
+        write_synthetic_pcap(small, N_SCAPY)
+
+        print("\n--- PCAP EXTRACTION BENCHMARK ---")
+        for method, path in [("streaming", big), ("streaming", small), ("rdpcap", small)]:
+            count, elapsed, rss_mb = measure(method, path)
+            print(f"{method:>9} | {count:>9} pkts | {count / elapsed:>11,.0f} pkts/s | peak RSS {rss_mb:>7.1f} MB")
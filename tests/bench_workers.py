@@ -0,0 +1,63 @@
+import os
+import re
+import subprocess
+import sys
+import time
+import requests
+
+# Runs tests/stress_test.py against gunicorn with 1, 2, 4, ... workers
+# (up to the core count) to show how throughput scales with cores.
+PORT = int(os.environ.get("GUARDNET_BENCH_PORT", 5055))
+BASE_URL = f"http://127.0.0.1:{PORT}"
+CORES = os.cpu_count() or 1
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def worker_counts():
+    n = 1
+    while n < CORES:
+        yield n
+        n *= 2
+    yield CORES
+
+def wait_ready(timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{BASE_URL}/readyz", timeout=1).status_code == 200:
+                return True
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.5)
+    return False
+
+def run(workers):
+    env = dict(os.environ, PYTHONPATH=ROOT, GUARDNET_WORKERS=str(workers),
+               GUARDNET_BIND=f"127.0.0.1:{PORT}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "src/app/gunicorn_conf.py", "src.app.app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready():
+            return None
+        out = subprocess.run(
+            [sys.executable, os.path.join(ROOT, "tests", "stress_test.py")],
+            env=dict(os.environ, GUARDNET_API_URL=f"{BASE_URL}/api/analyze"),
+            capture_output=True, text=True
+        ).stdout
+        match = re.search(r"Requests/Sec:\s+([\d.]+)", out)
+        return float(match.group(1)) if match else None
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    print(f"--- WORKER SCALING BENCHMARK ({CORES} cores) ---")
+    baseline = None
+    for n in worker_counts():
+        rps = run(n)
+        if rps is None:
+            print(f"{n:>3} workers | FAILED (server not ready or no result)")
+            continue
+        baseline = baseline or rps
+        print(f"{n:>3} workers | {rps:>9.2f} RPS | {rps / baseline:>5.2f}x")
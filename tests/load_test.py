@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from urllib.parse import urlsplit
+import numpy as np
+
+# Open-loop load generator for /api/analyze.
+#
+#   python -m tests.load_test --rates 200,400,800 --duration 10 --json bench.json
+#   python -m tests.load_test --replay traffic.jsonl --compare bench.json
+#
+# Requests are SCHEDULED at the target rate whether or not earlier ones have
+# answered, and latency is measured from the scheduled send time. A slow
+# server therefore shows up as latency, not as a politely lower request rate
+# (no coordinated omission). Connections are a keep-alive pool.
+API_URL = os.environ.get("GUARDNET_API_URL", "http://localhost:5000/api/analyze")
+API_KEY = os.environ.get("GUARDNET_API_KEY", "guardnet-secret-access-token")
+PERCENTILES = (50, 95, 99, 99.9)
+# Default mix, same as test_traffic.py: 40% malware, 40% normal, 20% anomalies
+MIX = {"MALWARE": 0.4, "NORMAL": 0.4, "ANOMALY": 0.2}
+
+# --- HTTP/1.1 KEEP-ALIVE POOL ---
+class Connection:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, head, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self.writer.write(head + body)
+            await self.writer.drain()
+            status_line = await self.reader.readuntil(b"\r\n")
+            headers = {}
+            for line in (await self.reader.readuntil(b"\r\n\r\n")).split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if value:
+                    headers[name.strip().lower()] = value.strip().lower()
+            payload = await self.reader.readexactly(int(headers.get(b"content-length", 0)))
+        except BaseException: # Also a timeout's CancelledError: never reuse a half-read stream
+            self.close()
+            raise
+        # HTTP/1.0 servers (e.g. the Flask dev server) close after each response
+        if headers.get(b"connection") == b"close" or status_line.startswith(b"HTTP/1.0"):
+            self.close()
+        return int(status_line.split()[1]), payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+class Pool:
+    def __init__(self, url, size):
+        parts = urlsplit(url)
+        self.path = parts.path or "/"
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._idle = asyncio.Queue()
+        for _ in range(size):
+            self._idle.put_nowait(Connection(self.host, self.port))
+
+    async def post_json(self, body, headers):
+        head = (f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n").encode()
+        conn = await self._idle.get() # Waiting for a free connection counts as latency
+        try:
+            return await conn.request(head, body)
+        finally:
+            self._idle.put_nowait(conn)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+# --- WORKLOAD ---
+def profile_workload(mix, seed):
+    """Endless (profile, record) stream from the test_traffic.py profiles"""
+    from test_traffic import get_random_packet
+    random.seed(seed)
+    names, weights = list(mix), list(mix.values())
+    while True:
+        profile = random.choices(names, weights)[0]
+        yield profile, get_random_packet(profile)
+
+def replay_workload(path):
+    """Recorded traffic: one JSON record per line, optional "profile" field. Loops."""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        raise ValueError(f"No records in {path}")
+    while True:
+        for record in records:
+            record = dict(record)
+            yield record.pop("profile", "REPLAY"), record
+
+# --- RUN ---
+async def run_rate(pool, workload, rate, duration, timeout):
+    """Sends `rate` requests/sec for `duration` seconds. Returns one result per request."""
+    headers = {"x-api-key": API_KEY}
+    results = []
+
+    async def send(scheduled, profile, body):
+        try:
+            status, payload = await asyncio.wait_for(pool.post_json(body, headers), timeout)
+            source = json.loads(payload).get("source", "unknown") if status == 200 else "error"
+            ok = status == 200
+        except Exception:
+            ok, source = False, "error"
+        results.append((profile, source, ok, time.perf_counter() - scheduled))
+
+    loop_start = time.perf_counter()
+    tasks = []
+    for i in range(int(rate * duration)):
+        scheduled = loop_start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        profile, record = next(workload)
+        tasks.append(asyncio.create_task(send(scheduled, profile, json.dumps(record).encode())))
+    await asyncio.gather(*tasks)
+    return results, time.perf_counter() - loop_start
+
+def latency_summary(latencies):
+    if not len(latencies):
+        return {f"p{p:g}_ms": None for p in PERCENTILES}
+    values = np.percentile(np.asarray(latencies) * 1000, PERCENTILES)
+    summary = {f"p{p:g}_ms": round(float(v), 3) for p, v in zip(PERCENTILES, values)}
+    summary["mean_ms"] = round(float(np.mean(latencies)) * 1000, 3)
+    summary["max_ms"] = round(float(np.max(latencies)) * 1000, 3)
+    return summary
+
+def summarize(results, rate, elapsed):
+    """Overall, per-gate (response "source") and per-profile numbers for one rate"""
+    def group(rows):
+        ok = [r for r in rows if r[2]]
+        return {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            "error_rate": round((len(rows) - len(ok)) / len(rows), 4) if rows else 0.0,
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            **latency_summary([r[3] for r in ok])
+        }
+
+    by_gate, by_profile = {}, {}
+    for r in results:
+        by_gate.setdefault(r[1], []).append(r)
+        by_profile.setdefault(r[0], []).append(r)
+    return {
+        "target_rps": rate,
+        "elapsed_s": round(elapsed, 3),
+        **group(results),
+        "gates": {name: group(rows) for name, rows in sorted(by_gate.items())},
+        "profiles": {name: group(rows) for name, rows in sorted(by_profile.items())}
+    }
+
+def saturation(runs, min_ratio=0.95, max_error_rate=0.01):
+    """Highest target rate the server kept up with (throughput and errors)"""
+    kept_up = [r["target_rps"] for r in runs
+               if r["throughput_rps"] >= min_ratio * r["target_rps"] and r["error_rate"] <= max_error_rate]
+    return max(kept_up) if kept_up else None
+
+async def benchmark(url, rates, duration, connections, workload, timeout=5.0, warmup=1.0):
+    pool = Pool(url, connections)
+    try:
+        if warmup:
+            await run_rate(pool, workload, min(rates), warmup, timeout)
+        runs = []
+        for rate in rates:
+            results, elapsed = await run_rate(pool, workload, rate, duration, timeout)
+            runs.append(summarize(results, rate, elapsed))
+            print_run(runs[-1])
+        return runs
+    finally:
+        pool.close()
+
+# --- REPORT ---
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_run(run):
+    print(f"\n--- {run['target_rps']} req/s: {run['throughput_rps']} req/s served, "
+          f"{run['error_rate'] * 100:.2f}% errors ---")
+    print(f"{'':>15} | {'Requests':>8} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'p99 (ms)':>9} | {'p99.9 (ms)':>10}")
+    rows = [("ALL", run)] + [(f"gate:{n}", g) for n, g in run["gates"].items()]
+    rows += [(f"{n.lower()}", p) for n, p in run["profiles"].items()]
+    for name, g in rows:
+        fmt = lambda v: f"{v:.2f}" if v is not None else "-"
+        print(f"{name[:15]:>15} | {g['requests']:>8} | {fmt(g['p50_ms']):>9} | {fmt(g['p95_ms']):>9} | "
+              f"{fmt(g['p99_ms']):>9} | {fmt(g['p99.9_ms']):>10}")
+
+def compare(report, baseline_path):
+    """Prints the p50/p99 change of every rate also present in the baseline report"""
+    with open(baseline_path) as f:
+        old_report = json.load(f)
+    baseline = {r["target_rps"]: r for r in old_report["runs"]}
+    print(f"\n--- vs {baseline_path} (commit {old_report.get('commit')}) ---")
+    for run in report["runs"]:
+        old = baseline.get(run["target_rps"])
+        if old is None:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if run[key] and old[key]:
+                change = (run[key] - old[key]) / old[key] * 100
+                flag = " ⚠️" if change > 10 else ""
+                print(f"{run['target_rps']:>6} req/s {key}: {old[key]:.2f} -> {run[key]:.2f} ({change:+.1f}%){flag}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop latency benchmark for /api/analyze")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--rates", default="100,200,400", help="Target req/s, comma-separated")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per rate")
+    parser.add_argument("--connections", type=int, default=64, help="Keep-alive pool size")
+    parser.add_argument("--replay", help="JSONL file of recorded records instead of the profile mix")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the machine-readable report here")
+    parser.add_argument("--compare", help="Earlier --json report to compare against")
+    args = parser.parse_args()
+
+    rates = [float(r) for r in args.rates.split(",")]
+    workload = replay_workload(args.replay) if args.replay else profile_workload(MIX, args.seed)
+    print(f"--- LOAD TEST: {args.url}, {args.connections} connections, {args.duration:g}s per rate ---")
+    runs = asyncio.run(benchmark(args.url, rates, args.duration, args.connections, workload))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "url": args.url,
+        "workload": args.replay or MIX,
+        "duration_s": args.duration,
+        "connections": args.connections,
+        "saturation_rps": saturation(runs),
+        "runs": runs
+    }
+    print(f"\nSaturation: {report['saturation_rps'] or 'below the lowest rate'} req/s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report saved to {args.json}")
+    if args.compare:
+        compare(report, args.compare)
@@ -1,12 +1,13 @@
+import os
 import requests
 import time
 import concurrent.futures
 
-API_URL = "http://localhost:5000/api/analyze"
+API_URL = os.environ.get("GUARDNET_API_URL", "http://localhost:5000/api/analyze")
 API_KEY = "guardnet-secret-access-token"
 HEADERS = {"x-api-key": API_KEY}
-TOTAL_REQUESTS = 1000
-CONCURRENT_USERS = 50  # Simulating 50 threads sending data at once
+TOTAL_REQUESTS = int(os.environ.get("GUARDNET_TOTAL_REQUESTS", 1000))
+CONCURRENT_USERS = int(os.environ.get("GUARDNET_CONCURRENT_USERS", 50))  # Simulating 50 threads sending data at once
 
 packet = {
     "src_bytes": 1200, 
@@ -1,3 +1,4 @@
+import json
 import requests
 import pytest
 
@@ -80,4 +81,27 @@ def test_robustness_incomplete_data():
     # Your robust backend should handle this (either 200 with defaults or 400)
     # Our optimized code defaults to 0, so it should be 200 OK.
     assert response.status_code == 200 
-    print("✅ Robustness Check Passed (No Crash on bad data)")
\ No newline at end of file
+    print("✅ Robustness Check Passed (No Crash on bad data)")
+
+def test_batch_analysis_preserves_order():
+    """Send a mixed batch and verify per-record verdicts come back in input order"""
+    batch = [
+        {"id": 1, "src_bytes": 50, "service": 0, "protocol_type": 1, "count": 1},
+        {"id": 2, "src_bytes": 20000, "dst_bytes": 20000, "service": 443, "protocol_type": 1,
+         "duration": 5.0, "count": 20, "srv_count": 20, "flag": 0},
+    ]
+    response = requests.post(f"{BASE_URL}/api/analyze/batch", json=batch, headers=HEADERS_VALID)
+    assert response.status_code == 200
+
+    results = response.json()['results']
+    assert [r['id'] for r in results] == [1, 2]
+    assert results[0]['status'] == "Malicious"
+    assert results[1]['status'] == "Normal"
+
+    # NDJSON bodies are accepted too
+    ndjson = "\n".join(json.dumps(p) for p in batch)
+    headers = {"x-api-key": API_KEY, "Content-Type": "application/x-ndjson"}
+    response = requests.post(f"{BASE_URL}/api/analyze/batch", data=ndjson, headers=headers)
+    assert response.status_code == 200
+    assert response.json()['count'] == 2
+    print("✅ Batch Analysis is working")
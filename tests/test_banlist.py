@@ -0,0 +1,49 @@
+import os
+from src.core.banlist import BanList
+
+def test_ttl_dedup_and_delta_feed(tmp_path):
+    bans = BanList(str(tmp_path / "bans.ipset"), ttl=100, max_changes=3)
+    assert bans.ban("10.0.0.1", now=0) and not bans.ban("10.0.0.1", now=1) # Duplicate: no change
+    assert not bans.ban("unknown", now=0) # Only IP addresses
+    assert bans.contains("10.0.0.1", now=50) and not bans.contains("10.0.0.1", now=100)
+    assert bans.version == 1
+
+    bans.ban("10.0.0.1", now=50) # Renewal (expires 150), coalesced with the first change
+    bans.ban("10.0.0.2", now=50)
+    bans.ban("2001:db8::1", now=60)
+    assert bans.changes(0) == {"version": 4, "full": False, "removed": [], "added": [
+        {"source": "2001:db8::1", "expires": 160}, {"source": "10.0.0.2", "expires": 150},
+        {"source": "10.0.0.1", "expires": 150}]}
+    assert [a["source"] for a in bans.changes(3)["added"]] == ["2001:db8::1"]
+
+    bans.flush(now=150) # Both IPv4 bans expire
+    delta = bans.changes(4)
+    assert delta["removed"] == ["10.0.0.1", "10.0.0.2"] or delta["removed"] == ["10.0.0.2", "10.0.0.1"]
+    bans.ban("10.0.0.3", now=150) # A 4th source pushes the oldest change out of the history
+    assert bans.changes(1)["full"] and not bans.changes(5)["full"]
+    assert bans.changes(99)["full"] # Version from another run
+    assert bans.metrics()["expired"] == 2 and bans.metrics()["renewals"] == 1
+
+def test_atomic_ipset_export_and_reload(tmp_path):
+    path = str(tmp_path / "bans.ipset")
+    bans = BanList(path, ttl=3600, set_name="gn")
+    bans.ban("10.0.0.1", now=0)
+    bans.ban("2001:db8::1", now=0)
+    assert bans.flush(now=600) and not bans.flush(now=601) # Unchanged: not rewritten
+    assert os.listdir(tmp_path) == ["bans.ipset"] # No temp file left behind
+
+    text = open(path).read()
+    assert "add gn-new 10.0.0.1 timeout 3000\n" in text and "swap gn-new gn\n" in text
+    assert "create gn6 hash:ip family inet6 timeout 3600 -exist\n" in text
+    assert "add gn6-new 2001:db8::1 timeout 3000\n" in text
+
+    # A restarted owner or a forked worker rebuilds the set from the export
+    follower = BanList(path)
+    assert follower.load(now=1000)
+    assert follower.version == bans.version and follower.contains("10.0.0.1", now=3000)
+    assert not follower.contains("10.0.0.1", now=4001)
+    bans.unban("10.0.0.1")
+    bans.flush(now=1200)
+    follower.load(now=1200)
+    assert not follower.contains("10.0.0.1", now=1200)
+    assert follower.changes(bans.version - 1)["removed"] == ["10.0.0.1"]
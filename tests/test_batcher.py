@@ -0,0 +1,69 @@
+import threading
+import numpy as np
+from src.core.batcher import MicroBatcher
+
+def test_concurrent_callers_share_one_forward_pass():
+    """Inputs from many threads are merged and each caller gets its own slice back"""
+    calls = []
+
+    def predict(batch):
+        calls.append(len(batch))
+        return batch[:, 0] * 2
+
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=50)
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.predict(np.array([[i, 0.0]]))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert all(results[i][0] == i * 2 for i in range(16))
+    assert sum(calls) == 16
+    assert len(calls) < 16 # At least some requests were coalesced
+
+    metrics = batcher.metrics()
+    assert metrics["items"] == 16
+    assert metrics["queue_depth"] == 0
+    print("✅ Micro-batching is working")
+
+def test_batch_flushes_at_max_size():
+    batcher = MicroBatcher(lambda b: b[:, 0], max_batch_size=4, max_wait_ms=1000)
+    futures = [batcher.submit(np.array([[float(i)]])) for i in range(4)]
+
+    # Size limit reached -> no need to wait for the 1s deadline
+    assert [f.result(timeout=0.5)[0] for f in futures] == [0.0, 1.0, 2.0, 3.0]
+
+def test_errors_propagate_to_callers():
+    def broken(batch):
+        raise RuntimeError("model crashed")
+
+    batcher = MicroBatcher(broken, max_wait_ms=1)
+    future = batcher.submit(np.zeros((1, 8)))
+    assert isinstance(future.exception(timeout=1), RuntimeError)
+
+def test_worker_survives_bad_input_and_callback_errors():
+    def on_batch(rows, seconds):
+        raise RuntimeError("metrics backend down")
+
+    batcher = MicroBatcher(lambda b: b[:, 0], max_wait_ms=1, on_batch=on_batch)
+    bad = batcher.submit(np.float64(1.0)) # 0-d: no len(), fails while collecting
+    assert isinstance(bad.exception(timeout=1), TypeError)
+    # The thread is still alive: later callers get answers, not a hang
+    assert batcher.predict(np.array([[3.0]]), timeout=1)[0] == 3.0
+
+def test_contexts_never_share_a_pass():
+    """Requests that started on different model sets are scored by their own set"""
+    old, new = object(), object()
+    calls = []
+
+    def predict(batch, models):
+        calls.append((models, len(batch)))
+        return batch[:, 0] + (100 if models is new else 0)
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1000)
+    futures = [batcher.submit(np.array([[float(i)]]), context=old if i % 2 else new) for i in range(4)]
+    assert [f.result(timeout=0.5)[0] for f in futures] == [100.0, 1.0, 102.0, 3.0]
+    assert sorted(n for _, n in calls) == [2, 2]
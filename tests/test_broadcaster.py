@@ -0,0 +1,59 @@
+import json
+import os
+from src.core.broadcaster import Broadcaster
+
+def _events(sub):
+    message = sub.take()
+    if message is None:
+        return None
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+def test_one_snapshot_per_tick_and_slow_clients_coalesce():
+    state = {"count": 0}
+    calls = {"delta": 0, "full": 0}
+    def delta():
+        calls["delta"] += 1
+        return {"count": state["count"]} if state["count"] else None
+    def full():
+        calls["full"] += 1
+        return {"count": state["count"], "full": True}
+
+    stream = Broadcaster(delta, full, interval=60, max_clients=3)
+    stream._pid = os.getpid() # Drive ticks by hand, no background thread
+    fast, slow, other = stream.subscribe(), stream.subscribe(), stream.subscribe()
+    assert stream.subscribe() is None # Over max_clients
+
+    stream._tick() # New clients: one shared full snapshot
+    assert calls == {"delta": 1, "full": 1}
+    assert _events(fast) == ("full", {"count": 0, "full": True})
+    assert _events(other)[0] == "full"
+
+    stream._tick() # Nothing changed: nothing sent, the slow client's message stays
+    assert fast.pending is None and slow.pending is not None
+
+    state["count"] = 5
+    stream._tick()
+    assert _events(fast) == ("delta", {"count": 5}) and _events(other) == ("delta", {"count": 5})
+    state["count"] = 7
+    stream._tick()
+    # The slow client never read: its backlog became ONE full snapshot
+    assert _events(slow) == ("full", {"count": 7, "full": True}) and slow.coalesced == 2 # At 5 and at 7
+    assert _events(fast) == ("delta", {"count": 7})
+    assert calls == {"delta": 4, "full": 3} # Once per tick, not per client
+
+    stream.unsubscribe(other)
+    assert stream.metrics()["clients"] == 2 and stream.subscribe() is not None
+    print("✅ SSE broadcaster fans out once per tick and coalesces slow clients")
+
+def test_stream_generator_unsubscribes_on_close():
+    stream = Broadcaster(lambda: {"x": 1}, lambda: {"x": 0}, interval=60, heartbeat=0.01)
+    stream._pid = os.getpid()
+    sub = stream.subscribe()
+    body = stream.stream(sub)
+    assert next(body).startswith("retry:")
+    assert next(body) == ": keepalive\n\n"
+    stream._tick()
+    assert "event: full" in next(body)
+    body.close() # Client went away
+    assert stream.metrics()["clients"] == 0
@@ -0,0 +1,42 @@
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from src.core.centroids import NearestCentroid
+
+def _fit(seed=0):
+    rng = np.random.default_rng(seed)
+    # Raw features on very different scales, like src_bytes vs flag
+    X = rng.lognormal(0, 2, size=(500, 8)) * np.array([1, 1, 10, 1, 1e4, 1e4, 10, 10])
+    scaler = StandardScaler().fit(X)
+    kmeans = KMeans(n_clusters=4, n_init=1, random_state=seed).fit(scaler.transform(X))
+    return scaler, kmeans, rng
+
+def test_parity_with_sklearn():
+    scaler, kmeans, rng = _fit()
+    gate = NearestCentroid.from_sklearn(scaler, kmeans)
+    X = rng.lognormal(0, 2, size=(300, 8)) * 50
+
+    distances = kmeans.transform(scaler.transform(X))
+    nearest, dist = gate.nearest(X)
+    assert np.array_equal(nearest, distances.argmin(axis=1))
+    np.testing.assert_allclose(dist, distances.min(axis=1), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(gate.centers, scaler.inverse_transform(kmeans.cluster_centers_))
+
+    # One row, as a 1-D vector or a (1, 8) block
+    for row in (X[7], X[7:8]):
+        n, d = gate.nearest(row)
+        assert n.tolist() == [nearest[7]] and np.isclose(d[0], dist[7])
+
+    # Small batches (direct difference) agree with the matmul path
+    np.testing.assert_allclose(gate.nearest(X[:10])[1], dist[:10], rtol=1e-9, atol=1e-9)
+
+    # Squared mode: same ordering, threshold on d^2
+    n2, d2 = gate.nearest(X, squared=True)
+    assert np.array_equal(n2, nearest)
+    assert np.array_equal(d2 <= 3.0 ** 2, dist <= 3.0)
+
+    # float32 centers agree to float32 precision
+    n32, d32 = NearestCentroid.from_sklearn(scaler, kmeans, dtype=np.float32).nearest(X)
+    assert d32.dtype == np.float32 and np.mean(n32 == nearest) > 0.99
+    np.testing.assert_allclose(d32, dist, rtol=1e-3)
+    print("✅ Folded centroid gate matches scaler + KMeans.transform")
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from src.core.dataset import FeatureDataset, open_training_dataset, FEATURE_COLS
+
+def test_append_and_memmap_reads(tmp_path):
+    dataset = FeatureDataset(str(tmp_path / "ds"))
+    X1, X2 = np.arange(16.0).reshape(2, 8), np.arange(24.0).reshape(3, 8) + 100
+    dataset.append(X1, [0, 1])
+    dataset.append(X2, [1, 1, 0])
+
+    # Re-open from the manifest
+    dataset = FeatureDataset(str(tmp_path / "ds"))
+    assert len(dataset) == 5 and dataset.has_labels
+
+    chunks = list(dataset.iter_chunks())
+    assert isinstance(chunks[0][0], np.memmap) and chunks[0][0].dtype == np.float32
+    X, y = dataset.load()
+    assert np.array_equal(X, np.concatenate([X1, X2])) and list(y) == [0, 1, 1, 1, 0]
+    assert [len(X) for X, _ in dataset.iter_batches(2)] == [2, 2, 1]
+    print("✅ Dataset append + memmap reads")
+
+def test_csv_round_trip(tmp_path):
+    csv_path = tmp_path / "training_data.csv"
+    pd.DataFrame({'duration': [1.5, 2.0], 'src_bytes': [40, 60], 'label': [1, 0]}).to_csv(csv_path, index=False)
+
+    # Legacy CSV is imported on first use, missing columns filled with 0
+    dataset = open_training_dataset(str(tmp_path / "ds"), str(csv_path))
+    X, y = dataset.load()
+    assert X.shape == (2, len(FEATURE_COLS)) and list(y) == [1, 0]
+    assert list(X[:, 4]) == [40, 60] and not X[:, 1].any()
+
+    out = tmp_path / "export.csv"
+    dataset.export_csv(str(out))
+    df = pd.read_csv(out)
+    assert list(df.columns) == FEATURE_COLS + ['label'] and list(df['duration']) == [1.5, 2.0]
+    print("✅ CSV import/export")
+
+def test_convert_all_pcaps_writes_dataset(tmp_path):
+    from tests.bench_pcap import write_synthetic_pcap
+    from src.core.pcap_to_csv import convert_all_pcaps
+
+    write_synthetic_pcap(str(tmp_path / "a.pcap"), 50)
+    write_synthetic_pcap(str(tmp_path / "b.pcap"), 30)
+    dataset = convert_all_pcaps(str(tmp_path), workers=2, mode="packet")
+    assert len(FeatureDataset(str(tmp_path / "dataset"))) == len(dataset) == 80
+
+    # Re-running replaces the dataset unless append=True
+    assert len(convert_all_pcaps(str(tmp_path), workers=1, mode="packet")) == 80
+    assert len(convert_all_pcaps(str(tmp_path), workers=1, mode="packet", append=True)) == 160
+    print("✅ convert_all_pcaps writes .npy chunks")
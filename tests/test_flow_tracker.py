@@ -0,0 +1,56 @@
+import numpy as np
+from src.core.flow_tracker import FlowTracker, flows_to_features
+from src.core.pcap_to_csv import PACKET_DTYPE
+
+A, B, C = 0x0A000001, 0x0A000002, 0x0A000003
+
+def _packets(rows):
+    return np.array(rows, dtype=PACKET_DTYPE)
+
+def test_bidirectional_flow_with_fin_close():
+    tracker = FlowTracker()
+    flows = tracker.update(_packets([
+        # ts,  src, dst, sport, dport, proto, flags, length
+        (0.0, A, B, 5000, 80, 6, 0x02, 0),
+        (0.1, B, A, 80, 5000, 6, 0x12, 0),
+        (0.2, A, B, 5000, 80, 6, 0x18, 300),
+        (0.5, B, A, 80, 5000, 6, 0x18, 4000),
+        (0.6, A, B, 5000, 80, 6, 0x11, 0),
+        (0.7, B, A, 80, 5000, 6, 0x11, 0),  # FIN from both sides -> complete
+        (0.8, A, B, 5000, 80, 6, 0x10, 0),  # Final ACK: absorbed by TIME_WAIT
+    ]))
+    assert len(flows) == 1 and tracker.active_flows == 0
+    assert len(tracker.flush()) == 0
+
+    X = flows_to_features(flows)[0]
+    # duration, proto, service, flags, src_bytes, dst_bytes, count, srv_count
+    assert np.allclose(X, [0.7, 1, 80, 0x1B, 300, 4000, 1, 1])
+
+    # The next connection only counts the real one before it
+    tracker.update(_packets([(1.0, A, B, 5001, 80, 6, 0x02, 0)]))
+    assert list(tracker.flush()['count']) == [2]
+
+def test_idle_timeout_and_max_flows_eviction():
+    tracker = FlowTracker(idle_timeout=10, max_flows=2)
+    flows = tracker.update(_packets([
+        (0.0, A, B, 1, 53, 17, 0, 40),
+        (1.0, A, B, 2, 53, 17, 0, 40),
+        (2.0, A, C, 3, 53, 17, 0, 40),  # Third flow: LRU (port 1) is evicted
+    ]))
+    assert list(flows['sport']) == [1] and tracker.evicted == 1
+
+    flows = tracker.update(_packets([(20.0, C, B, 9, 80, 17, 0, 10)]))
+    assert sorted(flows['sport']) == [2, 3]  # Idle for > 10s
+    assert list(tracker.flush()['sport']) == [9]
+
+def test_sliding_window_counts():
+    tracker = FlowTracker(window=2.0)
+    tracker.update(_packets([
+        (0.0, A, B, 1, 80, 6, 0x02, 0),
+        (0.5, A, B, 2, 443, 6, 0x02, 0),
+        (1.0, C, B, 3, 80, 6, 0x02, 0),
+        (3.5, A, B, 4, 80, 6, 0x02, 0),   # Everything before 1.5s has left the window
+    ]))
+    flows = np.sort(tracker.flush(), order='sport')
+    assert list(flows['count']) == [1, 2, 3, 1]
+    assert list(flows['srv_count']) == [1, 1, 2, 1]
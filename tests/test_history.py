@@ -0,0 +1,52 @@
+import time
+import pytest
+from src.core.history import VerdictHistory
+from src.core.pipeline import CLUSTERING, DEEP_LEARNING
+
+def _traffic(history, now):
+    # 3 HTTPS (1 malicious), 2 SSH brute force, 1 unknown UDP port
+    history.record(protocol=[1, 1, 1, 1, 1, 2], service=[443, 443, 443, 22, 22, 31337],
+                   malicious=[False, False, True, True, True, False],
+                   source=[CLUSTERING, CLUSTERING, DEEP_LEARNING, CLUSTERING, CLUSTERING, CLUSTERING], now=now)
+
+def test_group_by_and_rates():
+    history = VerdictHistory()
+    now = time.time()
+    _traffic(history, now - 30)
+    _traffic(history, now - 5)
+
+    result = history.query(now - 60, now, group_by="service")
+    assert result["resolution"] == 1 and len(result["times"]) == len(result["series"]["443"]["normal"])
+    assert result["totals"] == {
+        "22": {"normal": 0, "malicious": 4, "malicious_rate": 1.0},
+        "443": {"normal": 4, "malicious": 2, "malicious_rate": round(2 / 6, 4)},
+        "other": {"normal": 2, "malicious": 0, "malicious_rate": 0.0}}
+    assert history.query(now - 60, now, "protocol")["totals"]["udp"]["normal"] == 2
+    assert history.query(now - 60, now, "source")["totals"]["Deep Learning"]["malicious"] == 2
+    assert history.query(now - 10, now)["totals"]["all"] == {"normal": 3, "malicious": 3, "malicious_rate": 0.5}
+
+    # 30-second steps: the two blocks land in different buckets
+    stepped = history.query(now - 60, now, "verdict", step=30)
+    assert stepped["resolution"] == 30 and sum(stepped["series"]["all"]["malicious"]) == 6
+    with pytest.raises(ValueError):
+        history.query(now - 60, now, group_by="src_ip")
+
+def test_older_ranges_use_downsampled_tiers_and_memory_is_fixed():
+    history = VerdictHistory()
+    size = history.nbytes
+    now = time.time()
+    _traffic(history, now - 2 * 3600) # Beyond the per-second ring, kept per minute/hour
+    _traffic(history, now - 10)
+    for _ in range(200): # Much more traffic, same memory
+        _traffic(history, now)
+    assert history.nbytes == size and size < 8 << 20
+    assert history.retention == 30 * 24 * 3600
+
+    day = history.query(now - 3 * 3600, now, "verdict")
+    assert day["resolution"] == 60 and day["totals"]["all"]["malicious"] == 3 * 202
+
+    # A bucket that came around again does not report the old counts
+    ring = VerdictHistory(tiers=((1, 10),))
+    ring.record([1], [80], [True], [CLUSTERING], now=1000.0)
+    ring.record([1], [80], [False], [CLUSTERING], now=1010.0) # Same slot, next lap
+    assert ring.query(1001, 1011)["totals"]["all"] == {"normal": 1, "malicious": 0, "malicious_rate": 0.0}
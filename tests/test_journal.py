@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from src.app.replay import diff
+from src.core.journal import VerdictJournal, RECORD, HEADER, load, read_segment, scan, segment_paths
+from src.core.pipeline import CLUSTERING, DEEP_LEARNING
+
+def _block(n, offset=0):
+    X = np.arange(n * 8, dtype=np.float64).reshape(n, 8) + offset
+    ids = np.arange(offset, offset + n, dtype=np.uint64)
+    malicious = ids % 2 == 0
+    source = np.where(ids % 3 == 0, DEEP_LEARNING, CLUSTERING).astype(np.uint8)
+    return ids, X, malicious, np.full(n, 0.75), source
+
+def test_group_commit_rotation_and_memmap_scan(tmp_path):
+    journal = VerdictJournal(str(tmp_path), segment_bytes=HEADER.size + 100 * RECORD.itemsize,
+                             max_segments=2, flush_interval=60)
+    assert RECORD.itemsize == 88
+    for i in range(5): # 5 appends -> one write per flush
+        assert journal.append(*_block(60, offset=i * 60), now=1000.0 + i)
+        if i % 2:
+            journal.flush()
+    journal.close()
+    assert journal.commits == 3 and journal.rows == 300
+
+    # Each commit of 120 rows fills a segment: 3 segments, only the newest 2 are kept
+    paths = segment_paths(str(tmp_path))
+    assert len(paths) == 2 and all(p.endswith(".gnj") for p in paths)
+    records = load(str(tmp_path))
+    assert records["id"].tolist() == list(range(120, 300))
+    assert isinstance(read_segment(paths[0]), np.memmap)
+
+    # Vectorized filters straight on the mapped segments
+    late = load(str(tmp_path), start=1004.0, malicious=True)
+    assert len(late) == 30 and late["malicious"].all() and (late["time"] == 1004.0).all()
+    assert np.array_equal(late["features"][0], np.arange(8) + 240.0)
+    assert sum(len(r) for r in scan(paths, source=DEEP_LEARNING)) == 60
+
+    # A torn last record (crash mid-write) is ignored
+    with open(paths[-1], "ab") as f:
+        f.write(b"\0" * 10)
+    assert len(read_segment(paths[-1])) == len(load(paths[-1]))
+
+def test_pruning_covers_segments_of_other_workers(tmp_path):
+    # Left behind by a recycled worker (another pid)
+    stale = tmp_path / "verdicts-20250101-000000-99999-0001.gnj"
+    stale.write_bytes(b"")
+    os.utime(stale, (time.time() - 3600, time.time() - 3600))
+    journal = VerdictJournal(str(tmp_path), segment_bytes=HEADER.size + 10 * RECORD.itemsize,
+                             max_segments=2, flush_interval=60)
+    for i in range(3):
+        journal.append(*_block(10, offset=i * 10))
+        journal.flush()
+    journal.close()
+    assert not stale.exists() and len(segment_paths(str(tmp_path))) == 2
+    assert load(str(tmp_path))["id"].tolist() == list(range(10, 30))
+
+def test_pruning_keeps_the_idle_worker_segment(tmp_path):
+    # Another worker wrote once and went idle: its open segment is the oldest file
+    idle = subprocess.Popen([sys.executable, "-c", f"""
+import sys, numpy as np
+from src.core.journal import VerdictJournal
+journal = VerdictJournal({str(tmp_path)!r}, flush_interval=60)
+journal.append(np.arange(5, dtype=np.uint64), np.zeros((5, 8)), [False] * 5, [0.5] * 5, [0] * 5, now=1.0)
+journal.flush()
+print("ready", file=sys.stderr, flush=True)
+sys.stdin.readline()  # Idle until the busy worker has rotated
+journal.append(np.arange(5, 10, dtype=np.uint64), np.zeros((5, 8)), [False] * 5, [0.5] * 5, [0] * 5, now=2.0)
+journal.close()
+"""], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                            cwd=os.path.join(os.path.dirname(__file__), ".."))
+    assert idle.stderr.readline().strip() == "ready"
+    idle_segment = segment_paths(str(tmp_path))[0]
+    os.utime(idle_segment, (time.time() - 3600, time.time() - 3600))
+
+    busy = VerdictJournal(str(tmp_path), segment_bytes=HEADER.size + 10 * RECORD.itemsize,
+                          max_segments=2, flush_interval=60)
+    for i in range(3):
+        busy.append(*_block(10, offset=100 + i * 10))
+        busy.flush()
+    busy.close()
+    assert os.path.exists(idle_segment) and len(segment_paths(str(tmp_path))) == 2
+
+    idle.communicate("go\n", timeout=30)
+    assert read_segment(idle_segment)["id"].tolist() == list(range(10)) # Nothing written to an unlinked file
+
+def test_backpressure_drops_instead_of_blocking(tmp_path):
+    journal = VerdictJournal(str(tmp_path), max_pending=100, flush_interval=60)
+    assert journal.append(*_block(80))
+    assert not journal.append(*_block(80))
+    assert journal.metrics()["dropped"] == 80 and journal.metrics()["pending"] == 80
+
+def test_replay_diff():
+    records = np.zeros(4, dtype=RECORD)
+    records["malicious"] = [1, 0, 1, 0]
+    records["source"] = [CLUSTERING, CLUSTERING, DEEP_LEARNING, DEEP_LEARNING]
+    records["confidence"] = 0.5
+    summary, changed = diff(records, np.array([True, True, False, False]), np.full(4, 0.75),
+                            np.array([CLUSTERING, DEEP_LEARNING, DEEP_LEARNING, CLUSTERING]))
+    assert changed.tolist() == [False, True, True, False]
+    assert (summary["normal_to_malicious"], summary["malicious_to_normal"]) == (1, 1)
+    assert summary["gate_changes"] == {"Clustering -> Deep Learning": 1, "Deep Learning -> Clustering": 1}
+    assert summary["mean_confidence_delta"] == 0.25
@@ -0,0 +1,54 @@
+import asyncio
+import json
+from tests.load_test import Pool, run_rate, summarize, saturation, profile_workload
+
+async def _fake_server(handled):
+    """Keep-alive HTTP/1.1 server: small records -> Clustering, the rest -> Deep Learning"""
+    async def handle(reader, writer):
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                break
+            length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+            record = json.loads(await reader.readexactly(length))
+            handled.append(writer.get_extra_info("peername"))
+            if record["src_bytes"] < 100:
+                status, body = 200, {"status": "Malicious", "source": "Clustering"}
+            elif record["service"] == 6667:
+                status, body = 503, {"error": "AI Engine Warming Up"}
+            else:
+                status, body = 200, {"status": "Normal", "source": "Deep Learning"}
+            payload = json.dumps(body).encode()
+            writer.write(f"HTTP/1.1 {status} X\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+            await writer.drain()
+        writer.close()
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+def test_open_loop_run_reports_per_gate():
+    async def main():
+        handled = []
+        server = await _fake_server(handled)
+        port = server.sockets[0].getsockname()[1]
+        pool = Pool(f"http://127.0.0.1:{port}/api/analyze", size=4)
+        workload = profile_workload({"MALWARE": 0.4, "NORMAL": 0.4, "ANOMALY": 0.2}, seed=1)
+        results, elapsed = await run_rate(pool, workload, rate=400, duration=0.5, timeout=2.0)
+        pool.close()
+        server.close()
+        return handled, results, elapsed
+
+    handled, results, elapsed = asyncio.run(main())
+    assert len(results) == 200 and len(handled) == 200
+    assert len(set(handled)) <= 4 # Keep-alive: at most one TCP connection per pool slot
+
+    run = summarize(results, 400, elapsed)
+    assert set(run["gates"]) == {"Clustering", "Deep Learning", "error"}
+    assert run["profiles"]["MALWARE"]["errors"] == 0
+    assert run["profiles"]["ANOMALY"]["error_rate"] == 1.0
+    assert run["errors"] == run["gates"]["error"]["requests"]
+    assert run["p50_ms"] <= run["p99_ms"] <= run["p99.9_ms"] <= run["max_ms"]
+    json.dumps(run) # Machine-readable
+
+    assert saturation([run]) is None # ~20% errors
+    assert saturation([dict(run, error_rate=0.0, throughput_rps=399.0)]) == 400
+    print("✅ Open-loop load test reports percentiles per gate")
@@ -0,0 +1,44 @@
+import json
+import logging
+from src.utils.logger import setup_logger, AsyncHandler, JsonFormatter, RateLimitFilter
+
+def _record(message, level=logging.WARNING):
+    return logging.LogRecord("webapp", level, __file__, 0, message, None, None)
+
+def test_setup_is_idempotent():
+    first = setup_logger("test_logger")
+    assert setup_logger("test_logger") is first
+    assert len(first.handlers) == 1 and not first.propagate
+
+def test_repeated_messages_are_rate_limited_and_summarized():
+    summaries = []
+    limiter = RateLimitFilter(summaries.append, burst=3, interval=10)
+    flood = [limiter.filter(_record("Unauthorized access attempt from 1.2.3.4"), now=t / 100)
+             for t in range(100)]
+    assert flood.count(True) == 3 and limiter.suppressed == 97
+    assert limiter.filter(_record("Unauthorized access attempt from 5.6.7.8"), now=1.0) # Other address
+
+    # Next window: one summary for the storm, then the message passes again
+    assert limiter.filter(_record("Unauthorized access attempt from 1.2.3.4"), now=12.0)
+    assert [s.getMessage() for s in summaries] == [
+        "Unauthorized access attempt from 1.2.3.4 (repeated 97 more times in 10s)"]
+    assert summaries[0].repeats == 97 and summaries[0].levelno == logging.WARNING
+
+def test_async_handler_writes_json_lines_off_thread():
+    lines = []
+    class Collect(logging.Handler):
+        def emit(self, record):
+            lines.append(self.format(record))
+    target = Collect()
+    target.setFormatter(JsonFormatter())
+    handler = AsyncHandler(target, maxsize=100)
+    logger = logging.getLogger("test_async")
+    logger.addHandler(handler)
+    logger.propagate = False
+    for i in range(150): # More than the queue holds: the writer may fall behind, callers never block
+        logger.warning("packet %d", i)
+    handler.stop()
+    entries = [json.loads(line) for line in lines]
+    assert len(entries) + handler.dropped == 150
+    assert entries[0] == {"time": entries[0]["time"], "level": "WARNING", "logger": "test_async",
+                          "message": "packet 0"}
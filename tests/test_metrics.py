@@ -0,0 +1,55 @@
+import threading
+import numpy as np
+from src.core.batcher import MicroBatcher
+from src.core.metrics import Histogram, NoopHistogram, render_value
+from src.core.pipeline import Pipeline, Stage, CLUSTERING
+
+def test_histogram_buckets_and_prometheus_text():
+    hist = Histogram("guardnet_stage_seconds", "stage", ["parse", "kmeans"],
+                     buckets=(0.001, 0.01, 0.1), help="Stage time")
+    def observe():
+        for value in (0.0005, 0.001, 0.005, 0.05, 3.0):
+            hist.observe("parse", value)
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    snap = hist.snapshot()["parse"]
+    assert snap["buckets"] == [8, 4, 4, 4] # le=0.001 includes 0.001 itself; last = +Inf
+    assert snap["count"] == 20 and abs(snap["sum"] - 4 * 3.0565) < 1e-4
+
+    text = "\n".join(hist.render())
+    assert "# TYPE guardnet_stage_seconds histogram" in text
+    assert 'guardnet_stage_seconds_bucket{stage="parse",le="0.01"} 12' in text   # Cumulative
+    assert 'guardnet_stage_seconds_bucket{stage="parse",le="+Inf"} 20' in text
+    assert 'guardnet_stage_seconds_count{stage="parse"} 20' in text
+    assert 'guardnet_stage_seconds_count{stage="kmeans"} 0' in text
+    assert render_value("guardnet_verdicts_total", "counter", "Verdicts", {"normal": 3}, "status")[-1] \
+        == 'guardnet_verdicts_total{status="normal"} 3'
+
+    # Switched off: no clock, nothing recorded
+    off = NoopHistogram()
+    assert off.lap("parse", off.start()) == 0.0 and off.render() == []
+    print("✅ Fixed-bucket histograms render as Prometheus text")
+
+def test_pipeline_and_batcher_hooks():
+    hist = Histogram("t", "stage", ["everything", "lstm_predict"])
+    sizes = Histogram("s", "model", ["lstm"], buckets=(1, 4, 16), unit=1)
+
+    class Everything(Stage):
+        name = "everything"
+        def process(self, batch, rows):
+            batch.decide(rows, False, 1.0, CLUSTERING)
+
+    Pipeline([Everything()], observe=hist.observe).run(np.zeros((3, 8)))
+    assert hist.snapshot()["everything"]["count"] == 1
+
+    def on_batch(rows, seconds):
+        sizes.observe("lstm", rows)
+        hist.observe("lstm_predict", seconds)
+    batcher = MicroBatcher(lambda X: np.zeros(len(X)), max_wait_ms=0.1, on_batch=on_batch)
+    batcher.predict(np.zeros((3, 1, 8)))
+    batcher.predict(np.zeros((1, 1, 8)))
+    assert sizes.snapshot()["lstm"]["buckets"] == [1, 1, 0, 0] and sizes.snapshot()["lstm"]["sum"] == 4
+    assert hist.snapshot()["lstm_predict"]["count"] == 2
+    print("✅ Pipeline stages and LSTM batches feed the histograms")
@@ -0,0 +1,109 @@
+import os
+import shutil
+import time
+import joblib
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from src.core.model_registry import ModelRegistry
+from src.core.preprocessor import DataPreprocessor
+
+ML_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'ml')
+
+def _write_artifacts(ml_dir, seed, sequence_length=1):
+    """Small but real artifact set: K-Means + both scalers + the exported LSTM"""
+    rng = np.random.default_rng(seed)
+    X = np.abs(rng.normal(size=(200, 8))) * [10, 1, 443, 1, 20000, 20000, 10, 10]
+    X[:100] *= 0.01 # Tiny packets = malware
+    X[100:, 4] += 5000
+    scaler = StandardScaler().fit(X)
+    joblib.dump(KMeans(n_clusters=2, n_init=1, random_state=seed).fit(scaler.transform(X)),
+                os.path.join(ml_dir, 'kmeans_model.joblib'))
+    joblib.dump(scaler, os.path.join(ml_dir, 'kmeans_scaler.joblib'))
+    preprocessor = DataPreprocessor(sequence_length)
+    preprocessor.fit(X)
+    joblib.dump(preprocessor, os.path.join(ml_dir, 'scaler.joblib'))
+    if not os.path.exists(os.path.join(ml_dir, 'guardnet_lstm.npz')):
+        shutil.copy(os.path.join(ML_DIR, 'guardnet_lstm.npz'), ml_dir)
+
+def _registry(ml_dir, **kwargs):
+    registry = ModelRegistry(str(ml_dir), lstm_backend="numpy", lstm_load="eager", **kwargs)
+    registry.load()
+    return registry
+
+def test_reload_swaps_complete_set(tmp_path):
+    _write_artifacts(tmp_path, seed=1)
+    registry = _registry(tmp_path)
+    old = registry.active
+    assert registry.ready and registry.model_info()["version"] == old.version
+    assert not registry.reload() # Nothing changed on disk
+
+    _write_artifacts(tmp_path, seed=2)
+    assert registry.reload()
+    new = registry.active
+    assert new is not old and new.version > old.version and registry.reloads == 1
+    assert new.kmeans_scaler is not old.kmeans_scaler and new.lstm_predict is not None
+    centroids = new.kmeans_scaler.inverse_transform(new.kmeans_model.cluster_centers_)
+    assert centroids[new.malware_cluster, 4] < 1000 # Recalibrated on the new clusters
+    assert registry.lstm_predict(np.ones((3, 8))).shape == (3,)
+    print("✅ Hot reload swaps a complete model set")
+
+def test_failed_reload_keeps_serving(tmp_path):
+    _write_artifacts(tmp_path, seed=1)
+    registry = _registry(tmp_path)
+    active = registry.active
+    with open(tmp_path / 'kmeans_model.joblib', 'wb') as f:
+        f.write(b"half-written")
+
+    assert not registry.reload()
+    assert registry.active is active and registry.reload_error and registry.ready
+    print("✅ Broken artifacts keep the current version")
+
+def test_watcher_triggers_reload(tmp_path):
+    _write_artifacts(tmp_path, seed=1)
+    registry = _registry(tmp_path, reload_debounce=0.2)
+    version = registry.active.version
+    registry.watch()
+    try:
+        _write_artifacts(tmp_path, seed=3)
+        deadline = time.time() + 10
+        while registry.active.version == version and time.time() < deadline:
+            time.sleep(0.05)
+        assert registry.active.version > version and registry.model_info()["hot_reload"]
+    finally:
+        registry.stop_watching()
+    print("✅ Watcher picks up new artifacts")
+
+def test_sequence_mode_from_preprocessor(tmp_path):
+    _write_artifacts(tmp_path, seed=1)
+    registry = _registry(tmp_path, sequence_memory=1024 * 1024)
+    assert registry.active.sequences is None
+
+    # Retrained on windows of 4 -> the new set keeps per-key histories
+    _write_artifacts(tmp_path, seed=2, sequence_length=4)
+    assert registry.reload()
+    sequences = registry.active.sequences
+    assert registry.active.sequence_length == 4 and sequences.max_keys == 1024 * 1024 // (2 * 4 * 8 * 4)
+    windows = sequences.push(["k"] * 3, np.ones((3, 8)))
+    assert registry.lstm_predict(windows).shape == (3,)
+    print("✅ Sequence mode follows the model")
+
+def test_stale_numpy_export_is_refused(tmp_path):
+    _write_artifacts(tmp_path, seed=1)
+    (tmp_path / 'guardnet_lstm.keras').write_bytes(b"retrained, never exported") # Digest mismatch
+    registry = ModelRegistry(str(tmp_path), lstm_backend="numpy", lstm_load="eager")
+    registry.load()
+    assert registry.active.lstm_predict is None and "stale export" in registry.lstm_error
+    print("✅ A stale .npz is never served under the numpy backend")
+
+def test_reload_never_pairs_new_scaler_with_stale_export(tmp_path):
+    _write_artifacts(tmp_path, seed=1)
+    registry = _registry(tmp_path)
+    old = registry.active
+
+    # Retrain writes a new .keras + scaler.joblib, but the .npz was not re-exported
+    _write_artifacts(tmp_path, seed=2)
+    (tmp_path / 'guardnet_lstm.keras').write_bytes(b"retrained")
+    assert not registry.reload()
+    assert registry.active is old and "stale export" in registry.reload_error
+    assert registry.active.lstm_scaler is old.lstm_scaler # Still the set the .npz belongs to
@@ -0,0 +1,43 @@
+import os
+import numpy as np
+import pytest
+from src.ml.numpy_lstm import NumpyLSTM, export_lstm_weights, KERAS_PATH
+
+tf = pytest.importorskip("tensorflow")
+
+def _random_inputs(n, time_steps=1):
+    rng = np.random.default_rng(42)
+    return (rng.normal(size=(n, time_steps, 8)) * 3).astype(np.float32)
+
+def test_parity_with_production_model(tmp_path):
+    """NumPy engine must reproduce Keras predictions for the shipped model"""
+    npz_path = export_lstm_weights(KERAS_PATH, os.path.join(tmp_path, "model.npz"))
+    keras_model = tf.keras.models.load_model(KERAS_PATH)
+    engine = NumpyLSTM.load(npz_path)
+
+    X = _random_inputs(256)
+    expected = keras_model.predict(X, verbose=0)[:, 0]
+
+    # Batched and single-record paths
+    np.testing.assert_allclose(engine.predict(X), expected, atol=1e-5)
+    np.testing.assert_allclose(engine.predict(X[0, 0]), expected[:1], atol=1e-5)
+    print("✅ NumPy LSTM matches Keras")
+
+def test_batchnorm_folding_and_sequences(tmp_path):
+    """A freshly built model with non-trivial BatchNorm stats and T > 1"""
+    from src.ml.dl_model import build_lstm_model
+
+    model = build_lstm_model((5, 8))
+    bn = next(l for l in model.layers if type(l).__name__ == "BatchNormalization")
+    rng = np.random.default_rng(0)
+    gamma, beta, mean, var = bn.get_weights()
+    bn.set_weights([
+        rng.uniform(0.5, 2.0, gamma.shape), rng.normal(size=beta.shape),
+        rng.normal(size=mean.shape), rng.uniform(0.5, 2.0, var.shape)
+    ])
+    keras_path = os.path.join(tmp_path, "model.keras")
+    model.save(keras_path)
+
+    engine = NumpyLSTM.load(export_lstm_weights(keras_path, os.path.join(tmp_path, "model.npz")))
+    X = _random_inputs(64, time_steps=5)
+    np.testing.assert_allclose(engine.predict(X), model.predict(X, verbose=0)[:, 0], atol=1e-5)
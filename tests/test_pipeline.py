@@ -0,0 +1,101 @@
+import time
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from src.core.batcher import MicroBatcher
+from src.core.centroids import NearestCentroid
+from src.core.model_registry import ModelSet
+from src.core.pipeline import (Pipeline, Stage, ListStage, CacheStage, KMeansGate, LSTMGate,
+                               CLUSTERING, DEEP_LEARNING, ALLOWLIST, DENYLIST, BANLIST)
+from src.core.banlist import BanList
+from src.core.verdict_cache import VerdictCache
+
+def _models():
+    # Two tight clusters: tiny (malware) around 0, heavy around 100
+    X = np.r_[np.zeros((20, 8)), np.full((20, 8), 100.0)] + np.random.default_rng(0).normal(0, 1, (40, 8))
+    models = ModelSet()
+    models.kmeans_scaler = StandardScaler().fit(X)
+    models.kmeans_model = KMeans(n_clusters=2, n_init=1, random_state=0).fit(models.kmeans_scaler.transform(X))
+    centroids = models.kmeans_scaler.inverse_transform(models.kmeans_model.cluster_centers_)
+    models.malware_cluster = int(np.argmin(centroids[:, 4]))
+    models.centroids = NearestCentroid.from_sklearn(models.kmeans_scaler, models.kmeans_model)
+    return models
+
+def test_cascade_short_circuits_and_measures():
+    lstm_calls = []
+    def lstm(X, models=None):
+        lstm_calls.append(len(X))
+        return np.full(len(X), 0.9)
+
+    stages = [LSTMGate(MicroBatcher(lstm, max_wait_ms=0.1), threshold=0.5),
+              KMeansGate(threshold=3.0),
+              ListStage(allow=["10.0.0.1"], deny=["6.6.6.6", "10.0.0.1"])]
+    pipeline = Pipeline(stages, models_fn=_models)
+    assert [s.name for s in pipeline.stages] == ["lists", "kmeans", "lstm"] # Cheapest first
+
+    X = np.array([[0.0] * 8, [100.0] * 8, [5000.0] * 8, [100.0] * 8])
+    records = [{"src_ip": "1.1.1.1"}, {"src_ip": "2.2.2.2"}, {"src_ip": "3.3.3.3"}, {"src_ip": "6.6.6.6"}]
+    batch = pipeline.run(X, records)
+
+    assert batch.source.tolist() == [CLUSTERING, CLUSTERING, DEEP_LEARNING, DENYLIST]
+    assert batch.malicious.tolist() == [True, False, True, True]
+    assert lstm_calls == [1] # Only the outlier reached the expensive stage
+
+    metrics = {m["name"]: m for m in pipeline.metrics()}
+    assert (metrics["lists"]["rows_in"], metrics["lists"]["decided"]) == (4, 1)
+    assert (metrics["kmeans"]["rows_in"], metrics["kmeans"]["hit_rate"]) == (3, round(2 / 3, 4))
+    assert metrics["lstm"]["rows_in"] == 1 and metrics["lstm"]["total_ms"] > 0
+
+    # Deny wins over allow
+    batch = pipeline.run(np.zeros((1, 8)), [{"src_ip": "10.0.0.1"}])
+    assert batch.source.tolist() == [DENYLIST]
+    print("✅ Cascade short-circuits cheapest first")
+
+def test_stuck_lstm_batcher_times_out():
+    def stuck(X, models=None):
+        time.sleep(1)
+        return np.zeros(len(X))
+
+    pipeline = Pipeline([LSTMGate(MicroBatcher(stuck, max_wait_ms=0.1), timeout=0.05)], models_fn=_models)
+    with pytest.raises(TimeoutError): # The app answers 503 instead of holding the thread
+        pipeline.run(np.full((1, 8), 5000.0))
+
+def test_early_exit_and_explicit_order():
+    class Everything(Stage):
+        name, cost = "everything", 0.01
+        def process(self, batch, rows):
+            batch.decide(rows, False, 1.0, ALLOWLIST)
+
+    class Never(Stage):
+        name, cost = "never", 0.001
+        def process(self, batch, rows):
+            raise AssertionError("no rows left, must be skipped")
+
+    pipeline = Pipeline([Everything(), Never()], sort_by_cost=False)
+    assert pipeline.run(np.zeros((3, 8))).decided.all()
+    assert {m["name"]: m["calls"] for m in pipeline.metrics()} == {"everything": 1, "never": 0}
+
+def test_banned_sources_short_circuit(tmp_path):
+    bans = BanList(str(tmp_path / "bans.ipset"))
+    bans.ban("6.6.6.6")
+    bans.ban("10.0.0.1")
+    pipeline = Pipeline([ListStage(allow=["10.0.0.1"], bans=bans), KMeansGate()], models_fn=_models)
+    X = np.array([[100.0] * 8] * 3)
+    batch = pipeline.run(X, [{"src_ip": "6.6.6.6"}, {"src_ip": "10.0.0.1"}, {"src_ip": "1.1.1.1"}])
+    # Allowlist beats a ban; only the unlisted row reaches the model
+    assert batch.source.tolist() == [BANLIST, ALLOWLIST, CLUSTERING]
+    assert batch.malicious.tolist() == [True, False, False]
+
+def test_cache_stage_stores_only_model_verdicts():
+    cache = VerdictCache(max_size=100)
+    pipeline = Pipeline([ListStage(deny=["6.6.6.6"]), CacheStage(cache, lambda: 1), KMeansGate()],
+                        models_fn=_models)
+    X = np.array([[0.0] * 8, [100.0] * 8])
+    pipeline.run(X, [{"src_ip": "6.6.6.6"}, {"src_ip": "1.1.1.1"}])
+    assert len(cache._entries) == 1 # The denylisted row is not a function of its features
+
+    batch = pipeline.run(X, [{}, {}])
+    metrics = {m["name"]: m for m in pipeline.metrics()}
+    assert metrics["cache"]["decided"] == 1 and batch.source.tolist() == [CLUSTERING, CLUSTERING]
+    print("✅ Cache stage")
@@ -0,0 +1,56 @@
+import threading
+import time
+from src.core.profiler import SamplingProfiler
+
+def _busy_math(stop):
+    x = 0
+    while not stop.is_set():
+        x += sum(i * i for i in range(200))
+    return x
+
+def wsgi_app(stop):
+    # Same function name as Flask's entry point: marks a request thread
+    _busy_math(stop)
+
+def test_profile_writes_collapsed_stacks_and_summary(tmp_path):
+    stop = threading.Event()
+    request_thread = threading.Thread(target=wsgi_app, args=(stop,))
+    idle_thread = threading.Thread(target=stop.wait) # Not a request: ignored
+    request_thread.start(); idle_thread.start()
+
+    profiler = SamplingProfiler(str(tmp_path), interval=0.002)
+    assert profiler.start(seconds=0.4)
+    assert not profiler.start(seconds=1) # One at a time
+    while profiler.active:
+        time.sleep(0.05)
+    stop.set(); request_thread.join(); idle_thread.join()
+
+    result = profiler.last_result
+    assert result["samples"] > 10 and result["thread_samples"] > 0
+    lines = open(result["collapsed"]).read().splitlines()
+    # Root first, innermost last, then the sample count
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("wsgi_app (tests/test_profiler.py" in line and "_busy_math" in line for line in lines)
+    assert all("wsgi_app" in line for line in lines) # The idle thread was skipped
+    summary = open(result["summary"]).read()
+    assert "TOP 25 FUNCTIONS BY SELF" in summary and "_busy_math" in summary
+    print("✅ Sampling profiler writes collapsed stacks + top functions")
+
+def test_profile_stops_after_request_count(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+    profiler.start(seconds=30, requests=3)
+    for _ in range(3):
+        profiler.count_request()
+    deadline = time.time() + 5
+    while profiler.active and time.time() < deadline:
+        time.sleep(0.01)
+    assert not profiler.active and profiler.last_result["requests"] == 3
+
+def test_failed_profile_releases_the_profiler(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path))
+    assert profiler.start(seconds=1, interval=-0.001) # Invalid switch interval
+    deadline = time.time() + 5
+    while profiler.active and time.time() < deadline:
+        time.sleep(0.01)
+    assert not profiler.active and "error" in profiler.last_result
+    assert profiler.start(seconds=0.05, interval=0.01) # Not stuck in 409
@@ -0,0 +1,96 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from src.core.sentinel import SentinelAI, ActionQueue, FileAction, WebhookAction
+
+def _sentinel(**options):
+    alerts = []
+    sentinel = SentinelAI()
+    sentinel.configure(actions=[alerts.extend], **options)
+    return sentinel, alerts
+
+def test_rate_rule_is_per_source_and_slides():
+    sentinel, alerts = _sentinel(window=10, rate=5, cooldown=30)
+    sentinel.log_threats([{"src_ip": "10.0.0.1"}] * 5, now=100.0)
+    sentinel.log_threats([{"src_ip": "10.0.0.2"}] * 5, now=100.5)
+    assert sentinel.alerts["rate"] == 0 # 5 each, not > 5
+
+    sentinel.log_threats([{"src_ip": "10.0.0.1"}] * 20, now=101.0)
+    sentinel.actions.flush()
+    assert [(a["source"], a["rule"], a["value"]) for a in alerts] == [("10.0.0.1", "rate", 6)]
+
+    # Cooldown: no second alert for the same source and rule
+    sentinel.log_threats([{"src_ip": "10.0.0.1"}] * 20, now=105.0)
+    assert sentinel.alerts["rate"] == 1
+
+    # Old buckets fall out of the window: 10.0.0.2 starts over
+    sentinel.log_threats([{"src_ip": "10.0.0.2"}] * 5, now=111.0)
+    assert sentinel.alerts["rate"] == 1
+
+    # Unattributed records share one "unknown" source
+    sentinel.log_threats([{"id": i} for i in range(6)], now=112.0)
+    sentinel.actions.flush()
+    assert alerts[-1]["source"] == "unknown"
+
+def test_fanout_and_flag_rules():
+    sentinel, alerts = _sentinel(window=10, rate=1000, fanout=4, flags=3)
+    scan = [{"src_ip": "scanner", "service": port} for port in (22, 22, 80, 443)]
+    sentinel.log_threats(scan, now=50.0)
+    assert sentinel.alerts["fanout"] == 0 # 3 distinct services
+    sentinel.log_threats([{"src_ip": "scanner", "service": 8080}], now=51.0)
+    assert sentinel.alerts["fanout"] == 1
+
+    # Services seen outside the window do not count
+    sentinel.log_threats([{"src_ip": "slow", "service": p} for p in (1, 2, 3)], now=50.0)
+    sentinel.log_threats([{"src_ip": "slow", "service": 4}], now=70.0)
+    assert sentinel.alerts["fanout"] == 1
+
+    sentinel.log_threats([{"src_ip": "syn", "flag": 0}] * 5, now=60.0)
+    sentinel.log_threats([{"src_ip": "syn", "flag": 2}] * 3, now=60.0)
+    sentinel.actions.flush()
+    assert sentinel.alerts["flags"] == 1
+    assert {a["rule"] for a in alerts} == {"fanout", "flags"}
+
+def test_sources_are_bounded():
+    sentinel, _ = _sentinel(window=10, max_sources=100, idle_timeout=30)
+    sentinel.log_threats([{"src_ip": f"10.0.{i // 256}.{i % 256}"} for i in range(1000)], now=0.0)
+    assert sentinel.metrics()["sources"] == 100
+    assert sentinel.evicted_lru == 900
+
+    sentinel.log_threats([{"src_ip": "new"}], now=100.0) # Everything else is idle
+    assert sentinel.metrics()["sources"] == 1
+    assert sentinel.evicted_idle == 100
+
+def test_action_queue_batches_and_survives_failures(tmp_path):
+    path = tmp_path / "banned_ips.log"
+    def broken(alerts):
+        raise RuntimeError("webhook down")
+    actions = ActionQueue([broken, FileAction(str(path))], maxsize=3, batch_size=2)
+    alert = {"time": 0, "source": "10.0.0.1", "rule": "rate", "value": 6, "message": "x"}
+    assert all(actions.put(dict(alert)) for _ in range(3))
+    assert not actions.put(dict(alert)) # Full: dropped, never blocks detection
+
+    actions.flush()
+    assert path.read_text().count("BLOCK 10.0.0.1 TRIGGERED BY SENTINEL (rate: 6)") == 3
+    assert (actions.batches, actions.delivered, actions.dropped, actions.failures) == (2, 3, 1, 2)
+
+def test_webhook_posts_batches_to_a_local_stand_in():
+    received = []
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(204)
+            self.end_headers()
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sentinel = SentinelAI()
+        sentinel.configure(rate=2, actions=[WebhookAction(f"http://127.0.0.1:{server.server_port}/")])
+        sentinel.log_threats([{"src_ip": "a"}] * 3 + [{"src_ip": "b"}] * 3, now=10.0)
+        sentinel.actions.flush()
+    finally:
+        server.shutdown()
+    assert [[a["source"] for a in body["alerts"]] for body in received] == [["a", "b"]]
@@ -0,0 +1,48 @@
+import numpy as np
+from src.core.preprocessor import DataPreprocessor
+from src.core.sequence_buffer import SequenceBuffer
+
+def test_windows_are_ordered_and_edge_padded():
+    buf = SequenceBuffer(window=3, num_features=2)
+    rows = np.arange(10, dtype=np.float32).reshape(5, 2) # 5 rows for one key: wraps the ring
+
+    out = buf.push(["a"] * 5, rows)
+    assert out.shape == (5, 3, 2)
+    assert out[0].tolist() == [[0, 1]] * 3                          # First row repeated
+    assert out[1].tolist() == [[0, 1], [0, 1], [2, 3]]
+    assert out[4].tolist() == [[4, 5], [6, 7], [8, 9]]              # Last 3, oldest first
+
+    # Other keys do not interfere; `want` selects which windows are returned
+    out = buf.push(["b", "a"], [[100, 100], [10, 11]], want=[False, True])
+    assert out.tolist() == [[[6, 7], [8, 9], [10, 11]]]
+    print("✅ Ring buffer windows")
+
+def test_idle_and_lru_eviction():
+    # Memory cap of exactly 2 keys
+    buf = SequenceBuffer(window=4, num_features=8, max_bytes=2 * 2 * 4 * 8 * 4, idle_timeout=10)
+    assert buf.max_keys == 2
+    row = np.ones((1, 8))
+    buf.push(["a"], row, now=0)
+    buf.push(["b"], row, now=1)
+    buf.push(["a"], row, now=2)
+    buf.push(["c"], row, now=3)  # Full: evicts "b" (least recently seen)
+    assert buf.evicted_lru == 1 and len(buf) == 2
+
+    buf.push(["d"], row, now=13.5) # "a" (2) and "c" (3) idle for > 10s
+    assert buf.evicted_idle == 2 and len(buf) == 1
+    print("✅ Idle / LRU eviction")
+
+def test_training_windows_match_serving():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 8)) * 100
+    groups = np.repeat([0, 1, 2], [10, 25, 5])
+    preprocessor = DataPreprocessor(sequence_length=6)
+    preprocessor.fit(X)
+
+    windows, index = preprocessor.transform_sequences(X, groups)
+    assert windows.shape == (len(X) + 3 * 5 - 5, 6, 8) and np.shares_memory(windows, windows.base)
+
+    buf = SequenceBuffer(window=6)
+    served = buf.push(groups.tolist(), preprocessor.scaler.transform(X))
+    assert np.allclose(windows[index], served, atol=1e-6)
+    print("✅ Training windows == serving windows")
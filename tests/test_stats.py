@@ -0,0 +1,59 @@
+import multiprocessing
+import threading
+from src.core.stats import ShardedCounters, RecentLog
+
+def _hammer(counters, n):
+    for _ in range(n):
+        counters.add("normal")
+        counters.add("malicious", 2)
+
+def test_threaded_counts_are_exact():
+    counters = ShardedCounters(["normal", "malicious"], max_shards=4)
+
+    # More threads than shards: exited threads hand their shard back
+    for _ in range(5):
+        threads = [threading.Thread(target=_hammer, args=(counters, 10000)) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+    assert counters.snapshot() == {"normal": 400000, "malicious": 800000}
+    print("✅ Sharded counters are exact under threads")
+
+def test_shared_memory_counts_across_processes():
+    counters = ShardedCounters(["normal", "malicious"], shared=True)
+    counters.add("normal", 5) # Parent writes too
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_hammer, args=(counters, 5000)) for _ in range(4)]
+    for p in workers: p.start()
+    for p in workers: p.join()
+
+    assert counters.snapshot() == {"normal": 20005, "malicious": 40000}
+    print("✅ Shared-memory counters give cluster-wide totals")
+
+def test_recent_log_ring_buffer():
+    log = RecentLog(size=3)
+    for i in range(5):
+        log.append({"id": i})
+
+    assert [e["id"] for e in log.snapshot()] == [4, 3, 2]
+    assert [e["id"] for e in log.snapshot(since=3)] == [4]
+    assert log.last_seq == 4
+
+    log.extend([{"id": 5}, {"id": 6}]) # One batch
+    assert [e["id"] for e in log.snapshot(since=4)] == [6, 5] and log.last_seq == 6
+
+def test_recent_log_cursor_never_skips_entries():
+    # A reader following last_seq (like the SSE broadcaster) must see every entry
+    log = RecentLog(size=100000)
+    writers = [threading.Thread(target=lambda: [log.append(i) for i in range(5000)]) for _ in range(4)]
+    for t in writers:
+        t.start()
+    seen, cursor = 0, -1
+    while any(t.is_alive() for t in writers) or cursor < log.last_seq:
+        until = log.last_seq
+        seen += len(log.snapshot(since=cursor, until=until))
+        cursor = until
+    for t in writers:
+        t.join()
+    assert seen == 20000
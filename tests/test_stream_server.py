@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from src.core.stream_server import start_stream_server, StreamClient
+
+API_KEY = "test-key"
+
+def fake_pipeline(ids, X):
+    """Tiny packets are malicious, big ones go to 'Deep Learning'"""
+    malicious = X[:, 4] < 100
+    deep = X[:, 4] > 10000
+    return malicious, np.full(len(X), 0.75), deep
+
+@pytest.fixture
+def server():
+    srv = start_stream_server("tcp://127.0.0.1:0", fake_pipeline, API_KEY, chunk_size=3)
+    yield f"tcp://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+def test_stream_roundtrip(server):
+    client = StreamClient(server, API_KEY)
+    ids = np.arange(10, dtype=np.uint64)
+    X = np.zeros((10, 8))
+    X[:, 4] = [50, 500, 50000, 50, 500, 50000, 50, 500, 50000, 50]
+
+    # Several frames on the same authenticated connection
+    for _ in range(3):
+        verdicts = client.analyze(ids, X)
+        assert list(verdicts["id"]) == list(range(10))
+        assert list(verdicts["status"]) == [1, 0, 0] * 3 + [1]
+        assert list(verdicts["source"]) == [0, 0, 1] * 3 + [0]
+        assert np.allclose(verdicts["confidence"], 0.75)
+    client.close()
+    print("✅ Binary stream ingestion is working")
+
+def test_stream_rejects_bad_key(server):
+    with pytest.raises(PermissionError):
+        StreamClient(server, "wrong-password")
@@ -0,0 +1,70 @@
+import joblib
+import numpy as np
+import pytest
+from src.core.dataset import FeatureDataset
+from src.ml import streaming, train_clustering
+
+def _malware_dataset(path, n=5000):
+    # Tiny packets, like the real captures
+    rng = np.random.default_rng(0)
+    X = np.zeros((n, 8))
+    X[:, 0] = 0.1
+    X[:, 1] = 1
+    X[:, 2] = rng.integers(1024, 65535, n)
+    X[:, 4] = rng.integers(20, 80, n)
+    dataset = FeatureDataset(str(path))
+    dataset.append(X[:3000])
+    dataset.append(X[3000:])
+    return dataset
+
+def test_mixed_batches_are_bounded_and_deterministic(tmp_path):
+    dataset = _malware_dataset(tmp_path / "ds")
+    batches = list(streaming.mixed_batches(dataset, streaming.KMEANS_NORMALS, batch_size=1024))
+    assert max(len(X) for X, _ in batches) == 2048
+    assert sum(y.sum() for _, y in batches) == len(dataset) # One label-1 row per dataset row
+
+    again = list(streaming.prefetched(streaming.mixed_batches(dataset, streaming.KMEANS_NORMALS, batch_size=1024)))
+    assert all(np.array_equal(a[0], b[0]) for a, b in zip(batches, again))
+
+def test_streaming_kmeans_separates_clusters(tmp_path, monkeypatch):
+    dataset = _malware_dataset(tmp_path / "ds")
+    monkeypatch.setattr(train_clustering, "open_training_dataset", lambda: dataset)
+    monkeypatch.setattr(train_clustering, "MODEL_PATH", str(tmp_path / "kmeans.joblib"))
+    monkeypatch.setattr(train_clustering, "SCALER_PATH", str(tmp_path / "scaler.joblib"))
+
+    train_clustering.train_kmeans_streaming(batch_size=1024)
+    kmeans, scaler = joblib.load(tmp_path / "kmeans.joblib"), joblib.load(tmp_path / "scaler.joblib")
+    centers = scaler.inverse_transform(kmeans.cluster_centers_)
+    assert sorted(centers[:, 4] < 1000) == [False, True] # One tiny-bytes cluster, one heavy
+    print("✅ Streaming K-Means")
+
+def test_tf_dataset_pipeline(tmp_path):
+    pytest.importorskip("tensorflow")
+    from src.core.preprocessor import DataPreprocessor
+    from src.ml.train_model import make_tf_dataset, TRAIN_BATCH_SIZE
+
+    dataset = _malware_dataset(tmp_path / "ds")
+    preprocessor = DataPreprocessor()
+    streaming.fit_scaler(preprocessor, streaming.mixed_batches(dataset, streaming.LSTM_NORMALS, 1000))
+
+    train = make_tf_dataset(dataset, preprocessor, batch_size=1000)
+    validation = make_tf_dataset(dataset, preprocessor, validation=True, batch_size=1000)
+    rows = labels = 0
+    for X, y in train:
+        assert X.shape[1:] == (1, 8) and X.shape[0] <= TRAIN_BATCH_SIZE
+        rows += X.shape[0]
+        labels += int(y.numpy().sum())
+    assert rows == 8000 and labels == 4000 # 4 of 5 batches for training, half malicious
+    assert sum(X.shape[0] for X, _ in validation) == 2000
+    print("✅ tf.data pipeline")
+
+def test_tf_dataset_sequence_windows(tmp_path):
+    pytest.importorskip("tensorflow")
+    from src.core.preprocessor import DataPreprocessor
+    from src.ml.train_model import make_tf_dataset
+
+    dataset = _malware_dataset(tmp_path / "ds", n=600)
+    preprocessor = DataPreprocessor(sequence_length=4)
+    streaming.fit_scaler(preprocessor, streaming.mixed_batches(dataset, streaming.LSTM_NORMALS, 300))
+    X, _ = next(iter(make_tf_dataset(dataset, preprocessor, batch_size=300)))
+    assert X.shape[1:] == (4, 8)
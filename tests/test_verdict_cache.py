@@ -0,0 +1,42 @@
+import time
+import numpy as np
+from src.core.verdict_cache import VerdictCache
+
+def _verdicts(n, malicious=True):
+    return np.full(n, malicious), np.full(n, 0.9), np.zeros(n, dtype=bool)
+
+def test_hit_miss_and_lru_eviction():
+    cache = VerdictCache(max_size=2, ttl=0)
+    X = np.array([[1.0] * 8, [2.0] * 8, [3.0] * 8])
+    keys = cache.keys(X)
+
+    cache.store(keys[:2], *_verdicts(2), generation=1)
+    hit, malicious, confidence, _ = cache.lookup(keys, generation=1)
+    assert list(hit) == [True, True, False]
+    assert malicious[0] and confidence[1] == 0.9
+
+    cache.store(keys[2:], *_verdicts(1), generation=1) # Row 0 is least recently used
+    hit, *_ = cache.lookup(keys, generation=1)
+    assert list(hit) == [False, True, True]
+    assert cache.metrics()["evictions"] == 1
+
+def test_quantization_groups_similar_records():
+    cache = VerdictCache(quantum=[0, 0, 0, 0, 100, 100, 0, 0])
+    a = np.array([[0.1, 1, 443, 0, 1020, 0, 5, 5]])
+    b = np.array([[0.1, 1, 443, 0, 980, 30, 5, 5]])  # Same 100-byte buckets
+    c = np.array([[0.1, 1, 80, 0, 1020, 0, 5, 5]])   # Different port -> exact feature
+    assert cache.keys(a) == cache.keys(b)
+    assert cache.keys(a) != cache.keys(c)
+
+def test_ttl_and_model_reload_invalidation():
+    cache = VerdictCache(ttl=0.05)
+    keys = cache.keys(np.ones((1, 8)))
+    cache.store(keys, *_verdicts(1), generation=1)
+
+    assert cache.lookup(keys, generation=1)[0][0]
+    assert not cache.lookup(keys, generation=2)[0][0] # Reload wipes entries
+
+    cache.store(keys, *_verdicts(1), generation=2)
+    time.sleep(0.1)
+    assert not cache.lookup(keys, generation=2)[0][0]
+    assert cache.metrics()["expirations"] == 1